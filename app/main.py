@@ -9,41 +9,103 @@ New architecture:
 - Clean separation of concerns makes code easier to maintain and test
 
 Endpoints:
-- POST /ingest - Upload and index a PDF (with optional vision processing)
+- POST /ingest - Upload a PDF; indexing (with optional vision processing) runs as a background job
+- GET /jobs/{job_id} - Progress, throughput and ETA of an ingest job
 - POST /ask - Ask questions about an ingested policy
+- POST /ask-all - Ask across all (or a filtered set of) ingested policies
 - GET /list-policies - List all ingested policies + Stand Allone Images
 - GET /health - Health check
 """
 
 from __future__ import annotations
 
+import asyncio
+import os
+import time
 import uuid
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Literal
 
 from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 # Import infrastructure
-from app.rag.ollama_client import OllamaClient
+from app.rag.answer_cache import AnswerCache
+from app.rag.disk_cache import VisionCache
+from app.rag.context_builder import DEFAULT_CONTEXT_TOKENS
+from app.rag.global_index import POLICY_TYPES, GlobalIndexSet
+from app.rag.jobs import JOB_STATUSES, JobConflict, JobQueue, JobWorkerPool
+from app.rag.ollama_client import AsyncOllamaClient, OllamaClient
+from app.rag.policy_cache import PolicyCache
+from app.rag.query_memo import query_memo
 from app.rag.store import PolicyStore
 
 # Import our NEW pipeline orchestrators
-from app.rag.pipelines.ingestion_pipeline import ingest_policy_with_vision
-from app.rag.pipelines.query_pipeline import answer_question
+from app.rag.pipelines.query_pipeline import (
+    answer_question,
+    answer_question_all,
+    retrieve_chunks,
+    stream_answer,
+)
+from app.rag.processors.index_processor import INDEX_TYPES
 
 # Import Planning
 from app.rag.departments.planning.compliance_api import router as planning_router
 from app.rag.departments.planning.plat_chat_api import router as plat_chat_router
 from app.rag.departments.ordinance_rag.api.ordinance_router import router as ordinance_router
 from app.rag.departments.ordinance_rag.api.admin_router import router as admin_router
+from app.rag.departments.ordinance_rag.core.store import reset_client as reset_ordinance_store
 
 # =============================================================================
 # FastAPI App Setup
 # =============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup/shutdown hook.
+
+    Startup: verify the plat session directory is writable, bring the
+    global (/ask-all) index up to date with data/policies, then preload the
+    most recently ingested policies into the /ask cache. Requeue ingest jobs
+    whose worker died, start the ingest worker processes and the watcher
+    that applies finished jobs to this process's caches.
+    Shutdown: stop the watcher and workers, close the pooled Ollama
+    connections (sync + async clients) so keep-alive sockets are released
+    cleanly instead of being left for the OS to reap.
+    """
+    _check_session_store()
+    # Jobs finishing from here on are applied by the watcher; anything that
+    # finished before (even while no API process ran) is caught by the sync
+    watch_from = time.time()
+    await run_in_threadpool(_sync_global_indexes)
+    warmed = await run_in_threadpool(policy_cache.warm, top_n=int(os.getenv("POLICY_CACHE_WARM", "8")))
+    print(f"[startup] Policy cache warmed with {len(warmed)} policies")
+    requeued = job_queue.requeue_orphans()
+    if requeued:
+        print(f"[startup] Requeued {requeued} interrupted ingest jobs")
+    job_workers.start()
+    print(f"[startup] Started {job_workers.workers} ingest worker processes")
+    watcher = asyncio.create_task(_watch_jobs(since=watch_from))
+    try:
+        yield
+    finally:
+        watcher.cancel()
+        await run_in_threadpool(job_workers.stop)
+        job_queue.close()
+        ollama.close()
+        await async_ollama.aclose()
+        vision_cache.close()
+        print("[shutdown] Ollama clients closed")
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Policy RAG API with Vision",
     description=(
         "RAG service for policy documents with text + image processing. "
@@ -71,14 +133,127 @@ app.include_router(admin_router)
 # =============================================================================
 
 store = PolicyStore(root_dir="data/policies")
-ollama = OllamaClient(base_url="http://localhost:11434")
+
+# Loaded FAISS indexes + chunks for /ask, kept in memory (LRU, byte-bounded)
+# and reloaded automatically when a policy is re-ingested.
+policy_cache = PolicyCache(
+    store,
+    max_bytes=int(os.getenv("POLICY_CACHE_MAX_MB", "256")) * 1024 * 1024,
+)
+
+# Finished /ask answers for repeated questions. Set ANSWER_CACHE_NEAR_DUP
+# (e.g. 0.97) to also reuse answers for near-identical wording.
+answer_cache = AnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX", "1024")),
+    ttl_s=float(os.getenv("ANSWER_CACHE_TTL_S", "3600")),
+    near_dup_threshold=float(os.getenv("ANSWER_CACHE_NEAR_DUP")) if os.getenv("ANSWER_CACHE_NEAR_DUP") else None,
+)
+
+# Cross-policy vector index (one per embedding model) behind /ask-all.
+# Ingest adds/replaces a policy's vectors; startup backfills older policies.
+global_indexes = GlobalIndexSet(root_dir="data/global_index")
+
+# Image descriptions by (vision model, prompt version, image sha256), so an
+# image that was described once (any policy, or /ingest-image) never is again
+vision_cache = VisionCache(
+    path=os.getenv("VISION_CACHE_PATH", "data/cache/vision.sqlite"),
+    max_bytes=int(os.getenv("VISION_CACHE_MAX_MB", "64")) * 1024 * 1024,
+)
+
+# One pooled client for the whole process: connections are kept alive and
+# reused across requests (closed in lifespan() on shutdown). No persistent
+# embedding cache here: this process only embeds questions (memoized in
+# memory, see query_memo); chunk embeddings are cached by the ingest
+# workers (app.rag.jobs), so questions don't fill the SQLite cache.
+ollama = OllamaClient(
+    base_url="http://localhost:11434",
+    max_connections=16,
+    max_keepalive_connections=8,
+)
 app.state.ollama = ollama  # Make Ollama client available in app state for processors
 
+# Async twin for `async def` endpoints: awaiting the model call frees the
+# event loop, so one worker keeps serving other requests meanwhile.
+async_ollama = AsyncOllamaClient(
+    base_url="http://localhost:11434",
+    max_connections=16,
+    max_keepalive_connections=8,
+)
+app.state.async_ollama = async_ollama
+
+# Ingestion runs as background jobs: a persistent SQLite queue shared with
+# INGEST_WORKERS worker processes (0 = run workers separately with
+# `python -m app.rag.jobs`). /ordinances/admin/ingest uses the same queue.
+job_queue = JobQueue(os.getenv("JOB_QUEUE_PATH", "data/jobs/jobs.sqlite"))
+job_workers = JobWorkerPool(job_queue.path, workers=int(os.getenv("INGEST_WORKERS", "1")))
+app.state.job_queue = job_queue
+
+def _sync_global_indexes():
+    """
+    Startup catch-up for the /ask-all index: add new policies, reload the
+    ones re-ingested since (ingest generation changed - e.g. by a job that
+    finished while the API was down), drop deleted ones. The policy and
+    answer caches are in-memory and start empty, so they need nothing.
+    """
+    models = set()
+    for policy_id in store.list_indexed_policies():
+        try:
+            models.add(store.read_metadata(policy_id).get("embedding_model", "nomic-embed-text:latest"))
+        except FileNotFoundError:
+            continue
+    for model in sorted(models):
+        result = global_indexes.get(model).sync_with_store(store)
+        print(
+            f"[startup] Global index {model}: +{result['added']} / ~{result['refreshed']} "
+            f"/ -{result['removed']} policies"
+        )
+
+def _apply_ingested_policy(policy_id: str, embedding_model: str, indexed: bool = True):
+    """
+    Drop cached state for a policy whose files were just (re)written and,
+    if it has an index, (re)load its vectors into the /ask-all index.
+    """
+    # Re-ingesting an existing policy_id must not serve the old index/answers
+    policy_cache.invalidate(policy_id)
+    answer_cache.invalidate(policy_id)
+    if indexed:
+        global_indexes.get(embedding_model).refresh_policy(store, policy_id)
+
+def _apply_finished_job(job: dict):
+    """
+    Bring this process up to date with a job a worker just finished.
+
+    Workers write the policy files; this process owns the in-memory caches
+    and the global index, so it drops stale entries and (re)adds the
+    policy's vectors to the /ask-all index here.
+    """
+    if job["kind"] == "policy_ingest":
+        indexed = job["status"] == "succeeded" and bool(job["result"].get("chunks"))
+        _apply_ingested_policy(job["params"]["policy_id"], job["params"]["embedding_model"], indexed)
+    elif job["kind"] == "ordinance_ingest":
+        reset_ordinance_store()
+
+
+async def _watch_jobs(since: float, interval_s: float = 1.0):
+    """
+    Poll the job queue for jobs finished after `since` and apply them (see
+    _apply_finished_job). Jobs that finished earlier are covered by the
+    startup _sync_global_indexes(), so `since` is taken just before it.
+    """
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            finished = await run_in_threadpool(job_queue.finished_since, since)
+            for job in finished:
+                since = max(since, job["finished_at"])
+                await run_in_threadpool(_apply_finished_job, job)
+        except Exception as e:
+            print(f"[jobs] Could not apply finished jobs: {e}")
+
 # Session directory health check at startup
 from app.rag.departments.planning.session_store import check_permissions as _chk_sessions
 
-@app.on_event("startup")
-async def _check_session_store():
+def _check_session_store():
     result = _chk_sessions()
     if result["writable"]:
         print(f"[startup] Sessions directory ready: {result['session_dir']}")
@@ -92,15 +267,12 @@ async def _check_session_store():
 # Response Models (define the shape of API responses)
 # =============================================================================
 
-class IngestResponse(BaseModel):
-    """Response when a document is successfully ingested."""
+class IngestJobResponse(BaseModel):
+    """Response when a document is accepted for ingestion (work happens in a background job)."""
+    job_id: str
+    status: str
     policy_id: str
-    pages: int
-    chunks: int
-    text_chunks: int  # NEW: Separate count for text chunks
-    image_chunks: int  # NEW: Separate count for image chunks
-    embedding_model: str
-    vision_model: str | None  # NEW: Which vision model was used (or None)
+    status_url: str  # Poll this for progress; the ingestion statistics appear in "result"
 
 
 class AskRequest(BaseModel):
@@ -116,6 +288,42 @@ class AskRequest(BaseModel):
     top_k: int = Field(default=6, description="Number of chunks to retrieve")
     min_score: float = Field(default=0.25, description="Minimum similarity score")
 
+    # ANN search knobs (ignored for flat indexes; None = value saved at ingest)
+    nprobe: int | None = Field(default=None, ge=1, description="IVF indexes: clusters to search")
+    ef_search: int | None = Field(default=None, ge=1, description="HNSW indexes: search breadth")
+
+    # Hybrid retrieval: BM25 keyword search fused with vector search
+    hybrid: bool = Field(default=True, description="Also match exact terms (section numbers, codes)")
+
+    # Prompt size: retrieved excerpts are merged/de-duplicated and cut to this many tokens
+    context_tokens: int = Field(default=DEFAULT_CONTEXT_TOKENS, ge=64, description="Token budget for excerpts")
+
+    # Streaming: citations first, then answer tokens as they are generated
+    stream: bool = Field(default=False, description="Stream the answer instead of one JSON response")
+    stream_format: Literal["sse", "ndjson"] = Field(
+        default="sse", description="Server-Sent Events or one JSON object per line"
+    )
+
+
+class AskAllRequest(BaseModel):
+    """Request model for asking across all ingested policies."""
+    question: str = Field(..., description="User question")
+
+    # Filters (all optional; None = no filter)
+    policy_ids: list[str] | None = Field(default=None, description="Only search these policies")
+    types: list[str] | None = Field(default=None, description='e.g. ["policy"] or ["standalone_image"]')
+    page_min: int | None = Field(default=None, ge=1, description="First page to include")
+    page_max: int | None = Field(default=None, ge=1, description="Last page to include")
+
+    # Model configuration
+    embedding_model: str = Field(default="nomic-embed-text:latest")
+    chat_model: str = Field(default="gpt-oss:20b")
+
+    # Retrieval tuning
+    top_k: int = Field(default=6, description="Number of chunks to retrieve")
+    min_score: float = Field(default=0.25, description="Minimum similarity score")
+    context_tokens: int = Field(default=DEFAULT_CONTEXT_TOKENS, ge=64, description="Token budget for excerpts")
+
 
 # =============================================================================
 # API Endpoints
@@ -129,6 +337,10 @@ def health():
         "status": "ok",
         "version": "0.3.0",
         "sessions": session_status,
+        "policy_cache": policy_cache.info(),
+        "answer_cache": answer_cache.info(),
+        "query_embeddings": {"entries": len(query_memo), **query_memo.stats.as_dict()},
+        "ingest_workers": job_workers.info(),
     }
 
 
@@ -188,20 +400,35 @@ def list_policies():
     return {"policies": policies}
 
 
-@app.post("/ingest", response_model=IngestResponse)
+def _ingest_conflict(policy_id: str, job_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail=f"An ingest of policy_id={policy_id} is already queued or running: "
+               f"{job_id} (poll /jobs/{job_id})",
+    )
+
+
+@app.post("/ingest", response_model=IngestJobResponse, status_code=202)
 async def ingest(
     pdf: UploadFile = File(...),
     policy_id: str | None = None,
     embedding_model: str = "nomic-embed-text:latest",
     vision_model: str = "llama3.2-vision:11b",
     enable_vision: bool = True,  # NEW: Toggle vision processing
+    index_type: str = "auto",
+    resume: bool = True,
 ):
     """
-    Upload and index a policy PDF into the RAG system.
+    Upload a policy PDF and queue it for indexing into the RAG system.
     
     NEW: Now processes both text AND images!
     
-    Process:
+    The PDF is saved and a background job is queued; the response comes
+    back immediately with a job_id. Poll GET /jobs/{job_id} for per-stage
+    progress, chunks/s and ETA; when it succeeds, "result" holds the
+    ingestion statistics.
+    
+    Process (in the worker):
     1. Validates file type (must be PDF)
     2. Extracts text from all pages
     3. Chunks text into overlapping segments
@@ -216,9 +443,13 @@ async def ingest(
         embedding_model: Which model to use for embeddings
         vision_model: Which model to use for image description
         enable_vision: Whether to process images (default True)
+        index_type: FAISS index type ("auto" picks from corpus size;
+                    or "flat", "hnsw", "ivf_flat", "ivf_pq")
+        resume: If an earlier ingest of this same PDF into this policy_id
+                was interrupted, continue from its checkpoint (default True)
     
     Returns:
-        IngestResponse with ingestion statistics
+        IngestJobResponse with the job_id and where to poll it
     
     Examples:
         # With vision (default):
@@ -226,6 +457,13 @@ async def ingest(
         
         # Without vision (text only):
         curl -X POST -F "pdf=@policy.pdf" -F "enable_vision=false" http://localhost:8000/ingest
+        
+        # Retry an ingest that died halfway (same file, same policy_id):
+        curl -X POST -F "pdf=@policy.pdf" "http://localhost:8000/ingest?policy_id=policy-abc123"
+    
+    One job per policy_id at a time: while an ingest of this policy_id is
+    queued or running the upload is refused with 409 (detail names the
+    job to poll), so the running job's PDF and index are never overwritten.
     """
     # Validate file type
     if pdf.content_type not in ("application/pdf", "application/octet-stream"):
@@ -238,40 +476,76 @@ async def ingest(
             detail=f"File extension must be .pdf, got {file_ext}"
         )
     
+    if index_type not in INDEX_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"index_type must be one of {', '.join(INDEX_TYPES)}"
+        )
+    
     # Generate policy ID if not provided
     pid = policy_id or f"policy-{uuid.uuid4().hex[:10]}"
     
+    # Checked before the PDF is written: a job for this policy may be reading it
+    active = job_queue.active_job("policy_ingest", {"policy_id": pid})
+    if active is not None:
+        raise _ingest_conflict(pid, active)
+    
     # Read file content
     pdf_bytes = await pdf.read()
     
     # Save PDF to permanent storage
     pdf_path = store.write_pdf(pid, pdf_bytes)
     
-    # Run the NEW ingestion pipeline (supports vision!)
+    # Queue the NEW ingestion pipeline (supports vision!) for a worker
+    # process: long-running, so it must not hold the HTTP request open.
     try:
-        meta = ingest_policy_with_vision(
-            store=store,
-            ollama=ollama,
-            policy_id=pid,
-            pdf_path=str(pdf_path),
-            embedding_model=embedding_model,
-            vision_model=vision_model,
-            enable_vision=enable_vision,  # NEW: Can disable vision if needed
+        job_id = job_queue.enqueue(
+            "policy_ingest",
+            {
+                "policy_id": pid,
+                "pdf_path": str(pdf_path),
+                "embedding_model": embedding_model,
+                "vision_model": vision_model,
+                "enable_vision": enable_vision,  # NEW: Can disable vision if needed
+                "index_type": index_type,
+                "resume": resume,
+            },
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except JobConflict as e:
+        # Another request queued one between the check above and here
+        raise _ingest_conflict(pid, e.job_id)
     
-    # Return success response with detailed statistics
-    return IngestResponse(
+    return IngestJobResponse(
+        job_id=job_id,
+        status="queued",
         policy_id=pid,
-        pages=int(meta["pages"]),
-        chunks=int(meta["chunks"]),
-        text_chunks=int(meta.get("text_chunks", 0)),  # NEW
-        image_chunks=int(meta.get("image_chunks", 0)),  # NEW
-        embedding_model=meta["embedding_model"],
-        vision_model=meta.get("vision_model"),  # NEW
+        status_url=f"/jobs/{job_id}",
     )
 
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Status of a background ingest job.
+    
+    Returns status (queued/running/succeeded/failed), the current stage,
+    per-stage progress (done/total, rate, ETA), overall embedding
+    throughput (chunks_per_s), the ETA of the running stage, and the
+    ingestion result or error once finished.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    return job
+
+
+@app.get("/jobs")
+def list_jobs(limit: int = 20, status: str | None = None):
+    """Most recent ingest jobs (optionally only one status), newest first."""
+    if status is not None and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(JOB_STATUSES)}")
+    return {"jobs": job_queue.recent(limit=limit, status=status)}
+
 @app.post("/ingest-image")
 async def ingest_image(
     image: UploadFile = File(...),
@@ -317,14 +591,17 @@ async def ingest_image(
     image_size = len(image_bytes)
     
     # Import the vision processor function
-    from app.rag.processors.vision_processor import describe_image_with_vision
+    from app.rag.processors.vision_processor import describe_image_cached
     
-    # Describe the image with vision AI
+    # Describe the image with vision AI (in a worker thread: this can take
+    # 10-30s and must not block the event loop)
     try:
-        description = describe_image_with_vision(
+        description = await run_in_threadpool(
+            describe_image_cached,
             ollama_client=ollama,
             image_bytes=image_bytes,
             vision_model=vision_model,
+            vision_cache=vision_cache,
         )
         
         if not description:
@@ -357,7 +634,7 @@ async def ingest_image(
     
     # Embed the description
     try:
-        vec = ollama.embed("nomic-embed-text:latest", description)
+        vec = await async_ollama.embed("nomic-embed-text:latest", description)
         
         # Build tiny FAISS index with just this one vector
         import numpy as np
@@ -382,9 +659,11 @@ async def ingest_image(
                 "image_size_bytes": image_size,
                 "vision_model": vision_model,
                 "description_length": len(description),
+                "embedding_model": "nomic-embed-text:latest",
                 "vector_dim": dim,
             }
         )
+        await run_in_threadpool(_apply_ingested_policy, f"image_{img_id}", "nomic-embed-text:latest")
         
     except Exception as e:
         raise HTTPException(
@@ -403,7 +682,7 @@ async def ingest_image(
 
 
 @app.post("/ask")
-def ask(req: AskRequest):
+async def ask(req: AskRequest):
     """
     Ask a question about a specific ingested policy.
     
@@ -421,9 +700,18 @@ def ask(req: AskRequest):
                 {"page": 5, "chunk_id": "p5_c2", "excerpt": "..."},
                 {"page": 8, "chunk_id": "p8_img0", "excerpt": "According to the diagram..."}
             ],
-            "retrieved_chunk_ids": ["p5_c2", "p8_img0"]
+            "retrieved_chunk_ids": ["p5_c2", "p8_img0"],
+            "prompt_tokens": 1840,
+            "cache_hit": false
         }
     
+    With "stream": true the response is streamed instead (text/event-stream,
+    or application/x-ndjson with "stream_format": "ndjson"):
+        event: citations   {"citations": [...], "retrieved_chunk_ids": [...]}
+        event: token       {"text": "The policy"}      (repeated)
+        event: done        {"answer_chars": 1234, "prompt_tokens": 1840}
+    Citations arrive right after retrieval, long before the answer is done.
+    
     Note: Citations with "img" in chunk_id are from images!
     """
     # Check if policy exists
@@ -437,16 +725,92 @@ def ask(req: AskRequest):
             )
         )
     
-    # Run the query pipeline
-    return answer_question(
+    if not req.stream:
+        # Run the query pipeline (blocking: embed + search + chat) in a worker thread
+        return await run_in_threadpool(
+            answer_question,
+            store=store,
+            ollama=ollama,
+            policy_id=req.policy_id,
+            question=req.question,
+            embedding_model=req.embedding_model,
+            chat_model=req.chat_model,
+            top_k=req.top_k,
+            min_score=req.min_score,
+            nprobe=req.nprobe,
+            ef_search=req.ef_search,
+            cache=policy_cache,
+            answer_cache=answer_cache,
+            hybrid=req.hybrid,
+            context_tokens=req.context_tokens,
+        )
+    
+    # Streaming: retrieve first (fast), then stream the LLM answer
+    retrieved = await run_in_threadpool(
+        retrieve_chunks,
         store=store,
         ollama=ollama,
         policy_id=req.policy_id,
         question=req.question,
         embedding_model=req.embedding_model,
+        top_k=req.top_k,
+        min_score=req.min_score,
+        cache=policy_cache,
+        nprobe=req.nprobe,
+        ef_search=req.ef_search,
+        hybrid=req.hybrid,
+    )
+    events = stream_answer(async_ollama, req.chat_model, req.question, retrieved, req.context_tokens)
+    
+    if req.stream_format == "ndjson":
+        async def body():
+            async for ev in events:
+                yield json.dumps(ev) + "\n"
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+    
+    async def body():
+        async for ev in events:
+            yield f"event: {ev['event']}\ndata: {json.dumps(ev['data'])}\n\n"
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ask-all")
+def ask_all(req: AskAllRequest):
+    """
+    Ask a question across every ingested policy (or a filtered subset).
+    
+    One search over the global index instead of loading each policy's
+    index: filters narrow WHICH chunks can match (policy_ids, types,
+    page range), and top_k is the best k among them.
+    
+    Returns:
+        Same as /ask, but every citation also includes "policy_id".
+    """
+    if req.types is not None:
+        unknown = [t for t in req.types if t not in POLICY_TYPES]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown types {unknown}; expected any of {list(POLICY_TYPES)}"
+            )
+    
+    return answer_question_all(
+        store=store,
+        ollama=ollama,
+        global_index=global_indexes.get(req.embedding_model),
+        question=req.question,
         chat_model=req.chat_model,
         top_k=req.top_k,
         min_score=req.min_score,
+        policy_ids=req.policy_ids,
+        types=req.types,
+        page_min=req.page_min,
+        page_max=req.page_max,
+        context_tokens=req.context_tokens,
     )
 
 
@@ -458,10 +822,15 @@ FILE STRUCTURE CREATED BY THIS API:
 
 -data/policies/{policy_id}/
 -source.pdf           # Original uploaded PDF
--chunks.json          # All chunks (text + image descriptions)
+-chunks.bin           # All chunks (text + image descriptions), packed for mmap lookups
+-chunks.json          # Same chunks as readable JSON (audit export)
 -metadata.json        # Ingestion statistics and model info
 -index.faiss          # Vector search index
 
+-data/global_index/{embedding_model}/
+-index.faiss          # All policies' vectors (IndexIDMap2), used by /ask-all
+-ids.bin              # Global id -> (policy, chunk row, page, type)
+
 METADATA EXAMPLE:
 {
     "pages": 25,
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.rag.disk_cache import CacheStats
+
+
+def normalize_question(question: str) -> str:
+    """Case/whitespace/trailing-punctuation-insensitive form used in cache keys."""
+    q = " ".join(question.lower().split())
+    return re.sub(r"[\s?!.]+$", "", q)
+
+
+@dataclass
+class _Entry:
+    scope: Tuple
+    response: Dict[str, Any]
+    qvec: Optional[np.ndarray]
+    expires_at: float
+
+
+class AnswerCache:
+    """
+    In-process cache of finished /ask answers.
+
+    Level 1 (exact): key = (policy_id, ingest generation, normalized question,
+    chat_model, retrieval settings). Checked before anything else, so a hit
+    skips embedding, search and the LLM.
+
+    Level 2 (near-duplicate, optional): if near_dup_threshold is set, a miss
+    on level 1 compares the question's embedding with cached questions for
+    the same policy/generation/settings ("scope") and reuses the answer when
+    cosine similarity >= threshold. This costs one embedding call but still
+    skips search and the LLM.
+
+    Entries expire after ttl_s and the least recently used are evicted past
+    max_entries. Because the ingest generation is part of every key, a
+    re-ingested policy never gets old answers; invalidate(policy_id) also
+    frees those entries right away.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: float = 3600.0,
+        near_dup_threshold: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.near_dup_threshold = near_dup_threshold
+        self.stats = CacheStats()
+
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope(policy_id: str, generation: Tuple, **settings: Any) -> Tuple:
+        """Everything except the question that must match for an answer to be reusable."""
+        return (policy_id, generation, tuple(sorted(settings.items())))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, key: Tuple, entry: _Entry, now: float) -> bool:
+        if entry.expires_at > now:
+            return False
+        del self._entries[key]
+        return True
+
+    def get(self, scope: Tuple, question: str) -> Optional[Dict[str, Any]]:
+        """Exact lookup. Returns a copy of the cached response, or None."""
+        key = (scope, normalize_question(question))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expire(key, entry, now):
+                return None
+            self._entries.move_to_end(key)
+            self.stats.add(hits=1)
+            return copy.deepcopy(entry.response)
+
+    def get_similar(self, scope: Tuple, qvec: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Near-duplicate lookup by normalized question embedding (None if disabled/no match)."""
+        if self.near_dup_threshold is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            keys, vecs = [], []
+            for key, entry in list(self._entries.items()):
+                if entry.scope != scope or self._expire(key, entry, now):
+                    continue
+                if entry.qvec is not None and entry.qvec.shape == qvec.shape:
+                    keys.append(key)
+                    vecs.append(entry.qvec)
+            if not vecs:
+                return None
+
+            sims = np.vstack(vecs) @ qvec
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.near_dup_threshold:
+                return None
+
+            self._entries.move_to_end(keys[best])
+            self.stats.add(hits=1)
+            return copy.deepcopy(self._entries[keys[best]].response)
+
+    def miss(self) -> None:
+        """Count a lookup that fell through both levels."""
+        self.stats.add(misses=1)
+
+    def put(
+        self,
+        scope: Tuple,
+        question: str,
+        response: Dict[str, Any],
+        qvec: Optional[np.ndarray] = None,
+    ) -> None:
+        key = (scope, normalize_question(question))
+        entry = _Entry(
+            scope=scope,
+            response=copy.deepcopy(response),
+            qvec=None if qvec is None else np.asarray(qvec, dtype="float32").ravel(),
+            expires_at=time.monotonic() + self.ttl_s,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, policy_id: Optional[str] = None) -> None:
+        """Drop all answers for one policy (or everything when policy_id is None)."""
+        with self._lock:
+            if policy_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k, e in self._entries.items() if e.scope[0] == policy_id]:
+                del self._entries[key]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "near_dup_threshold": self.near_dup_threshold,
+            **self.stats.as_dict(),
+        }
@@ -0,0 +1,158 @@
+"""
+Ingestion Checkpoint Module
+
+Purpose: Let a failed ingest pick up where it stopped
+
+Embedding 2,000 chunks or describing 40 images takes minutes; if Ollama
+drops out halfway, starting over wastes all of it. While a policy is being
+ingested, each finished stage is saved under its folder:
+
+    data/policies/{policy_id}/checkpoint/
+        manifest.json             ← fingerprint of the run (PDF hash + settings)
+        text_chunks.json          ← STEP 1-2 output (saved once extraction finishes)
+        images.jsonl              ← STEP 3: one line per described image, appended as they finish
+        embed/shard_00012.bin     ← STEP 5: one packed file per embedding batch
+
+Rerunning the same ingest (same PDF, same models/settings) loads the
+finished stages and only does the remaining work. Any change to the
+fingerprint throws the old checkpoint away. After a successful ingest the
+checkpoint folder is deleted.
+
+Only complete successes are checkpointed: an embedding batch with failed
+chunks, or an image the vision model couldn't describe, is retried on the
+next run (the failure may have been the outage that stopped the first run).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.rag.packed import PackedFile, write_packed
+from app.rag.types import Chunk
+
+
+def file_sha256(path: str | Path) -> str:
+    """Hex SHA-256 of a file, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Atomic JSON write (tmp file + os.replace), so a crash never leaves half a file."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class IngestCheckpoint:
+    """
+    Per-policy checkpoint of a running ingest (see module docstring).
+
+    fingerprint: everything that changes the stage outputs (PDF hash, models,
+    chunking/batching settings). If it differs from the saved manifest, the
+    old checkpoint is discarded - as it is when resume=False.
+    """
+
+    def __init__(self, policy_dir: str | Path, fingerprint: Dict[str, Any], resume: bool = True):
+        self.dir = Path(policy_dir) / "checkpoint"
+        self.fingerprint = fingerprint
+        self.resumed = False
+
+        manifest = self.dir / "manifest.json"
+        if manifest.exists() and resume:
+            try:
+                saved = json.loads(manifest.read_text(encoding="utf-8"))
+            except ValueError:
+                saved = None
+            if saved == fingerprint:
+                self.resumed = True
+            else:
+                self.clear()
+        elif self.dir.exists():
+            self.clear()
+
+        (self.dir / "embed").mkdir(parents=True, exist_ok=True)
+        if not self.resumed:
+            _write_json(manifest, fingerprint)
+
+    def clear(self) -> None:
+        """Delete the checkpoint (after a successful ingest, or when it is stale)."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    # -------------------------
+    # STEP 1-2: text chunks
+    # -------------------------
+
+    def load_text_chunks(self) -> Optional[List[Chunk]]:
+        path = self.dir / "text_chunks.json"
+        if not path.exists():
+            return None
+        return [Chunk(**c) for c in json.loads(path.read_text(encoding="utf-8"))]
+
+    def save_text_chunks(self, chunks: Sequence[Chunk]) -> None:
+        _write_json(self.dir / "text_chunks.json", [asdict(c) for c in chunks])
+
+    # -------------------------
+    # STEP 3: image descriptions
+    # -------------------------
+
+    def load_image_descriptions(self) -> Dict[str, str]:
+        """chunk_id -> description for every image already described."""
+        path = self.dir / "images.jsonl"
+        done: Dict[str, str] = {}
+        if not path.exists():
+            return done
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a crash mid-write
+            done[entry["chunk_id"]] = entry["description"]
+        return done
+
+    def save_image_description(self, chunk_id: str, description: str) -> None:
+        with open(self.dir / "images.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"chunk_id": chunk_id, "description": description}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # -------------------------
+    # STEP 5: embedding shards
+    # -------------------------
+
+    def _shard_path(self, batch_no: int) -> Path:
+        return self.dir / "embed" / f"shard_{batch_no:05d}.bin"
+
+    def load_embed_shard(self, batch_no: int, chunk_ids: Sequence[str]) -> Optional[np.ndarray]:
+        """Vectors for an already-embedded batch, or None (also if its chunks don't match)."""
+        path = self._shard_path(batch_no)
+        if not path.exists():
+            return None
+        try:
+            shard = PackedFile(path)
+        except Exception:
+            return None
+        try:
+            if shard.meta.get("chunk_ids") != list(chunk_ids):
+                return None
+            return np.array(shard["vectors"])
+        finally:
+            shard.close()
+
+    def save_embed_shard(self, batch_no: int, chunk_ids: Sequence[str], vectors: np.ndarray) -> None:
+        write_packed(
+            self._shard_path(batch_no),
+            {"vectors": np.asarray(vectors, dtype="float32")},
+            meta={"kind": "embed_shard", "chunk_ids": list(chunk_ids)},
+        )
@@ -0,0 +1,181 @@
+"""
+Chunk Store Module
+
+Purpose: Store a policy's chunks so a query can read just the rows it needs
+
+chunks.json had to be parsed in full (and every Chunk rebuilt) before a
+single search result could be shown. chunks.bin is a packed columnar file
+(see app.rag.packed):
+
+    text_blob        uint8   all chunk texts, UTF-8, back to back
+    text_offsets     int64   n+1 offsets; row i is text_blob[off[i]:off[i+1]]
+    chunk_id_blob    uint8   all chunk_ids, same scheme
+    chunk_id_offsets int64
+    page             int32   page number per row
+    section_blob     uint8   section heading path per row, same scheme
+    section_offsets  int64   (version 2+; older files read as "")
+    other_pages      int32   other pages a repeated image appears on, back to back
+    other_pages_offsets int64 (version 3+; older files read as [])
+
+Row i is the chunk for FAISS id i, so fetching the top_k hits is k O(1)
+slices out of an mmap - nothing else is read or decoded.
+
+chunks.json is still written next to it as a human-readable audit export;
+it is just never read on the query path. Older policies that only have
+chunks.json are converted on first open (or in bulk with
+`python -m app.rag.chunk_store data/policies`).
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List, Sequence
+
+import numpy as np
+
+from app.rag.packed import PackedFile, write_packed
+from app.rag.types import Chunk
+
+FORMAT_VERSION = 3
+
+
+def _pack_strings(values: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """UTF-8 encode strings into (blob, offsets) with offsets[i]..offsets[i+1] = row i."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def write_chunk_table(path: str | Path, chunks: Sequence[Chunk]) -> Path:
+    """Write chunks to a packed chunks.bin file (row order = FAISS id order)."""
+    text_blob, text_offsets = _pack_strings([c.text for c in chunks])
+    id_blob, id_offsets = _pack_strings([c.chunk_id for c in chunks])
+    section_blob, section_offsets = _pack_strings([c.section for c in chunks])
+    other_pages_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    if chunks:
+        np.cumsum([len(c.other_pages) for c in chunks], out=other_pages_offsets[1:])
+    other_pages = np.asarray([p for c in chunks for p in c.other_pages], dtype=np.int32)
+    return write_packed(
+        path,
+        {
+            "text_blob": text_blob,
+            "text_offsets": text_offsets,
+            "chunk_id_blob": id_blob,
+            "chunk_id_offsets": id_offsets,
+            "page": np.asarray([c.page for c in chunks], dtype=np.int32),
+            "section_blob": section_blob,
+            "section_offsets": section_offsets,
+            "other_pages": other_pages,
+            "other_pages_offsets": other_pages_offsets,
+        },
+        meta={"kind": "chunks", "version": FORMAT_VERSION, "rows": len(chunks)},
+    )
+
+
+def write_chunks_json(path: str | Path, chunks: Sequence[Chunk]) -> Path:
+    """Human-readable export (same format chunks.json has always had)."""
+    path = Path(path)
+    path.write_text(json.dumps([asdict(c) for c in chunks], indent=2), encoding="utf-8")
+    return path
+
+
+class ChunkTable:
+    """
+    Read-only, mmap-backed list of chunks.
+
+    Behaves like a List[Chunk] for the things queries do (len(), table[i],
+    iteration), but only decodes the rows that are actually touched.
+    """
+
+    def __init__(self, path: str | Path):
+        self._file = PackedFile(path)
+        self._text = self._file["text_blob"]
+        self._text_off = self._file["text_offsets"]
+        self._ids = self._file["chunk_id_blob"]
+        self._ids_off = self._file["chunk_id_offsets"]
+        self._page = self._file["page"]
+        # Version 1 files have no section column
+        self._sections = self._file["section_blob"] if "section_blob" in self._file else None
+        self._sections_off = self._file["section_offsets"] if "section_offsets" in self._file else None
+        # Version 1-2 files have no other_pages column
+        self._other = self._file["other_pages"] if "other_pages" in self._file else None
+        self._other_off = self._file["other_pages_offsets"] if "other_pages_offsets" in self._file else None
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped file (resident only as far as pages are touched)."""
+        return self._file.nbytes
+
+    def __len__(self) -> int:
+        return len(self._page)
+
+    def text(self, i: int) -> str:
+        return self._text[self._text_off[i]:self._text_off[i + 1]].tobytes().decode("utf-8")
+
+    def chunk_id(self, i: int) -> str:
+        return self._ids[self._ids_off[i]:self._ids_off[i + 1]].tobytes().decode("utf-8")
+
+    def page(self, i: int) -> int:
+        return int(self._page[i])
+
+    def section(self, i: int) -> str:
+        if self._sections is None:
+            return ""
+        return self._sections[self._sections_off[i]:self._sections_off[i + 1]].tobytes().decode("utf-8")
+
+    def other_pages(self, i: int) -> List[int]:
+        if self._other is None:
+            return []
+        return self._other[self._other_off[i]:self._other_off[i + 1]].tolist()
+
+    def __getitem__(self, i: int) -> Chunk:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"chunk row {i} out of range (0..{len(self) - 1})")
+        return Chunk(
+            chunk_id=self.chunk_id(i),
+            page=self.page(i),
+            text=self.text(i),
+            section=self.section(i),
+            other_pages=self.other_pages(i),
+        )
+
+    def take(self, rows: Sequence[int]) -> List[Chunk]:
+        """Fetch several rows (e.g. FAISS hits) in the given order."""
+        return [self[int(i)] for i in rows]
+
+    def __iter__(self) -> Iterator[Chunk]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def migrate_policy_dir(policy_dir: str | Path) -> bool:
+    """Build chunks.bin from an existing chunks.json. Returns True if a file was written."""
+    policy_dir = Path(policy_dir)
+    json_path = policy_dir / "chunks.json"
+    bin_path = policy_dir / "chunks.bin"
+    if bin_path.exists() or not json_path.exists():
+        return False
+
+    raw = json.loads(json_path.read_text(encoding="utf-8"))
+    write_chunk_table(bin_path, [Chunk(**item) for item in raw])
+    return True
+
+
+if __name__ == "__main__":
+    # One-off bulk migration: python -m app.rag.chunk_store [data/policies]
+    root = Path(sys.argv[1] if len(sys.argv) > 1 else "data/policies")
+    converted = [d.name for d in sorted(root.iterdir()) if d.is_dir() and migrate_policy_dir(d)]
+    print(f"Converted {len(converted)} policies to chunks.bin")
+    for name in converted:
+        print(f"  - {name}")
@@ -0,0 +1,204 @@
+"""
+Context Builder Module
+
+Purpose: Turn retrieved chunks into the excerpt blocks of the answer prompt,
+within a token budget for the chat model
+
+Pasting every retrieved chunk in full wastes prompt tokens - and on a CPU
+Ollama host, prompt tokens (prefill) are a big part of the answer time:
+
+- Neighbouring chunks of the same page repeat each other (the chunkers
+  overlap consecutive chunks), so the same sentences were sent twice.
+- A chunk can be fully contained in another retrieved one.
+- Nothing capped the total, so top_k=12 on long chunks made huge prompts.
+
+build_context() therefore:
+
+1. Merges retrieved chunks that are consecutive on the same page
+   (p5_c2 + p5_c3) into one block, removing the span they share.
+2. Drops chunks whose text is already contained in another block.
+3. Adds blocks best-ranked first until max_tokens is reached; the block
+   that crosses the limit is cut at a sentence/word boundary (if a useful
+   amount still fits), later blocks that don't fit are skipped.
+
+Blocks keep the rank order of their best chunk, and their header lists
+every chunk_id in them so citations still work:
+
+    [TEXT | Page 5 | p5_c2, p5_c3 | Sec. 4.2 Setbacks]
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.rag.processors.section_chunker import CHARS_PER_TOKEN, estimate_tokens
+
+# Default token budget for the excerpts in one prompt
+DEFAULT_CONTEXT_TOKENS = 3000
+
+# A block is only cut to fit if at least this many tokens of it still fit
+_MIN_PARTIAL_TOKENS = 64
+
+# Shortest shared span treated as chunk overlap (shorter = coincidence)
+_MIN_OVERLAP_CHARS = 16
+
+# Text chunk ids: p{page}_c{index} (image chunks, p8_img0, are never merged)
+_TEXT_CHUNK_ID_RE = re.compile(r"p(\d+)_c(\d+)$")
+
+# Where a cut block may end: after a sentence, else after a word
+_SENTENCE_END_RE = re.compile(r"[.!?;:][\"'”’)\]]*\s")
+
+
+@dataclass
+class _Block:
+    entries: List[Dict[str, Any]]     # retrieved entries in the block, page order
+    starts: List[int]                 # where each entry's new text starts in `text`
+    text: str
+    rank: int                         # best (lowest) retrieval rank among entries
+
+
+@dataclass
+class BuiltContext:
+    """Result of build_context()."""
+    blocks: List[str] = field(default_factory=list)        # header + text, best first
+    used: List[Dict[str, Any]] = field(default_factory=list)  # entries that made it into a block
+    tokens: int = 0                                        # estimated tokens of all blocks
+    merged: int = 0                                        # chunks merged into a neighbour
+    deduplicated: int = 0                                  # chunks dropped as contained in another
+    truncated: int = 0                                     # blocks cut to fit the budget
+    dropped: int = 0                                       # chunks that didn't fit at all
+
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of a that is also a prefix of b (0 if < _MIN_OVERLAP_CHARS)."""
+    probe = b[:_MIN_OVERLAP_CHARS]
+    if len(probe) < _MIN_OVERLAP_CHARS:
+        return 0
+    # The first occurrence of b's start in a that reaches a's end is the longest overlap
+    pos = a.find(probe)
+    while pos != -1:
+        if b.startswith(a[pos:]):
+            return len(a) - pos
+        pos = a.find(probe, pos + 1)
+    return 0
+
+
+def _header(entries: List[Dict[str, Any]]) -> str:
+    first = entries[0]
+    chunk_type = "IMAGE" if "_img" in first["chunk_id"] else "TEXT"
+    source = f"{first['policy_id']} | " if "policy_id" in first else ""
+    section = f" | {first['section']}" if first.get("section") else ""
+    ids = ", ".join(e["chunk_id"] for e in entries)
+    pages = f"Pages {', '.join(map(str, first['pages']))}" if first.get("pages") else f"Page {first['page']}"
+    return f"[{chunk_type} | {source}{pages} | {ids}{section}]"
+
+
+def _position(entry: Dict[str, Any]) -> Optional[Tuple[Any, int, int]]:
+    """(policy, page, chunk index) for text chunks; None for image chunks."""
+    match = _TEXT_CHUNK_ID_RE.fullmatch(entry["chunk_id"])
+    if match is None:
+        return None
+    return entry.get("policy_id"), int(match.group(1)), int(match.group(2))
+
+
+def _cut(text: str, max_chars: int) -> str:
+    """Cut text to at most max_chars, preferably after a sentence, else after a word."""
+    head = text[:max_chars]
+    last_sentence = None
+    for match in _SENTENCE_END_RE.finditer(head):
+        last_sentence = match.end()
+    if last_sentence is not None and last_sentence >= max_chars // 2:
+        return head[:last_sentence].rstrip() + " …"
+    space = head.rfind(" ")
+    if space >= max_chars // 2:
+        head = head[:space]
+    return head.rstrip() + " …"
+
+
+def build_context(retrieved: List[Dict[str, Any]], max_tokens: int = DEFAULT_CONTEXT_TOKENS) -> BuiltContext:
+    """
+    Merge, de-duplicate and budget retrieved chunks for the prompt.
+
+    Args:
+        retrieved: Retrieved chunk dicts (chunk_id, page, text, optional
+                   section / policy_id), best first - as from retrieve_chunks()
+        max_tokens: Token budget for all excerpt blocks together (headers included)
+
+    Returns:
+        BuiltContext; blocks are ready to join into the prompt, and `used`
+        lists the entries the model actually sees (for citations).
+    """
+    result = BuiltContext()
+
+    # STEP 1: merge consecutive text chunks of the same page
+    positions = [_position(entry) for entry in retrieved]
+    # Text chunks grouped by (policy, page) in chunk order; image chunks after, by rank
+    order = sorted(
+        range(len(retrieved)),
+        key=lambda i: (0, str(positions[i][0] or ""), positions[i][1], positions[i][2], i)
+        if positions[i] is not None else (1, "", 0, 0, i),
+    )
+    blocks: List[_Block] = []
+    previous: Optional[Tuple[Any, int, int]] = None
+    for i in order:
+        entry = retrieved[i]
+        text = (entry.get("text") or "").strip()
+        position = positions[i]
+        if not text:
+            continue
+        block = blocks[-1] if blocks else None
+        if (
+            block is not None
+            and position is not None
+            and previous is not None
+            and position[:2] == previous[:2]
+            and position[2] == previous[2] + 1
+        ):
+            shared = _overlap(block.text, text)
+            block.starts.append(len(block.text) if shared else len(block.text) + 1)
+            block.text = block.text + text[shared:] if shared else block.text + "\n" + text
+            block.entries.append(entry)
+            block.rank = min(block.rank, i)
+            result.merged += 1
+        else:
+            blocks.append(_Block(entries=[entry], starts=[0], text=text, rank=i))
+        previous = position
+
+    # STEP 2: drop blocks whose text is already part of another block
+    blocks.sort(key=lambda b: (-len(b.text), b.rank))
+    kept: List[_Block] = []
+    for block in blocks:
+        if any(block.text in other.text for other in kept):
+            result.deduplicated += len(block.entries)
+            continue
+        kept.append(block)
+
+    # STEP 3: best-ranked first, within the token budget
+    kept.sort(key=lambda b: b.rank)
+    for block in kept:
+        header = _header(block.entries)
+        tokens = estimate_tokens(header) + estimate_tokens(block.text) + 1
+        remaining = max_tokens - result.tokens
+        text = block.text
+        entries = block.entries
+        if tokens > remaining:
+            room = remaining - estimate_tokens(header) - 2
+            # Always show something of the best block, even on a tiny budget
+            if room < _MIN_PARTIAL_TOKENS and result.blocks:
+                result.dropped += len(block.entries)
+                continue
+            text = _cut(text, max(room, _MIN_PARTIAL_TOKENS) * CHARS_PER_TOKEN)
+            # Entries whose text starts after the cut are not shown
+            entries = [e for e, start in zip(block.entries, block.starts) if start < len(text) - 2]
+            result.dropped += len(block.entries) - len(entries)
+            header = _header(entries)
+            tokens = estimate_tokens(header) + estimate_tokens(text) + 1
+            result.truncated += 1
+        result.blocks.append(f"{header}\n{text}")
+        result.used.extend(entries)
+        result.tokens += tokens
+
+    return result
+
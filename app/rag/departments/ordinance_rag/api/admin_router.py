@@ -11,23 +11,20 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
-from app.rag.ollama_client import OllamaClient
 from app.rag.departments.ordinance_rag.api.models import (
+    IngestJobResponse,
     IngestRequest,
-    IngestResponse,
     JurisdictionStatus,
     StatusResponse,
 )
-from app.rag.departments.ordinance_rag.core.ingest import ingest_jurisdiction
 from app.rag.departments.ordinance_rag.core.store import collection_exists, get_collection_count
+from app.rag.jobs import JobConflict
 
 router = APIRouter(prefix="/ordinances/admin", tags=["Ordinance Admin"])
 
-_ollama = OllamaClient()
-
-JURISDICTIONS_DIR = Path(__file__).resolve().parents[2] / "jurisdictions"
+JURISDICTIONS_DIR = Path(__file__).resolve().parents[1] / "jurisdictions"
 
 
 def _all_jurisdiction_keys() -> list[str]:
@@ -46,26 +43,52 @@ def _load_config(key: str) -> dict:
 
 @router.post(
     "/ingest",
-    response_model=IngestResponse,
-    summary="Ingest PDFs for a jurisdiction into its vector collection",
+    response_model=IngestJobResponse,
+    status_code=202,
+    summary="Queue ingestion of a jurisdiction's PDFs into its vector collection",
 )
-async def ingest(request: IngestRequest) -> IngestResponse:
+async def ingest(request: IngestRequest, http_request: Request) -> IngestJobResponse:
     """
-    Run ingestion for a jurisdiction.
+    Queue ingestion for a jurisdiction.
     Reads all PDFs from jurisdictions/{key}/docs/, chunks, embeds, and stores.
     Set force_reindex=true to wipe and rebuild the collection.
+
+    The pipeline runs in a background worker process (the same job queue as
+    POST /ingest), so this returns a job_id right away; poll
+    GET /ordinances/admin/jobs/{job_id} for progress and the result.
     """
+    if request.jurisdiction not in _all_jurisdiction_keys():
+        raise HTTPException(status_code=404, detail=f"No config.json found for jurisdiction: {request.jurisdiction}")
+
     try:
-        result = ingest_jurisdiction(
-            jurisdiction_key=request.jurisdiction,
-            ollama_client=_ollama,
-            force_reindex=request.force_reindex,
+        job_id = http_request.app.state.job_queue.enqueue(
+            "ordinance_ingest",
+            {"jurisdiction": request.jurisdiction, "force_reindex": request.force_reindex},
         )
-        return IngestResponse(**result)
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
+    except JobConflict as exc:
+        raise HTTPException(
+            status_code=409,
+            detail=f"An ingest of {request.jurisdiction} is already queued or running: {exc.job_id} "
+                   f"(poll /ordinances/admin/jobs/{exc.job_id})",
+        ) from exc
+    return IngestJobResponse(
+        job_id=job_id,
+        status="queued",
+        jurisdiction=request.jurisdiction,
+        status_url=f"/ordinances/admin/jobs/{job_id}",
+    )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Progress and result of an ordinance ingestion job",
+)
+async def job_status(job_id: str, http_request: Request) -> dict:
+    """Status, per-stage progress, chunks/s and ETA; "result" once finished."""
+    job = http_request.app.state.job_queue.get(job_id)
+    if job is None or job["kind"] != "ordinance_ingest":
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    return job
 
 
 @router.get(
@@ -66,6 +66,13 @@ class IngestResponse(BaseModel):
     message: Optional[str] = None
 
 
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str         # "queued" when just submitted
+    jurisdiction: str
+    status_url: str     # poll for progress; "result" has the IngestResponse fields when done
+
+
 class JurisdictionStatus(BaseModel):
     key: str
     display_name: str
@@ -6,29 +6,26 @@ Public-facing endpoints for asking questions about jurisdiction ordinances.
 
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 
-from app.rag.ollama_client import OllamaClient
 from app.rag.departments.ordinance_rag.api.models import QuestionRequest, QuestionResponse, Citation
-from app.rag.departments.ordinance_rag.core.query import answer_question
+from app.rag.departments.ordinance_rag.core.query import answer_question_async
 
 router = APIRouter(prefix="/ordinances", tags=["Ordinance RAG"])
 
-_ollama = OllamaClient()
-
 
 @router.post("/ask", response_model=QuestionResponse, summary="Ask a question about a jurisdiction's ordinances")
-async def ask_ordinance_question(request: QuestionRequest) -> QuestionResponse:
+async def ask_ordinance_question(request: QuestionRequest, http_request: Request) -> QuestionResponse:
     """
     Submit a question about a specific jurisdiction's ordinances.
     The AI will retrieve relevant sections and return a cited answer.
     Questions outside the ordinance topic will be politely refused.
     """
     try:
-        result = answer_question(
+        result = await answer_question_async(
             jurisdiction_key=request.jurisdiction,
             question=request.question,
-            ollama_client=_ollama,
+            ollama_client=http_request.app.state.async_ollama,
         )
         return QuestionResponse(
             answer=result["answer"],
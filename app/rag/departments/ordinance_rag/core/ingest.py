@@ -16,7 +16,8 @@ from pathlib import Path
 from typing import Generator
 
 import time
-import fitz  # PyMuPDF
+from app.rag.disk_cache import CacheStats
+from app.rag.pdf_extract import iter_page_texts
 from app.rag.departments.ordinance_rag.core.store import delete_collection, get_collection
 
 # ---------------------------------------------------------------------------
@@ -26,6 +27,7 @@ from app.rag.departments.ordinance_rag.core.store import delete_collection, get_
 CHUNK_SIZE = 800        # characters per chunk
 CHUNK_OVERLAP = 150     # overlap between consecutive chunks
 EMBED_MODEL = "nomic-embed-text"   # Ollama embedding model
+EMBED_BATCH_SIZE = 32   # chunks per batched /api/embed request
 
 JURISDICTIONS_DIR = Path(__file__).resolve().parents[1] / "jurisdictions"
 
@@ -47,19 +49,9 @@ def _extract_text_from_pdf(pdf_path: Path) -> str:
     """
     Extract all text from a PDF using PyMuPDF.
     Tries 'text' mode first, falls back to 'blocks' if that returns little content.
+    Long PDFs are extracted by page range across worker processes (app.rag.pdf_extract).
     """
-    doc = fitz.open(str(pdf_path))
-    pages = []
-    for page in doc:
-        # Primary extraction
-        text = page.get_text("text")
-        if not text.strip():
-            # Fallback: extract from blocks (handles some encoding edge cases)
-            blocks = page.get_text("blocks")
-            text = "\n".join(b[4] for b in blocks if isinstance(b[4], str))
-        if text.strip():
-            pages.append(text)
-    doc.close()
+    pages = [text for _, text in iter_page_texts(str(pdf_path), mode="fallback") if text.strip()]
     return "\n".join(pages)
 
 
@@ -112,13 +104,33 @@ def _embed_one(text: str, ollama_client, retries: int = 3) -> list[float] | None
     return None
 
 
-def _embed(texts: list[str], ollama_client) -> list[list[float]]:
-    """Generate embeddings for a list of text chunks via Ollama."""
-    embeddings = []
-    for text in texts:
-        vector = _embed_one(text, ollama_client)
-        embeddings.append(vector)
-        time.sleep(0.1)  # Small delay to avoid overwhelming Ollama
+def _embed(texts: list[str], ollama_client, stats: CacheStats | None = None) -> list[list[float] | None]:
+    """
+    Generate embeddings for a list of text chunks via Ollama.
+
+    Tries the batched endpoint first (one request per EMBED_BATCH_SIZE chunks).
+    If a batch fails, its chunks are retried one at a time with _embed_one so
+    a single bad chunk only costs itself; those that still fail come back None.
+    Unchanged chunks are served from the client's embedding cache (if any);
+    hits/misses are counted into stats.
+    """
+    embeddings: list[list[float] | None] = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start:start + EMBED_BATCH_SIZE]
+        try:
+            matrix = ollama_client.embed_many(
+                EMBED_MODEL, batch, batch_size=EMBED_BATCH_SIZE, stats=stats
+            )
+            embeddings.extend(matrix.tolist())
+            continue
+        except Exception:
+            pass
+
+        for text in batch:
+            try:
+                embeddings.append(_embed_one(text, ollama_client))
+            except Exception:
+                embeddings.append(None)
     return embeddings
 
 
@@ -130,18 +142,26 @@ def ingest_jurisdiction(
     jurisdiction_key: str,
     ollama_client,
     force_reindex: bool = False,
+    progress=None,
 ) -> dict:
     """
     Ingest all PDFs for a jurisdiction into its ChromaDB collection.
 
+    All PDFs are extracted and chunked first, then embedded, so the total
+    chunk count is known up front and progress/ETA are meaningful.
+
     Args:
         jurisdiction_key:  folder name under jurisdictions/ (e.g. "county")
         ollama_client:     OllamaClient instance from app.rag.ollama_client
         force_reindex:     if True, wipe the collection and rebuild from scratch
+        progress:          optional callback progress(stage, done, total, unit)
+                           ("extract" per file, then "embed" per chunk)
 
     Returns:
         dict with status, chunks_added, and any errors per file
     """
+    report = progress or (lambda *args, **kwargs: None)
+
     config = _load_config(jurisdiction_key)
     collection_name = config["collection_name"]
     docs_dir = JURISDICTIONS_DIR / jurisdiction_key / "docs"
@@ -159,46 +179,58 @@ def ingest_jurisdiction(
     collection = get_collection(collection_name)
 
     total_chunks = 0
-    file_results = []
+    file_results: list[dict | None] = [None] * len(pdf_files)
+    cache_totals = CacheStats()
 
-    for pdf_path in pdf_files:
+    # Pass 1: extract + chunk every file
+    prepared: list[tuple[int, Path, list[dict]]] = []
+    report("extract", 0, len(pdf_files), "files")
+    for i, pdf_path in enumerate(pdf_files):
         try:
             raw_text = _extract_text_from_pdf(pdf_path)
             clean = _clean_text(raw_text)
 
             # Skip PDFs with no extractable text (truly scanned/image-based)
             if not clean or len(clean) < 30:
-                file_results.append({
+                file_results[i] = {
                     "file": pdf_path.name,
                     "status": "skipped",
                     "reason": "No extractable text — PDF may be scanned/image-based. Consider OCR.",
-                })
-                continue
-
-            chunks = list(_chunk_text(clean, source=pdf_path.name))
+                }
+            else:
+                prepared.append((i, pdf_path, list(_chunk_text(clean, source=pdf_path.name))))
+        except Exception as e:
+            file_results[i] = {"file": pdf_path.name, "status": "error", "error": str(e)}
+        report("extract", i + 1, len(pdf_files), "files")
+
+    # Pass 2: embed + upsert file by file
+    chunks_to_embed = sum(len(chunks) for _, _, chunks in prepared)
+    chunks_done = 0
+    report("embed", 0, chunks_to_embed, "chunks")
+    for i, pdf_path, chunks in prepared:
+        try:
+            # Embed in batches (per-chunk retry on failure) — filter out any that fail
+            cache_stats = CacheStats()
+            vectors = _embed([chunk["text"] for chunk in chunks], ollama_client, stats=cache_stats)
+            cache_totals.add(cache_stats.hits, cache_stats.misses)
 
-            # Embed one at a time with retry — filter out any that fail
             valid_ids, valid_texts, valid_metadatas, valid_embeddings = [], [], [], []
             failed = 0
-            for chunk in chunks:
-                try:
-                    vector = _embed_one(chunk["text"], ollama_client)
-                    if vector:
-                        valid_ids.append(chunk["id"])
-                        valid_texts.append(chunk["text"])
-                        valid_metadatas.append(chunk["metadata"])
-                        valid_embeddings.append(vector)
-                    else:
-                        failed += 1
-                except Exception:
+            for chunk, vector in zip(chunks, vectors):
+                if vector:
+                    valid_ids.append(chunk["id"])
+                    valid_texts.append(chunk["text"])
+                    valid_metadatas.append(chunk["metadata"])
+                    valid_embeddings.append(vector)
+                else:
                     failed += 1
 
             if not valid_embeddings:
-                file_results.append({
+                file_results[i] = {
                     "file": pdf_path.name,
                     "status": "error",
                     "error": "All chunks failed to embed.",
-                })
+                }
                 continue
 
             # Upsert only the valid chunks
@@ -210,24 +242,31 @@ def ingest_jurisdiction(
             )
 
             total_chunks += len(valid_embeddings)
-            file_results.append({
+            file_results[i] = {
                 "file": pdf_path.name,
                 "status": "ok",
                 "chunks": len(valid_embeddings),
                 "failed_chunks": failed,
-            })
+                "cache_hits": cache_stats.hits,
+                "cache_misses": cache_stats.misses,
+            }
 
         except Exception as e:
-            file_results.append({
+            file_results[i] = {
                 "file": pdf_path.name,
                 "status": "error",
                 "error": str(e),
-            })
+            }
+        finally:
+            chunks_done += len(chunks)
+            report("embed", chunks_done, chunks_to_embed, "chunks")
 
     return {
         "status": "ok",
         "jurisdiction": jurisdiction_key,
         "collection": collection_name,
         "total_chunks": total_chunks,
+        "embed_cache_hits": cache_totals.hits,
+        "embed_cache_misses": cache_totals.misses,
         "files": file_results,
-    }
\ No newline at end of file
+    }
@@ -8,9 +8,11 @@ ordinance chunks, and generates a cited answer using the LLM.
 
 from __future__ import annotations
 
+import asyncio
 import json
 from pathlib import Path
 
+from app.rag.query_memo import aembed_query, embed_query
 from app.rag.departments.ordinance_rag.core.store import get_collection, collection_exists
 from app.rag.departments.ordinance_rag.core.scope_guard import is_in_scope, get_refusal_message
 
@@ -64,7 +66,8 @@ def _load_system_prompt(jurisdiction_key: str, config: dict) -> str:
 
 
 def _embed_query(question: str, ollama_client) -> list[float]:
-    return ollama_client.embed(EMBED_MODEL, question)
+    # Memoized + single-flight: repeat questions skip the Ollama round trip
+    return embed_query(ollama_client, EMBED_MODEL, question).tolist()
 
 
 def _retrieve(question_embedding: list[float], collection_name: str) -> list[dict]:
@@ -100,51 +103,39 @@ def _build_context(chunks: list[dict]) -> str:
     return "\n".join(lines)
 
 
-def _generate_answer(
-    system_prompt: str,
-    context: str,
-    question: str,
-    ollama_client,
-) -> str:
-    """Send context + question to the LLM and return the answer."""
+def _answer_messages(system_prompt: str, context: str, question: str) -> list[dict]:
+    """Build the chat messages (system prompt + excerpts + question) for the LLM."""
     user_message = (
         f"Use the following ordinance excerpts to answer the question.\n\n"
         f"--- Ordinance Excerpts ---\n{context}\n"
         f"--- End of Excerpts ---\n\n"
         f"Question: {question}"
     )
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_message},
     ]
-    return ollama_client.chat(model=ANSWER_MODEL, messages=messages)
-
 
-# ---------------------------------------------------------------------------
-# Public API
-# ---------------------------------------------------------------------------
 
-def answer_question(
-    jurisdiction_key: str,
+def _generate_answer(
+    system_prompt: str,
+    context: str,
     question: str,
     ollama_client,
-) -> dict:
-    """
-    Full query pipeline for a jurisdiction.
+) -> str:
+    """Send context + question to the LLM and return the answer."""
+    messages = _answer_messages(system_prompt, context, question)
+    return ollama_client.chat(model=ANSWER_MODEL, messages=messages)
 
-    Args:
-        jurisdiction_key:  e.g. "county", "wade", "falcon"
-        question:          the user's question
-        ollama_client:     OllamaClient instance
 
-    Returns:
-        dict with answer, citations, and jurisdiction info
+def _precheck(jurisdiction_key: str, question: str, config: dict) -> dict | None:
+    """
+    Return an early (no-LLM) response if the question is out of scope or the
+    collection hasn't been indexed yet; otherwise None.
     """
-    config = _load_config(jurisdiction_key)
     display_name = config["display_name"]
-    collection_name = config["collection_name"]
 
-    # 1. Scope check — refuse immediately if off-topic
+    # Scope check — refuse immediately if off-topic
     if not is_in_scope(question):
         return {
             "answer": get_refusal_message(display_name),
@@ -153,8 +144,8 @@ def answer_question(
             "in_scope": False,
         }
 
-    # 2. Check collection is indexed
-    if not collection_exists(collection_name):
+    # Check collection is indexed
+    if not collection_exists(config["collection_name"]):
         return {
             "answer": (
                 f"The {display_name} ordinance documents have not been indexed yet. "
@@ -165,22 +156,11 @@ def answer_question(
             "in_scope": True,
         }
 
-    # 3. Embed question
-    question_embedding = _embed_query(question, ollama_client)
+    return None
 
-    # 4. Retrieve relevant chunks
-    chunks = _retrieve(question_embedding, collection_name)
-
-    # 5. Build context
-    context = _build_context(chunks)
 
-    # 6. Build system prompt
-    system_prompt = _load_system_prompt(jurisdiction_key, config)
-
-    # 7. Generate answer
-    answer = _generate_answer(system_prompt, context, question, ollama_client)
-
-    # 8. Build citations list
+def _format_result(jurisdiction_key: str, config: dict, answer: str, chunks: list[dict]) -> dict:
+    """Build the final response dict (answer + citations + jurisdiction info)."""
     citations = [
         {
             "source": c["source"],
@@ -194,6 +174,84 @@ def answer_question(
         "answer": answer,
         "citations": citations,
         "jurisdiction": jurisdiction_key,
-        "display_name": display_name,
+        "display_name": config["display_name"],
         "in_scope": True,
-    }
\ No newline at end of file
+    }
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def answer_question(
+    jurisdiction_key: str,
+    question: str,
+    ollama_client,
+) -> dict:
+    """
+    Full query pipeline for a jurisdiction.
+
+    Args:
+        jurisdiction_key:  e.g. "county", "wade", "falcon"
+        question:          the user's question
+        ollama_client:     OllamaClient instance
+
+    Returns:
+        dict with answer, citations, and jurisdiction info
+    """
+    config = _load_config(jurisdiction_key)
+
+    # 1-2. Scope check + collection indexed check
+    early = _precheck(jurisdiction_key, question, config)
+    if early is not None:
+        return early
+
+    # 3. Embed question
+    question_embedding = _embed_query(question, ollama_client)
+
+    # 4. Retrieve relevant chunks
+    chunks = _retrieve(question_embedding, config["collection_name"])
+
+    # 5. Build context
+    context = _build_context(chunks)
+
+    # 6. Build system prompt
+    system_prompt = _load_system_prompt(jurisdiction_key, config)
+
+    # 7. Generate answer
+    answer = _generate_answer(system_prompt, context, question, ollama_client)
+
+    # 8. Build citations list
+    return _format_result(jurisdiction_key, config, answer, chunks)
+
+
+async def answer_question_async(
+    jurisdiction_key: str,
+    question: str,
+    ollama_client,
+) -> dict:
+    """
+    Async version of answer_question for FastAPI endpoints.
+
+    Same steps and return shape, but the embedding and LLM calls are awaited
+    on an AsyncOllamaClient, and the (synchronous) ChromaDB lookup runs in a
+    worker thread, so the event loop is never blocked while we wait.
+    """
+    config = _load_config(jurisdiction_key)
+
+    early = await asyncio.to_thread(_precheck, jurisdiction_key, question, config)
+    if early is not None:
+        return early
+
+    question_embedding = (await aembed_query(ollama_client, EMBED_MODEL, question)).tolist()
+    chunks = await asyncio.to_thread(_retrieve, question_embedding, config["collection_name"])
+
+    context = _build_context(chunks)
+    system_prompt = _load_system_prompt(jurisdiction_key, config)
+
+    answer = await ollama_client.chat(
+        model=ANSWER_MODEL,
+        messages=_answer_messages(system_prompt, context, question),
+    )
+
+    return _format_result(jurisdiction_key, config, answer, chunks)
@@ -7,6 +7,8 @@ Each jurisdiction gets its own isolated collection — no shared namespace.
 
 from __future__ import annotations
 
+import threading
+
 import chromadb
 from chromadb.config import Settings
 from pathlib import Path
@@ -15,20 +17,38 @@ from pathlib import Path
 CHROMA_PATH = Path(__file__).resolve().parents[2] / "data" / "ordinance_chroma"
 
 _client: chromadb.ClientAPI | None = None
+_client_lock = threading.Lock()
 
 
 def get_client() -> chromadb.ClientAPI:
-    """Return a singleton ChromaDB persistent client."""
+    """
+    Return a singleton ChromaDB persistent client.
+    Locked because async endpoints call into this from worker threads.
+    """
     global _client
-    if _client is None:
-        CHROMA_PATH.mkdir(parents=True, exist_ok=True)
-        _client = chromadb.PersistentClient(
-            path=str(CHROMA_PATH),
-            settings=Settings(anonymized_telemetry=False),
-        )
+    with _client_lock:
+        if _client is None:
+            CHROMA_PATH.mkdir(parents=True, exist_ok=True)
+            _client = chromadb.PersistentClient(
+                path=str(CHROMA_PATH),
+                settings=Settings(anonymized_telemetry=False),
+            )
     return _client
 
 
+def reset_client() -> None:
+    """
+    Drop the cached client so the next call re-opens the store.
+    Called after an ingest job in a worker process has written to it,
+    so this process stops serving its stale in-memory view.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.clear_system_cache()
+        _client = None
+
+
 def get_collection(collection_name: str) -> chromadb.Collection:
     """
     Get or create a collection for a jurisdiction.
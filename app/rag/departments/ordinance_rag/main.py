@@ -15,11 +15,41 @@ Or include routers directly:
     app.include_router(admin_router)
 """
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.rag.jobs import JobQueue, JobWorkerPool
+from app.rag.ollama_client import AsyncOllamaClient, OllamaClient
 from app.rag.departments.ordinance_rag.api.ordinance_router import router as ordinance_router
 from app.rag.departments.ordinance_rag.api.admin_router import router as admin_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Standalone mode: the routers read their Ollama clients and the ingest
+    job queue from app.state (the root main.py sets the same attributes on
+    the main app).
+    """
+    # Query-time clients: chunk embeddings are cached by the ingest workers
+    app.state.ollama = OllamaClient()
+    app.state.async_ollama = AsyncOllamaClient()
+    app.state.job_queue = JobQueue(os.getenv("JOB_QUEUE_PATH", "data/jobs/jobs.sqlite"))
+    app.state.job_queue.requeue_orphans()
+    workers = JobWorkerPool(app.state.job_queue.path, workers=int(os.getenv("INGEST_WORKERS", "1")))
+    workers.start()
+    try:
+        yield
+    finally:
+        workers.stop()
+        app.state.job_queue.close()
+        app.state.ollama.close()
+        await app.state.async_ollama.aclose()
+
+
 ordinance_app = FastAPI(
+    lifespan=lifespan,
     title="Ordinance RAG",
     description="AI-powered Q&A for Cumberland County jurisdiction ordinances.",
     version="1.0.0",
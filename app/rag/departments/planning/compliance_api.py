@@ -52,7 +52,11 @@ from .compliance_rules import (
     ALL_COUNTY_RULES,
     ALL_WADE_RULES,
 )
-from .plat_vision_extractor import extract_from_plat_image
+from .plat_vision_extractor import (
+    DEFAULT_PLAT_VISION_MODE,
+    PLAT_VISION_MODES,
+    extract_from_plat_image_async,
+)
 from .session_store import create_session, new_session_id, check_permissions
 # from .session_store import create_session, new_session_id
 logger = logging.getLogger(__name__)
@@ -68,6 +72,14 @@ router = APIRouter(prefix="/compliance", tags=["Planning - Compliance Checking"]
 _DEFAULT_SAVE_DIR = Path("data/submissions")
 SUBMISSIONS_DIR   = Path(os.getenv("COMPLIANCE_SUBMISSIONS_DIR", str(_DEFAULT_SAVE_DIR)))
 
+# How plat vision calls are made by default ("two_pass", "concurrent" or
+# "fused" - see plat_vision_extractor.PLAT_VISION_MODES)
+PLAT_VISION_MODE = os.getenv("PLAT_VISION_MODE", DEFAULT_PLAT_VISION_MODE)
+
+# Re-read fields the whole-sheet pass left empty from high-resolution tiles
+# of the sheet by default (plat_tiling.py); PLAT_VISION_TILED=1 to enable
+PLAT_VISION_TILED = os.getenv("PLAT_VISION_TILED", "0").lower() in ("1", "true", "yes")
+
 # Allowed image types for plat image uploads
 _ALLOWED_IMAGE_TYPES = {
     "image/jpeg",
@@ -91,6 +103,14 @@ def get_ollama(request: Request):
     return request.app.state.ollama
 
 
+def get_async_ollama(request: Request):
+    """
+    FastAPI dependency that returns the shared AsyncOllamaClient from app.state.
+    Used by the async plat-image endpoints so vision calls don't block the event loop.
+    """
+    return request.app.state.async_ollama
+
+
 # ==================================================================
 # Internal helpers
 # ==================================================================
@@ -518,11 +538,26 @@ async def check_plat_image(
         default="llama3.2-vision:11b",
         description="Ollama vision model tag to use for extraction",
     ),
+    vision_mode: str = Form(
+        default=PLAT_VISION_MODE,
+        description=(
+            "'two_pass' (fields then observations), 'concurrent' (both passes at once) "
+            "or 'fused' (one schema-constrained call for both)"
+        ),
+    ),
+    tiled: bool = Form(
+        default=PLAT_VISION_TILED,
+        description=(
+            "Also read fields left empty from high-resolution tiles of the sheet "
+            "(title block first; tiles are sent while some field is still unanswered, "
+            "plus at most 2 to check 'not shown' and smallest/largest-dimension answers)"
+        ),
+    ),
     save: bool = Query(
         default=True,
         description="Save the result to the VM submissions folder",
     ),
-    ollama=Depends(get_ollama),
+    ollama=Depends(get_async_ollama),
 ) -> dict:
     """
     Two-pass AI plat review workflow using the local Ollama vision model:
@@ -539,6 +574,20 @@ async def check_plat_image(
     cannot capture on their own (e.g. lots that appear landlocked,
     unlabeled cul-de-sac diameters, tight intersection angles, etc.).
 
+    `vision_mode` chooses how the passes run: one after the other
+    ("two_pass"), at the same time ("concurrent"), or fused into one
+    schema-constrained call ("fused" - one image prefill instead of two).
+    The default comes from the PLAT_VISION_MODE environment variable.
+
+    **Tiled pass (optional)**
+    With `tiled` on, fields still empty after the whole-sheet call (small
+    dimension callouts, title-block text) are read again from overlapping
+    full-resolution tiles of the sheet, title block first, and merged by
+    confidence. Tiles with nothing left to fill are not sent; a "not shown"
+    or smallest / largest dimension answer is checked against at most two
+    more tiles, and `tiling.fields_partial` lists the fields some tile
+    covering them was never read for.
+
     After both passes the extracted SubmissionData is fed into the correct
     jurisdiction's compliance rule engine and a complete report is returned.
 
@@ -549,6 +598,8 @@ async def check_plat_image(
     - planner_observations: list of open-ended narrative findings
     - extracted_fields: raw dict of what the vision model extracted (for audit)
     - vision_model: which Ollama model was used
+    - vision_mode: how the vision calls were made
+    - tiling: tiles run/skipped and fields filled by the tiled pass (or null)
     - source_file: original filename of the uploaded image
     """
     # Validate image type
@@ -575,6 +626,13 @@ async def check_plat_image(
             detail="jurisdiction must be 'county' or 'wade'.",
         )
 
+    # Validate vision mode
+    if vision_mode not in PLAT_VISION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"vision_mode must be one of: {', '.join(PLAT_VISION_MODES)}.",
+        )
+
     # Read image bytes
     image_bytes = await plat_image.read()
     if not image_bytes:
@@ -590,11 +648,13 @@ async def check_plat_image(
 
     # Run vision extraction (Pass 1 structured fields + Pass 2 narrative)
     try:
-        vision_result = extract_from_plat_image(
+        vision_result = await extract_from_plat_image_async(
             ollama_client=ollama,
             image_bytes=image_bytes,
             submission_type=submission_type,
             vision_model=vision_model,
+            mode=vision_mode,
+            tiled=tiled,
         )
     except Exception as exc:
         logger.exception("Vision extraction failed")
@@ -618,6 +678,9 @@ async def check_plat_image(
     report["planner_observations"] = vision_result["planner_observations"]
     report["extracted_fields"]     = vision_result["extracted_fields"]
     report["vision_model"]         = vision_result["vision_model"]
+    report["vision_mode"]          = vision_result["vision_mode"]
+    report["tiling"]               = vision_result["tiling"]
+    report["image_prep"]           = vision_result["image_prep"]
     report["source_file"]          = plat_image.filename
 
     # Save to disk using the plat_images subfolder
@@ -654,6 +717,9 @@ async def check_plat_image(
     report["planner_observations"] = vision_result["planner_observations"]
     report["extracted_fields"]     = vision_result["extracted_fields"]
     report["vision_model"]         = vision_result["vision_model"]
+    report["vision_mode"]          = vision_result["vision_mode"]
+    report["tiling"]               = vision_result["tiling"]
+    report["image_prep"]           = vision_result["image_prep"]
     report["source_file"]          = plat_image.filename
 
     # Save to disk using the plat_images subfolder
@@ -702,8 +768,10 @@ async def check_plat_image_failures(
     submission_type: str = Form(...),
     jurisdiction: str = Form(default="county"),
     vision_model: str = Form(default="llama3.2-vision:11b"),
+    vision_mode: str = Form(default=PLAT_VISION_MODE),
+    tiled: bool = Form(default=PLAT_VISION_TILED),
     save: bool = Query(default=True),
-    ollama=Depends(get_ollama),
+    ollama=Depends(get_async_ollama),
 ) -> dict:
     """
     Same as **/check-plat-image** but strips out PASS and N/A items.
@@ -718,6 +786,8 @@ async def check_plat_image_failures(
         submission_type=submission_type,
         jurisdiction=jurisdiction,
         vision_model=vision_model,
+        vision_mode=vision_mode,
+        tiled=tiled,
         save=save,
         ollama=ollama,
     )
@@ -13,7 +13,7 @@ POST /chat-plat
     (to keep context window efficient).
     Always includes the plat image in every chat turn so the model
     can answer visual questions without re-upload.
-    Calls gpt-oss:20b via the shared OllamaClient.
+    Calls gpt-oss:20b via the shared AsyncOllamaClient.
     Returns the AI reply and the updated conversation history.
 
 Design decisions
@@ -23,19 +23,26 @@ Design decisions
 - System prompt uses failures + warnings only  -- not all 89 rules.
 - History is managed client-side; backend is stateless per call.
   Each request must include the full conversation so far.
-- Timeout handling: the OllamaClient call can take 60-120s for long
+- Timeout handling: the model call can take 60-120s for long
   context. Blazor should set its HttpClient.Timeout accordingly
-  (recommend 120s) and show a spinner while waiting.
+  (recommend 120s) and show a spinner while waiting. The call is awaited
+  on the shared AsyncOllamaClient, so other requests keep being served
+  while this one waits.
 
 Content type determination
 --------------------------
 For images we send base64 with the correct MIME type.
 For PDFs we convert page 1 to a base64 PNG via pdf2image before
 sending to the vision model (same approach as plat_vision_extractor.py).
+Either way the image is then shrunk to the vision model's input size and
+sent as the smaller of JPEG / PNG (image_prep.prepare_image). That work
+(about a second for a large scan) runs in a worker thread on the first
+turn only; the result is saved with the session and reused by later turns.
 """
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
 import logging
@@ -45,7 +52,14 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 
-from .session_store import load_session, load_session_image, session_exists
+from ...image_prep import prepare_image
+from .session_store import (
+    load_session,
+    load_session_image,
+    load_session_vision_image,
+    save_session_vision_image,
+    session_exists,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -76,12 +90,12 @@ class ChatResponse(BaseModel):
 
 
 # ---------------------------------------------------------------------------
-# Dependency injection  - reuse the app-level OllamaClient
+# Dependency injection  - reuse the app-level AsyncOllamaClient
 # ---------------------------------------------------------------------------
 
-def get_ollama(request):
-    """Return the shared OllamaClient from app.state (set in main.py at startup)."""
-    return request.app.state.ollama
+def get_async_ollama(request):
+    """Return the shared AsyncOllamaClient from app.state (set in main.py at startup)."""
+    return request.app.state.async_ollama
 
 
 # ---------------------------------------------------------------------------
@@ -189,10 +203,36 @@ def _ext_to_mime(ext: str) -> str:
     return mapping.get(ext.lower(), "image/png")
 
 
-def _image_bytes_to_base64(image_bytes: bytes, ext: str) -> tuple[str, str]:
+def _session_image_base64(session_id: str) -> tuple[str, str]:
+    """
+    Return (base64_string, mime_type) of the session's plat as sent to the
+    vision model. Blocking (file I/O, maybe decoding): call it through
+    asyncio.to_thread.
+
+    The prepared copy saved by an earlier turn is used when there is one;
+    otherwise the upload is prepared (_image_bytes_to_vision) and saved.
+
+    Raises FileNotFoundError if the session has no plat image.
+    """
+    cached = load_session_vision_image(session_id)
+    if cached is not None:
+        image_bytes, ext = cached
+    else:
+        image_bytes, ext, prepared = _image_bytes_to_vision(*load_session_image(session_id))
+        if prepared:
+            try:
+                save_session_vision_image(session_id, image_bytes, ext)
+            except Exception as exc:
+                logger.warning("Session %s: could not save prepared image: %s", session_id, exc)
+    return base64.b64encode(image_bytes).decode("utf-8"), _ext_to_mime(ext)
+
+
+def _image_bytes_to_vision(image_bytes: bytes, ext: str) -> tuple[bytes, str, bool]:
     """
-    Return (base64_string, mime_type).
-    PDFs are converted to a PNG of the first page before encoding.
+    Return (image_bytes, ext, prepared) for the vision model.
+    PDFs are converted to a PNG of the first page first; every image then
+    goes through prepare_image() (see app/rag/image_prep.py). prepared is
+    False when that failed and the bytes are sent as stored.
     """
     if ext.lower() == ".pdf":
         try:
@@ -206,9 +246,14 @@ def _image_bytes_to_base64(image_bytes: bytes, ext: str) -> tuple[str, str]:
         except Exception as exc:
             logger.warning("PDF->PNG conversion failed, sending raw: %s", exc)
 
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
-    mime = _ext_to_mime(ext)
-    return b64, mime
+    # Shrink/re-encode to what the vision model sees; the image is resent
+    # on every chat turn, so this saves upload + decode time each time
+    try:
+        prepared = prepare_image(image_bytes)
+    except Exception as exc:
+        logger.warning("Could not prepare plat image, sending it as stored: %s", exc)
+        return image_bytes, ext, False
+    return prepared.data, "." + prepared.format, True
 
 
 # ---------------------------------------------------------------------------
@@ -237,7 +282,7 @@ async def chat_plat(
 
     **Recommended Blazor HttpClient timeout**: 120 seconds.
     """
-    ollama = get_ollama(request)
+    ollama = get_async_ollama(request)
 
     # ---- Validate session --------------------------------------------------
     if not session_exists(body.session_id):
@@ -255,8 +300,8 @@ async def chat_plat(
 
     # ---- Load image --------------------------------------------------------
     try:
-        image_bytes, image_ext = load_session_image(body.session_id)
-        b64_image, mime_type   = _image_bytes_to_base64(image_bytes, image_ext)
+        # Off the event loop: the first turn decodes and re-encodes the plat
+        b64_image, mime_type = await asyncio.to_thread(_session_image_base64, body.session_id)
     except FileNotFoundError:
         b64_image  = None
         mime_type  = None
@@ -314,10 +359,9 @@ async def chat_plat(
     )
 
     try:
-        response = ollama.chat(
+        response = await ollama.chat(
             model=chat_model,
             messages=messages,
-            stream=False,
         )
     except Exception as exc:
         logger.exception("Ollama chat call failed for session %s", body.session_id)
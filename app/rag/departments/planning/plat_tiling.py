@@ -0,0 +1,584 @@
+"""
+plat_tiling.py  -  High-resolution tile pass for plat vision extraction
+=======================================================================
+Plats are large-format sheets (24 x 36"). The whole-sheet vision call sees
+them shrunk to ~1120 px on the long side, where dimension callouts, the
+scale bar and the title-block text are a few pixels tall - those fields
+come back null in SubmissionData and the rule engine can only WARN.
+
+This module re-reads ONLY the fields that are still null, from crops of
+the sheet at (up to) full resolution:
+
+  1. plan_tiles() cuts the sheet into a grid of overlapping tiles plus
+     one title-block tile (lower-right corner, where NC plats put the
+     title block, certificates and most notes). Each tile knows which
+     fields it can hold: title-block / note fields, or drawing fields
+     (dimensions, easements, streets).
+  2. Tiles run in priority order - title block first - in waves of
+     `workers` concurrent vision calls. Each call asks for just that
+     tile's still-missing fields, with a value AND a confidence per
+     field (JSON-schema-constrained reply).
+  3. After every wave the votes are merged (merge_votes): the value with
+     the highest total confidence wins. Fields that reach min_confidence
+     are filled - except where one tile can't have the final answer:
+     - yes/no "is it shown" fields: a confident `true` from any tile
+       wins at once (an item drawn in one tile is on the sheet), but a
+       `false` is only provisional - the item may be in a tile not read.
+     - smallest / largest dimension fields (min_lot_frontage_ft,
+       max_block_length_ft, ...): the min / max over every tile's
+       confident reading, also provisional.
+     A provisional field is still asked of every tile that runs anyway
+     (for free), but does not by itself keep tiles queued: at most
+     sweep_tiles extra calls are spent on it. After the last tile it is
+     filled, and listed in the report as "fields_partial" if some tile
+     covering it was never read.
+  4. A tile with no field left to fill (provisional ones aside) is
+     skipped, so the extra calls shrink as the sheet gets read - at most
+     max_tiles + sweep_tiles calls, usually far fewer.
+
+Dimensions of something the whole-sheet pass says is NOT on the plat
+(cul-de-sac length when has_cul_de_sac is false, ...) are not asked at all.
+
+Sheet-wide fields (lot counts, totals, "are lots numbered in order")
+can't be read from a part of the sheet and are left to the whole-sheet
+pass.
+
+Usage (from plat_vision_extractor.py, tiled=True):
+
+    filled, report = refine_with_tiles(
+        ollama_client, image_bytes, extracted_fields, vision_model,
+    )
+    extracted_fields.update(filled)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from PIL import Image
+
+from ...image_prep import VISION_MAX_SIDE, encode_for_vision
+from ...ollama_client import AsyncOllamaClient, OllamaClient
+from .plat_vision_extractor import (
+    _BOOL_FIELDS,
+    _FIELD_GUIDANCE,
+    _FIELD_KEYS,
+    _coerce,
+    _json_type,
+    _strip_to_json,
+    _vision_messages,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sheets no larger than this (long side, pixels) are already seen at full
+# resolution by the whole-sheet call: no tiles
+_MIN_TILING_SIDE = int(VISION_MAX_SIDE * 1.25)
+
+# Grid over the whole sheet (columns x rows, landscape; swapped for
+# portrait sheets) and how much neighbouring tiles overlap, so a label
+# on a tile edge is whole in at least one tile
+DEFAULT_GRID = (3, 2)
+DEFAULT_OVERLAP = 0.12
+
+# Title-block tile: this fraction of the sheet's width / height, lower right
+_TITLE_BLOCK_WIDTH = 0.35
+_TITLE_BLOCK_HEIGHT = 0.5
+
+# Defaults for refine_with_tiles
+DEFAULT_MAX_TILES = 6
+DEFAULT_SWEEP_TILES = 2
+DEFAULT_TILE_WORKERS = 2
+DEFAULT_MIN_CONFIDENCE = 0.5
+
+
+# ===========================================================================
+# Which fields a tile can hold
+# ===========================================================================
+
+# Title block, certificates and the scale/date/acreage written next to them
+_TITLE_BLOCK_FIELDS = (
+    "subdivision_name", "owner_name", "designer_name", "scale_feet_per_inch",
+    "has_date", "total_acreage", "has_north_arrow", "has_vicinity_sketch",
+    "surveyor_certificate_present", "ownership_dedication_cert_present",
+    "director_cert_present", "plat_review_officer_cert_present",
+    "register_of_deeds_space_present",
+)
+
+# General notes and disclosure statements (title block or a notes column)
+_NOTE_FIELDS = (
+    "sfha_disclosure_note_present", "utility_statement_on_plan", "water_sewer_type",
+    "on_site_sewer_disclosure_present", "private_street_disclosure_present",
+    "class_c_disclosure_present", "class_b_c_no_further_divide_disclosure",
+    "farmland_disclosure_present", "airport_disclosure_present",
+    "nonconforming_structure_disclosure", "proposed_public_street_disclosure",
+    "stormwater_permit_addressed",
+)
+
+# Things drawn and dimensioned on the plan itself
+_DRAWING_FIELDS = (
+    "has_north_arrow", "has_vicinity_sketch", "has_zoning_district_lines",
+    "has_existing_easements", "has_adjoining_owner_names", "has_row_width_labeled",
+    "min_lot_frontage_ft", "sfha_boundary_shown", "riparian_buffer_shown",
+    "riparian_buffer_width_ft", "drainage_easement_shown", "drainage_easement_min_width_ft",
+    "utility_easement_width_ft", "max_block_length_ft", "has_street_names",
+    "has_street_cross_sections", "street_corner_radius_ft", "street_offset_ft",
+    "has_cul_de_sac", "cul_de_sac_length_ft", "cul_de_sac_roadway_diameter_ft",
+    "cul_de_sac_row_diameter_ft", "has_hammerhead", "hammerhead_outside_length_ft",
+    "hammerhead_outside_width_ft", "hammerhead_roadway_length_ft",
+    "hammerhead_roadway_width_ft", "private_street_row_ft", "sidewalk_shown",
+    "sidewalk_width_inches", "retention_basin_present", "retention_basin_fence_shown",
+    "wetlands_shown_if_present", "topographic_contours_shown",
+)
+
+# Sheet-wide smallest / largest dimensions: combined over all tiles with
+# min() / max() instead of voting - each tile only sees some of the lots,
+# blocks or cul-de-sacs
+_MIN_FIELDS = frozenset({"min_lot_frontage_ft", "drainage_easement_min_width_ft"})
+_MAX_FIELDS = frozenset({"max_block_length_ft", "cul_de_sac_length_ft"})
+
+# Fields that only apply when a yes/no field is not false: a cul-de-sac
+# length is never asked when the whole-sheet pass saw no cul-de-sac
+_REQUIRES = {
+    "cul_de_sac_length_ft": "has_cul_de_sac",
+    "cul_de_sac_roadway_diameter_ft": "has_cul_de_sac",
+    "cul_de_sac_row_diameter_ft": "has_cul_de_sac",
+    "hammerhead_outside_length_ft": "has_hammerhead",
+    "hammerhead_outside_width_ft": "has_hammerhead",
+    "hammerhead_roadway_length_ft": "has_hammerhead",
+    "hammerhead_roadway_width_ft": "has_hammerhead",
+    "sidewalk_width_inches": "sidewalk_shown",
+    "riparian_buffer_width_ft": "riparian_buffer_shown",
+    "drainage_easement_min_width_ft": "drainage_easement_shown",
+    "retention_basin_fence_shown": "retention_basin_present",
+}
+
+# Every field a tile can be asked for
+TILE_FIELDS = frozenset(_TITLE_BLOCK_FIELDS + _NOTE_FIELDS + _DRAWING_FIELDS)
+
+
+@dataclass
+class Tile:
+    name: str                          # "title block", "row 1, column 2", ...
+    box: tuple[int, int, int, int]     # (left, top, right, bottom) in sheet pixels
+    priority: int                      # lower runs first
+    fields: tuple[str, ...]            # fields this tile may hold
+
+
+def plan_tiles(
+    width: int,
+    height: int,
+    grid: tuple[int, int] = DEFAULT_GRID,
+    overlap: float = DEFAULT_OVERLAP,
+) -> list[Tile]:
+    """
+    Tiles for a width x height sheet, title block first.
+
+    Returns [] when the sheet is small enough for the whole-sheet call to
+    see at full resolution.
+    """
+    if max(width, height) <= _MIN_TILING_SIDE:
+        return []
+
+    title_fields = _TITLE_BLOCK_FIELDS + _NOTE_FIELDS
+    drawing_fields = _DRAWING_FIELDS + _NOTE_FIELDS
+    tiles = [
+        Tile(
+            name="title block",
+            box=(round(width * (1 - _TITLE_BLOCK_WIDTH)), round(height * (1 - _TITLE_BLOCK_HEIGHT)), width, height),
+            priority=0,
+            fields=title_fields,
+        )
+    ]
+
+    columns, rows = grid if width >= height else grid[::-1]
+    tile_w = width / columns
+    tile_h = height / rows
+    pad_w = tile_w * overlap
+    pad_h = tile_h * overlap
+    for row in range(rows):
+        for column in range(columns):
+            box = (
+                max(0, round(column * tile_w - pad_w)),
+                max(0, round(row * tile_h - pad_h)),
+                min(width, round((column + 1) * tile_w + pad_w)),
+                min(height, round((row + 1) * tile_h + pad_h)),
+            )
+            # The grid tile over the title block corner may also hold title-block text
+            in_corner = column == columns - 1 and row == rows - 1
+            tiles.append(Tile(
+                name=f"row {row + 1}, column {column + 1}",
+                box=box,
+                priority=1,
+                fields=tuple(dict.fromkeys(drawing_fields + (title_fields if in_corner else ()))),
+            ))
+
+    tiles.sort(key=lambda t: t.priority)
+    return tiles
+
+
+# ===========================================================================
+# Per-tile prompt, schema and reply parsing
+# ===========================================================================
+
+def _guidance() -> dict[str, str]:
+    """Field -> guidance line, from the whole-sheet prompt's field guidance."""
+    lines: dict[str, str] = {}
+    for line in _FIELD_GUIDANCE.splitlines():
+        name, sep, text = line.strip().lstrip("- ").partition(":")
+        if sep and name.strip() in _FIELD_KEYS:
+            lines[name.strip()] = text.strip()
+    return lines
+
+
+_GUIDANCE = _guidance()
+
+
+def _tile_prompt(tile: Tile, fields: list[str]) -> str:
+    field_lines = "\n".join(
+        f"- {key}" + (f": {_GUIDANCE[key]}" if key in _GUIDANCE else "") for key in fields
+    )
+    return f"""\
+You are an expert NC-licensed land surveyor reading a Cumberland County
+subdivision plat. This image is ONE PART of the plat sheet ({tile.name}),
+shown at high resolution.
+
+Read ONLY what is visible in this part. For each field below return an
+object {{"value": ..., "confidence": ...}}:
+- value: read labels and dimension callouts directly (numbers only for
+  numeric fields). Use null when the item is not in this part of the
+  sheet or you cannot read it - never false just because it is outside
+  this part.
+- confidence: 0.0 to 1.0, how clearly the image shows this value.
+
+Fields:
+{field_lines}
+
+Output ONLY the JSON object, with every field above as a key.
+"""
+
+
+def _tile_schema(fields: list[str]) -> dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {
+            key: {
+                "type": "object",
+                "properties": {
+                    "value": {"type": _json_type(key)},
+                    "confidence": {"type": "number"},
+                },
+                "required": ["value", "confidence"],
+            }
+            for key in fields
+        },
+        "required": fields,
+    }
+
+
+def _parse_tile(raw: str, fields: list[str]) -> dict[str, tuple[Any, float]]:
+    """Tile reply -> {field: (coerced value, confidence)} for non-null answers."""
+    try:
+        reply = json.loads(_strip_to_json(raw))
+    except (json.JSONDecodeError, ValueError) as exc:
+        logger.warning("Could not parse tile JSON: %s | raw=%s", exc, raw[:200])
+        return {}
+    if not isinstance(reply, dict):
+        return {}
+
+    votes: dict[str, tuple[Any, float]] = {}
+    for key in fields:
+        answer = reply.get(key)
+        if isinstance(answer, dict):
+            value, confidence = answer.get("value"), answer.get("confidence")
+        else:
+            value, confidence = answer, None   # model ignored the {value, confidence} shape
+        value = _coerce(key, value)
+        if value is None or value == "":
+            continue
+        try:
+            confidence = min(1.0, max(0.0, float(confidence)))
+        except (TypeError, ValueError):
+            confidence = DEFAULT_MIN_CONFIDENCE
+        votes[key] = (value, confidence)
+    return votes
+
+
+# ===========================================================================
+# Merging votes
+# ===========================================================================
+
+def _ballot(value: Any) -> Any:
+    """What counts as 'the same answer' (case/space-insensitive text, rounded numbers)."""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+def merge_votes(
+    votes: dict[str, list[tuple[Any, float]]],
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+) -> dict[str, tuple[Any, float]]:
+    """
+    Combine the (value, confidence) votes of several tiles per field.
+
+    The answer with the highest summed confidence wins. Its merged
+    confidence is its best single confidence, scaled down by how much of
+    the total confidence disagreed with it. Yes/no fields: a `true` from
+    any tile wins over `false` (the item is on the sheet somewhere).
+    Smallest / largest dimension fields: the min / max of the readings
+    with at least min_confidence (of all readings if none has).
+
+    Returns {field: (value, confidence)}.
+    """
+    merged: dict[str, tuple[Any, float]] = {}
+    for key, ballots in votes.items():
+        if not ballots:
+            continue
+        if key in _MIN_FIELDS or key in _MAX_FIELDS:
+            sure = [b for b in ballots if b[1] >= min_confidence] or ballots
+            pick = min if key in _MIN_FIELDS else max
+            merged[key] = pick(sure, key=lambda b: b[0])
+            continue
+        if key in _BOOL_FIELDS and any(value is True for value, _ in ballots):
+            merged[key] = (True, max(c for value, c in ballots if value is True))
+            continue
+
+        totals: dict[Any, float] = {}
+        best: dict[Any, tuple[Any, float]] = {}
+        for value, confidence in ballots:
+            ballot = _ballot(value)
+            totals[ballot] = totals.get(ballot, 0.0) + confidence
+            if ballot not in best or confidence > best[ballot][1]:
+                best[ballot] = (value, confidence)
+        winner = max(totals, key=totals.get)
+        total = sum(totals.values())
+        value, confidence = best[winner]
+        merged[key] = (value, confidence * (totals[winner] / total if total else 1.0))
+    return merged
+
+
+# ===========================================================================
+# Running the tiles
+# ===========================================================================
+
+@dataclass
+class _TilingState:
+    """Votes, filled fields and counters shared by the sync and async runners."""
+    tiles: list[Tile]
+    missing: set[str]
+    min_confidence: float
+    max_tiles: int
+    sweep_tiles: int = DEFAULT_SWEEP_TILES
+
+    def __post_init__(self) -> None:
+        self.queue = list(self.tiles)
+        self.votes: dict[str, list[tuple[Any, float]]] = {}
+        self.filled: dict[str, Any] = {}
+        self.confidence: dict[str, float] = {}
+        self.partial: list[str] = []
+        # Confident `false` / min / max answers, final only after finish()
+        self.provisional: dict[str, tuple[Any, float]] = {}
+        self.run = 0
+        self.sweeps = 0
+        self.skipped = 0
+        # field -> tiles covering it that have not been read
+        self.unread = Counter(key for tile in self.tiles for key in tile.fields)
+
+    def next_wave(self, workers: int) -> list[tuple[Tile, list[str]]]:
+        """
+        Next tiles to run (priority order). A tile with a field nobody has
+        answered yet uses the max_tiles budget; one with only provisional
+        fields uses the smaller sweep_tiles budget; others are skipped.
+        """
+        wave: list[tuple[Tile, list[str]]] = []
+        while self.queue and len(wave) < workers:
+            tile = self.queue.pop(0)
+            targets = [key for key in tile.fields if key in self.missing]
+            if any(key not in self.provisional for key in targets) and self.run < self.max_tiles:
+                self.run += 1
+            elif targets and self.sweeps < self.sweep_tiles:
+                self.sweeps += 1
+            else:
+                self.skipped += 1
+                continue
+            self.unread.subtract(tile.fields)
+            wave.append((tile, targets))
+        return wave
+
+    def add(self, tile: Tile, votes: dict[str, tuple[Any, float]]) -> None:
+        logger.info("Plat tile %s: %d field votes", tile.name, len(votes))
+        for key, vote in votes.items():
+            self.votes.setdefault(key, []).append(vote)
+        for key, (value, confidence) in merge_votes(self.votes, self.min_confidence).items():
+            if key not in self.missing or confidence < self.min_confidence:
+                continue
+            if (key in _BOOL_FIELDS and value is not True) or key in _MIN_FIELDS or key in _MAX_FIELDS:
+                # Another tile may still hold a `true` / smaller / larger value
+                self.provisional[key] = (value, confidence)
+                continue
+            self._fill(key, value, confidence)
+
+    def _fill(self, key: str, value: Any, confidence: float) -> None:
+        self.filled[key] = value
+        self.confidence[key] = round(confidence, 2)
+        self.missing.discard(key)
+        self.provisional.pop(key, None)
+
+    def finish(self) -> None:
+        """Fill the provisional fields; note those some covering tile never read."""
+        for key, (value, confidence) in list(self.provisional.items()):
+            if self.unread[key] > 0:
+                self.partial.append(key)
+            self._fill(key, value, confidence)
+
+    def report(self, sheet_size: tuple[int, int] | None) -> dict[str, Any]:
+        # Tiles never reached (budget spent) count as skipped too
+        return {
+            "sheet_size": list(sheet_size) if sheet_size else None,
+            "tiles_planned": len(self.tiles),
+            "tiles_run": self.run + self.sweeps,
+            "tiles_skipped": self.skipped + len(self.queue),
+            "fields_filled": sorted(self.filled),
+            "fields_partial": sorted(self.partial),
+            "field_confidence": self.confidence,
+        }
+
+
+def _open_sheet(image_bytes: bytes) -> Image.Image | None:
+    try:
+        sheet = Image.open(io.BytesIO(image_bytes))
+        sheet.load()
+        return sheet
+    except Exception as exc:
+        logger.warning("Could not open plat image for tiling: %s", exc)
+        return None
+
+
+def _tile_request(sheet: Image.Image, tile: Tile, targets: list[str]) -> tuple[str, str, dict[str, Any]]:
+    """(base64 crop, prompt, schema) for one tile."""
+    prepared = encode_for_vision(sheet.crop(tile.box))
+    return (
+        base64.b64encode(prepared.data).decode("utf-8"),
+        _tile_prompt(tile, targets),
+        _tile_schema(targets),
+    )
+
+
+def _start(
+    image_bytes: bytes,
+    extracted_fields: dict[str, Any],
+    max_tiles: int,
+    min_confidence: float,
+    sweep_tiles: int,
+) -> tuple[Image.Image | None, _TilingState]:
+    missing = {
+        key for key in TILE_FIELDS
+        if extracted_fields.get(key) is None and extracted_fields.get(_REQUIRES.get(key, "")) is not False
+    }
+    sheet = _open_sheet(image_bytes) if missing else None
+    tiles = plan_tiles(*sheet.size) if sheet is not None else []
+    return sheet, _TilingState(tiles, missing, min_confidence, max_tiles, sweep_tiles)
+
+
+def refine_with_tiles(
+    ollama_client: OllamaClient,
+    image_bytes: bytes,
+    extracted_fields: dict[str, Any],
+    vision_model: str,
+    max_tiles: int = DEFAULT_MAX_TILES,
+    workers: int = DEFAULT_TILE_WORKERS,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    sweep_tiles: int = DEFAULT_SWEEP_TILES,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Fill null fields from high-resolution tiles of the plat sheet.
+
+    Parameters
+    ----------
+    ollama_client    : Shared OllamaClient (thread-safe; tiles run on a pool)
+    image_bytes      : The plat as uploaded (full resolution)
+    extracted_fields : Fields from the whole-sheet pass; only null ones are read again
+    vision_model     : Ollama model tag
+    max_tiles        : Most tile calls for fields no tile has answered yet
+    workers          : Tile calls running at the same time
+    min_confidence   : Merged confidence a field needs to be filled
+    sweep_tiles      : Most extra calls only to check provisional answers
+                       (a `false`, a smallest / largest dimension)
+
+    Returns
+    -------
+    (filled, report): {field: raw value} for the fields that were filled,
+    and a report dict (tiles planned / run / skipped, fields filled from
+    part of the sheet, field confidence).
+    """
+    sheet, state = _start(image_bytes, extracted_fields, max_tiles, min_confidence, sweep_tiles)
+
+    def run_tile(tile: Tile, targets: list[str]) -> dict[str, tuple[Any, float]]:
+        image_b64, prompt, schema = _tile_request(sheet, tile, targets)
+        try:
+            raw = ollama_client.chat(
+                model=vision_model, messages=_vision_messages(prompt, image_b64), format=schema,
+            )
+        except Exception as exc:
+            logger.error("Plat tile %s vision call failed: %s", tile.name, exc)
+            return {}
+        return _parse_tile(raw, targets)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while wave := state.next_wave(max(1, workers)):
+            futures = [(tile, pool.submit(run_tile, tile, targets)) for tile, targets in wave]
+            for tile, future in futures:
+                state.add(tile, future.result())
+
+    state.finish()
+    return state.filled, state.report(sheet.size if sheet is not None else None)
+
+
+async def refine_with_tiles_async(
+    ollama_client: AsyncOllamaClient,
+    image_bytes: bytes,
+    extracted_fields: dict[str, Any],
+    vision_model: str,
+    max_tiles: int = DEFAULT_MAX_TILES,
+    workers: int = DEFAULT_TILE_WORKERS,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    sweep_tiles: int = DEFAULT_SWEEP_TILES,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Async version of refine_with_tiles for FastAPI endpoints. Decoding the
+    sheet and encoding tiles run in worker threads; tile calls in a wave
+    are awaited together.
+    """
+    sheet, state = await asyncio.to_thread(
+        _start, image_bytes, extracted_fields, max_tiles, min_confidence, sweep_tiles,
+    )
+
+    async def run_tile(tile: Tile, targets: list[str]) -> dict[str, tuple[Any, float]]:
+        image_b64, prompt, schema = await asyncio.to_thread(_tile_request, sheet, tile, targets)
+        try:
+            raw = await ollama_client.chat(
+                model=vision_model, messages=_vision_messages(prompt, image_b64), format=schema,
+            )
+        except Exception as exc:
+            logger.error("Plat tile %s vision call failed: %s", tile.name, exc)
+            return {}
+        return _parse_tile(raw, targets)
+
+    while wave := state.next_wave(max(1, workers)):
+        results = await asyncio.gather(*(run_tile(tile, targets) for tile, targets in wave))
+        for (tile, _), votes in zip(wave, results):
+            state.add(tile, votes)
+
+    state.finish()
+    return state.filled, state.report(sheet.size if sheet is not None else None)
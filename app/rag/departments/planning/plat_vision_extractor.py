@@ -16,9 +16,22 @@ a submitted plat image and produce two outputs:
 Architecture
 ------------
 - Follows the exact same pattern as vision_processor.py:
-    image_bytes -> base64 -> ollama_client.chat(vision_model, messages)
+    image_bytes -> prepare_image -> base64 -> ollama_client.chat(vision_model, messages)
+- Full-resolution scans are shrunk to what the vision model actually sees
+  (1120 px on the long side) and sent as the smaller of JPEG / PNG; a
+  JPEG / PNG that is already small enough is sent untouched. The result's
+  "image_prep" entry reports the sizes and bytes saved.
 - Two separate prompts are sent so the model can focus cleanly on each
-  task. Both use the same base64 blob (encoded once).
+  task. Both use the same base64 blob (encoded once). The `mode` argument
+  picks how: one after the other ("two_pass"), both at once
+  ("concurrent", the default), or fused into ONE call whose reply is
+  constrained by a JSON schema to {"fields": ..., "observations": [...]}
+  ("fused" - one image prefill instead of two). Compare them with
+  benchmarks/bench_plat_vision.py.
+- tiled=True adds a high-resolution pass for fields the whole-sheet call
+  left null (small dimension callouts, title-block text): overlapping
+  tiles of the full-size sheet, title block first, read concurrently and
+  merged by confidence vote (see plat_tiling.py).
 - JSON parsing is fault-tolerant; any field the model could not read
   stays None so the rule engine emits WARNINGS instead of crashing.
 - The OllamaClient and vision_model name are passed in, not hard-coded,
@@ -38,17 +51,29 @@ Usage (from compliance_api.py)
     submission_data      = result["submission_data"]      # SubmissionData
     planner_observations = result["planner_observations"] # list[str]
     raw_extracted        = result["extracted_fields"]     # dict (for debug)
+    image_prep           = result["image_prep"]           # dict (bytes sent / saved)
+
+Inside async endpoints use the awaitable twin with the AsyncOllamaClient
+from app.state so the event loop is not blocked during the vision calls:
+
+    result = await extract_from_plat_image_async(
+        ollama_client=request.app.state.async_ollama, ...same args...
+    )
 """
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
 import logging
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-from ...ollama_client import OllamaClient   # app/rag/ollama_client.py
+from ...image_prep import PreparedImage, prepare_image          # app/rag/image_prep.py
+from ...ollama_client import AsyncOllamaClient, OllamaClient   # app/rag/ollama_client.py
 from .models import SubmissionData          # app/rag/departments/planning/models.py
 
 logger = logging.getLogger(__name__)
@@ -63,7 +88,10 @@ DEFAULT_VISION_MODEL = "llama3.2-vision:11b"
 # PASS 1 - Structured field extraction
 # ===========================================================================
 
-_EXTRACTION_PROMPT = """\
+# The field structure and guidance are shared with the fused prompt below,
+# so they are kept as separate pieces.
+
+_EXTRACTION_INTRO = """\
 You are an expert NC-licensed land surveyor reviewing a Cumberland County
 subdivision plat or preliminary plan image.
 
@@ -78,6 +106,9 @@ from proportion only as a last resort.
 
 Return this exact JSON structure (all keys required, values may be null):
 
+"""
+
+_FIELDS_TEMPLATE = """\
 {
   "submission_type": null,
   "subdivision_name": null,
@@ -176,6 +207,9 @@ Return this exact JSON structure (all keys required, values may be null):
   "proposed_public_street_disclosure": null,
   "months_since_prelim_approval": null
 }
+"""
+
+_FIELD_GUIDANCE = """\
 
 Field guidance (only read values visible on the image):
 - submission_type       : "preliminary_plan" or "final_plat" from title/notes
@@ -202,15 +236,20 @@ Field guidance (only read values visible on the image):
 - water_sewer_type      : "public", "private", "on_site", or null
 """
 
+_EXTRACTION_PROMPT = _EXTRACTION_INTRO + _FIELDS_TEMPLATE + _FIELD_GUIDANCE
+
 
 # ==========================================================================
 # PASS 2 - Open-ended planner narrative observations
 # ==========================================================================
 
-_NARRATIVE_PROMPT = """\
+_NARRATIVE_INTRO = """\
 You are a Cumberland County, NC senior planner reviewing a preliminary
 subdivision plat or final plat image for ordinance compliance.
 
+"""
+
+_REVIEW_CHECKLIST = """\
 Look carefully at the plat and list EVERY item that:
   * appears to be missing that would typically be required,
   * appears to violate a dimension or design standard,
@@ -227,6 +266,9 @@ about during a standard completeness review. Examples of good observations:
   - "No utility statement or note about water/sewer service was found."
   - "The north arrow is missing from the plan sheet."
 
+"""
+
+_NARRATIVE_FORMAT = """\
 Return your observations as a JSON array of plain-English strings.
 Do NOT add markdown or any text outside the JSON array.
 Example format:
@@ -235,6 +277,8 @@ Example format:
 If no significant concerns are visible, return an empty array: []
 """
 
+_NARRATIVE_PROMPT = _NARRATIVE_INTRO + _REVIEW_CHECKLIST + _NARRATIVE_FORMAT
+
 
 # ==========================================================================
 # JSON helpers
@@ -397,17 +441,233 @@ def _build_submission_data(
 
 
 # ==========================================================================
-# Public entry point
+# FUSED PASS - fields + observations in one call
+# ==========================================================================
+
+# Every vision call pays the full image prefill again (the image is most of
+# the prompt), so asking for both outputs in ONE call roughly halves the
+# model time. The reply is constrained by a JSON schema (Ollama structured
+# outputs), so the two parts can't run into each other.
+
+_FUSED_PROMPT = (
+    """\
+You are an expert NC-licensed land surveyor and a Cumberland County, NC
+senior planner reviewing a subdivision plat or preliminary plan image.
+
+Do TWO jobs and return ONE JSON object with exactly two keys, "fields"
+and "observations". Do NOT add any explanation, markdown, or code fences.
+
+JOB 1 - "fields": extract observable facts from the image.
+For every field you cannot determine from the image, output null.
+For boolean fields use true or false only when confident; otherwise null.
+For numeric fields read labels and dimension callouts directly; estimate
+from proportion only as a last resort.
+
+Use this exact structure (all keys required, values may be null):
+
+"""
+    + _FIELDS_TEMPLATE
+    + _FIELD_GUIDANCE
+    + """
+JOB 2 - "observations": a JSON array of plain-English strings.
+"""
+    + _REVIEW_CHECKLIST
+    + """\
+If no significant concerns are visible, "observations" is an empty array: []
+"""
+)
+
+
+def _json_type(key: str) -> list[str]:
+    """JSON schema type of one extracted field (always nullable)."""
+    if key in _BOOL_FIELDS:
+        return ["boolean", "null"]
+    if key in _INT_FIELDS:
+        return ["integer", "null"]
+    if key in _FLOAT_FIELDS:
+        return ["number", "null"]
+    return ["string", "null"]
+
+
+# Field names come from the template itself, so prompt and schema can't drift
+_FIELD_KEYS = list(json.loads(_FIELDS_TEMPLATE))
+
+_FUSED_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "fields": {
+            "type": "object",
+            "properties": {key: {"type": _json_type(key)} for key in _FIELD_KEYS},
+            "required": _FIELD_KEYS,
+        },
+        "observations": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["fields", "observations"],
+}
+
+
+def _parse_fused(raw: str) -> tuple[dict[str, Any], list[str]]:
+    """
+    Split the fused reply into (extracted_fields, planner_observations).
+    Same failure behaviour as the two separate parsers.
+    """
+    try:
+        result = json.loads(_strip_to_json(raw))
+    except (json.JSONDecodeError, ValueError) as exc:
+        logger.warning("Could not parse fused JSON: %s | raw=%s", exc, raw[:200])
+        return {}, ["WARNING: Vision model narrative could not be parsed - manual review required."]
+    if not isinstance(result, dict):
+        return {}, []
+    fields = result.get("fields")
+    observations = result.get("observations")
+    return (
+        fields if isinstance(fields, dict) else {},
+        [str(o) for o in observations if o] if isinstance(observations, list) else [],
+    )
+
+
+# ==========================================================================
+# Public entry points
 # ==========================================================================
 
+# How the vision calls are made:
+#   "two_pass"   - Pass 1 then Pass 2, one after the other (the original flow)
+#   "concurrent" - both passes at once; same output as two_pass, and about
+#                  half the wall time when Ollama serves 2+ requests in
+#                  parallel (OLLAMA_NUM_PARALLEL >= 2), else the same
+#   "fused"      - ONE schema-constrained call returning fields and
+#                  observations together: one image prefill instead of two
+PLAT_VISION_MODES = ("two_pass", "concurrent", "fused")
+DEFAULT_PLAT_VISION_MODE = "concurrent"
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in PLAT_VISION_MODES:
+        raise ValueError(f"mode must be one of {PLAT_VISION_MODES}, got {mode!r}")
+
+
+def _vision_messages(prompt: str, image_b64: str) -> list[dict[str, Any]]:
+    """Single user turn carrying the prompt plus the base64 plat image."""
+    return [
+        {
+            "role": "user",
+            "content": prompt,
+            "images": [image_b64],
+        }
+    ]
+
+
+# (log label, prompt, Ollama format, reply used when the call fails)
+_PASS_1 = ("Pass 1: structured field extraction", _EXTRACTION_PROMPT, "json", "{}")
+_PASS_2 = ("Pass 2: planner narrative observations", _NARRATIVE_PROMPT, "json", "[]")
+_FUSED_PASS = ("fused fields + observations", _FUSED_PROMPT, _FUSED_SCHEMA, "{}")
+
+
+def _run_pass(
+    ollama_client: OllamaClient,
+    vision_model: str,
+    image_b64: str,
+    vision_pass: tuple[str, str, Any, str],
+) -> str:
+    """One vision call; returns the raw reply (or the fallback on failure)."""
+    label, prompt, format, fallback = vision_pass
+    logger.info("Plat vision %s (%s)", label, vision_model)
+    try:
+        return ollama_client.chat(
+            model=vision_model,
+            messages=_vision_messages(prompt, image_b64),
+            format=format,
+        )
+    except Exception as exc:
+        logger.error("Plat vision %s failed: %s", label, exc)
+        return fallback
+
+
+async def _run_pass_async(
+    ollama_client: AsyncOllamaClient,
+    vision_model: str,
+    image_b64: str,
+    vision_pass: tuple[str, str, Any, str],
+) -> str:
+    """Awaitable twin of _run_pass."""
+    label, prompt, format, fallback = vision_pass
+    logger.info("Plat vision %s (%s)", label, vision_model)
+    try:
+        return await ollama_client.chat(
+            model=vision_model,
+            messages=_vision_messages(prompt, image_b64),
+            format=format,
+        )
+    except Exception as exc:
+        logger.error("Plat vision %s failed: %s", label, exc)
+        return fallback
+
+
+def _prepare_plat_image(image_bytes: bytes) -> tuple[str, PreparedImage | None]:
+    """
+    Shrink / re-encode the plat for the vision model and base64 it once
+    for both passes. If PIL can't read the upload, the original bytes are
+    sent as before and the model gets to decide.
+    """
+    try:
+        prepared = prepare_image(image_bytes)
+    except Exception as exc:
+        logger.warning("Could not prepare plat image, sending it as uploaded: %s", exc)
+        return base64.b64encode(image_bytes).decode("utf-8"), None
+    logger.info(
+        "Plat image prepared: %d -> %d bytes (%s %dx%d%s)",
+        prepared.original_bytes, len(prepared.data), prepared.format,
+        prepared.width, prepared.height, "" if prepared.reencoded else ", unchanged",
+    )
+    return base64.b64encode(prepared.data).decode("utf-8"), prepared
+
+
+def _assemble_result(
+    extracted_fields: dict[str, Any],
+    planner_observations: list[str],
+    submission_type: str,
+    vision_model: str,
+    mode: str,
+    vision_seconds: float,
+    prepared: PreparedImage | None = None,
+    tiling: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Build the result dict returned to callers from the parsed model output."""
+    logger.info(
+        "Plat vision (%s, %.1fs) extracted %d fields and %d planner observations",
+        mode,
+        vision_seconds,
+        sum(1 for v in extracted_fields.values() if v is not None),
+        len(planner_observations),
+    )
+
+    # ------------------------------------------------------------------
+    # Build SubmissionData from extracted fields
+    # ------------------------------------------------------------------
+    submission_data = _build_submission_data(extracted_fields, submission_type)
+
+    return {
+        "submission_data": submission_data,
+        "planner_observations": planner_observations,
+        "extracted_fields": extracted_fields,
+        "vision_model": vision_model,
+        "vision_mode": mode,
+        "vision_seconds": round(vision_seconds, 2),
+        "image_prep": prepared.as_dict() if prepared is not None else None,
+        "tiling": tiling,
+    }
+
+
 def extract_from_plat_image(
     ollama_client: OllamaClient,
     image_bytes: bytes,
     submission_type: str,
     vision_model: str = DEFAULT_VISION_MODEL,
+    mode: str = DEFAULT_PLAT_VISION_MODE,
+    tiled: bool = False,
 ) -> dict[str, Any]:
     """
-    Run the two-pass vision extraction on a plat image.
+    Run the vision extraction (fields + planner observations) on a plat image.
 
     Parameters
     ----------
@@ -416,6 +676,9 @@ def extract_from_plat_image(
     submission_type : "preliminary_plan" or "final_plat" - supplied by the API
                       caller so the rule engine knows which rules apply.
     vision_model    : Ollama model tag (default: llama3.2-vision:11b)
+    mode            : "two_pass", "concurrent" or "fused" (see PLAT_VISION_MODES)
+    tiled           : Re-read fields left null from high-resolution tiles of
+                      the sheet (plat_tiling.refine_with_tiles)
 
     Returns
     -------
@@ -424,68 +687,92 @@ def extract_from_plat_image(
         "planner_observations" : list[str]       (open-ended narrative findings)
         "extracted_fields"     : dict            (raw extraction for debug/audit)
         "vision_model"         : str             (model that was used)
+        "vision_mode"          : str             (mode that was used)
+        "vision_seconds"       : float           (wall time of the vision calls)
+        "image_prep"           : dict | None     (format/size sent, bytes saved)
+        "tiling"               : dict | None     (tiles run/skipped, fields filled)
     }
     """
-    # Encode the image once; reuse for both passes
-    image_b64 = base64.b64encode(image_bytes).decode("utf-8")
-
-    # ------------------------------------------------------------------
-    # Pass 1 - Structured JSON extraction
-    # ------------------------------------------------------------------
-    logger.info("Plat vision Pass 1: structured field extraction (%s)", vision_model)
-    try:
-        raw_extraction = ollama_client.chat(
-            model=vision_model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": _EXTRACTION_PROMPT,
-                    "images": [image_b64],
-                }
-            ],
-            format="json",
-        )
-    except Exception as exc:
-        logger.error("Pass 1 vision call failed: %s", exc)
-        raw_extraction = "{}"
-
-    extracted_fields = _parse_extracted_fields(raw_extraction)
-    logger.info(
-        "Pass 1 extracted %d fields",
-        sum(1 for v in extracted_fields.values() if v is not None),
+    _check_mode(mode)
+
+    # Prepare and encode the image once; reuse for every call
+    image_b64, prepared = _prepare_plat_image(image_bytes)
+    started = time.perf_counter()
+
+    if mode == "fused":
+        raw = _run_pass(ollama_client, vision_model, image_b64, _FUSED_PASS)
+        extracted_fields, planner_observations = _parse_fused(raw)
+    else:
+        if mode == "concurrent":
+            # OllamaClient is thread-safe (one pooled httpx.Client)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                narrative = pool.submit(_run_pass, ollama_client, vision_model, image_b64, _PASS_2)
+                raw_extraction = _run_pass(ollama_client, vision_model, image_b64, _PASS_1)
+                raw_narrative = narrative.result()
+        else:
+            raw_extraction = _run_pass(ollama_client, vision_model, image_b64, _PASS_1)
+            raw_narrative = _run_pass(ollama_client, vision_model, image_b64, _PASS_2)
+        extracted_fields = _parse_extracted_fields(raw_extraction)
+        planner_observations = _parse_observations(raw_narrative)
+
+    tiling = None
+    if tiled:
+        from .plat_tiling import refine_with_tiles
+
+        filled, tiling = refine_with_tiles(ollama_client, image_bytes, extracted_fields, vision_model)
+        extracted_fields = {**extracted_fields, **filled}
+
+    return _assemble_result(
+        extracted_fields, planner_observations, submission_type, vision_model,
+        mode, time.perf_counter() - started, prepared, tiling,
     )
 
-    # ------------------------------------------------------------------
-    # Pass 2 - Open-ended planner observations
-    # ------------------------------------------------------------------
-    logger.info("Plat vision Pass 2: planner narrative observations (%s)", vision_model)
-    try:
-        raw_narrative = ollama_client.chat(
-            model=vision_model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": _NARRATIVE_PROMPT,
-                    "images": [image_b64],
-                }
-            ],
-            format="json",
-        )
-    except Exception as exc:
-        logger.error("Pass 2 vision call failed: %s", exc)
-        raw_narrative = "[]"
-
-    planner_observations = _parse_observations(raw_narrative)
-    logger.info("Pass 2 produced %d planner observations", len(planner_observations))
 
-    # ------------------------------------------------------------------
-    # Build SubmissionData from extracted fields
-    # ------------------------------------------------------------------
-    submission_data = _build_submission_data(extracted_fields, submission_type)
+async def extract_from_plat_image_async(
+    ollama_client: AsyncOllamaClient,
+    image_bytes: bytes,
+    submission_type: str,
+    vision_model: str = DEFAULT_VISION_MODEL,
+    mode: str = DEFAULT_PLAT_VISION_MODE,
+    tiled: bool = False,
+) -> dict[str, Any]:
+    """
+    Async version of extract_from_plat_image for use inside FastAPI endpoints.
 
-    return {
-        "submission_data": submission_data,
-        "planner_observations": planner_observations,
-        "extracted_fields": extracted_fields,
-        "vision_model": vision_model,
-    }
+    Same modes and the same return shape, but each vision call is awaited
+    on the shared AsyncOllamaClient (app.state.async_ollama), so the event
+    loop keeps serving other requests during the 60-120s model time.
+    """
+    _check_mode(mode)
+
+    # Decoding / resizing / encoding a large scan takes about a second:
+    # do it in a worker thread, not on the event loop
+    image_b64, prepared = await asyncio.to_thread(_prepare_plat_image, image_bytes)
+    started = time.perf_counter()
+
+    if mode == "fused":
+        raw = await _run_pass_async(ollama_client, vision_model, image_b64, _FUSED_PASS)
+        extracted_fields, planner_observations = _parse_fused(raw)
+    else:
+        if mode == "concurrent":
+            raw_extraction, raw_narrative = await asyncio.gather(
+                _run_pass_async(ollama_client, vision_model, image_b64, _PASS_1),
+                _run_pass_async(ollama_client, vision_model, image_b64, _PASS_2),
+            )
+        else:
+            raw_extraction = await _run_pass_async(ollama_client, vision_model, image_b64, _PASS_1)
+            raw_narrative = await _run_pass_async(ollama_client, vision_model, image_b64, _PASS_2)
+        extracted_fields = _parse_extracted_fields(raw_extraction)
+        planner_observations = _parse_observations(raw_narrative)
+
+    tiling = None
+    if tiled:
+        from .plat_tiling import refine_with_tiles_async
+
+        filled, tiling = await refine_with_tiles_async(ollama_client, image_bytes, extracted_fields, vision_model)
+        extracted_fields = {**extracted_fields, **filled}
+
+    return _assemble_result(
+        extracted_fields, planner_observations, submission_type, vision_model,
+        mode, time.perf_counter() - started, prepared, tiling,
+    )
@@ -7,6 +7,8 @@ Each session lives in a dedicated folder on the VM:
     data/sessions/{session_id}/
         session.json       - compliance report + extracted fields + observations
         plat.{ext}         - original uploaded plat image or PDF
+        plat_vision.{ext}  - the plat as sent to the vision model (written by
+                             the first /chat-plat turn, reused by later ones)
 
 The session_id is a UUID generated at the time of the /check-plat-image call.
 It is returned to Blazor and stored in component state so that every subsequent
@@ -16,9 +18,10 @@ Design notes
 ------------
 - JSON-only storage for MVP.  Fields are structured for easy migration to a
   database later (all data in one dict under stable top-level keys).
-- Image is stored as a raw binary file.  The chat endpoint re-reads it and
-  re-encodes it as base64 for each vision call rather than storing base64 in
-  JSON (keeps session.json smaller and avoids double-encoding issues).
+- Image is stored as a raw binary file.  The chat endpoint prepares it for
+  the vision model once (plat_vision.{ext}) and base64-encodes that copy for
+  each vision call rather than storing base64 in JSON (keeps session.json
+  smaller and avoids double-encoding issues).
 - Directory creation uses exist_ok=True to survive restarts gracefully.
 - All errors surface as plain Python exceptions; callers decide whether to
   translate them into HTTP 404/500.
@@ -67,6 +70,15 @@ def _plat_image_path(session_id: str, ext: str) -> Path:
     return _session_dir(session_id) / f"plat{ext}"
 
 
+def _vision_image_path(session_id: str, ext: str) -> Path:
+    """Path of the prepared (vision-model-sized) image.  ext includes the dot."""
+    return _session_dir(session_id) / f"plat_vision{ext}"
+
+
+# Extensions a prepared image can have (image_prep.PreparedImage.format)
+_VISION_IMAGE_EXTS = (".jpeg", ".png", ".webp")
+
+
 def _ensure_session_dir_exists(session_id: str) -> Path:
     """Create the session directory if it does not already exist."""
     d = _session_dir(session_id)
@@ -203,6 +215,39 @@ def load_session_image(session_id: str) -> tuple[bytes, str]:
     return img_path.read_bytes(), ext
 
 
+def save_session_vision_image(session_id: str, image_bytes: bytes, ext: str) -> Path:
+    """
+    Store the plat as prepared for the vision model, so later chat turns
+    send it without decoding / resizing / re-encoding the upload again.
+
+    ext includes the leading dot and must be one of '.jpeg', '.png', '.webp'.
+    """
+    if ext not in _VISION_IMAGE_EXTS:
+        raise ValueError(f"Unsupported vision image extension {ext!r}; expected one of {_VISION_IMAGE_EXTS}")
+    img_path = _vision_image_path(session_id, ext)
+    tmp_path = img_path.with_name(img_path.name + ".tmp")
+    tmp_path.write_bytes(image_bytes)
+    tmp_path.replace(img_path)  # atomic: a concurrent turn never reads half a file
+    logger.info("Session %s: saved vision image -> %s (%d bytes)",
+                session_id, img_path, len(image_bytes))
+    return img_path
+
+
+def load_session_vision_image(session_id: str) -> Optional[tuple[bytes, str]]:
+    """
+    The prepared vision image saved by save_session_vision_image().
+
+    Returns
+    -------
+    (image_bytes, ext), or None if it has not been saved yet.
+    """
+    for ext in _VISION_IMAGE_EXTS:
+        img_path = _vision_image_path(session_id, ext)
+        if img_path.exists():
+            return img_path.read_bytes(), ext
+    return None
+
+
 def session_exists(session_id: str) -> bool:
     """Return True if a valid session exists on disk."""
     return _session_json_path(session_id).exists()
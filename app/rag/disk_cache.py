@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss counters.
+
+    Pass one in to a cached call to count just that operation (e.g. a single
+    ingest); every cache also keeps process-wide totals in `cache.stats`.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def add(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class SqliteLRU:
+    """
+    Size-bounded LRU key/value store in a single SQLite file.
+
+    - Values are raw bytes; `size` is tracked per row
+    - Reads bump `last_used`; when the total size exceeds max_bytes the
+      least recently used rows are deleted until we're back under ~90%
+    - WAL mode, so several processes (API + ingest workers) can share one file
+
+    Subclasses decide what the keys and values mean.
+    """
+
+    def __init__(self, path: str | Path, table: str, max_bytes: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "  key TEXT PRIMARY KEY,"
+            "  value BLOB NOT NULL,"
+            "  size INTEGER NOT NULL,"
+            "  last_used REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table}(last_used)")
+        self._conn.commit()
+        self._approx_bytes = self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        row = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        """Return {key: value} for the keys present (and mark them recently used)."""
+        found: Dict[str, bytes] = {}
+        if not keys:
+            return found
+
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite caps bound parameters per statement; stay well under it
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({marks})", part
+                ).fetchall()
+                found.update((k, bytes(v)) for k, v in rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                self._conn.commit()
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        rows = [(k, v, len(v), time.time()) for k, v in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._approx_bytes += sum(r[2] for r in rows)
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def put(self, key: str, value: bytes) -> None:
+        self.put_many([(key, value)])
+
+    def _evict(self) -> None:
+        """Delete least-recently-used rows until the store is under 90% of max_bytes."""
+        # Recount: other processes may have written (or evicted) since we last looked
+        total = self._total_bytes()
+        target = int(self.max_bytes * 0.9)
+        while total > target:
+            victims = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not victims:
+                break
+            doomed = []
+            for key, size in victims:
+                if total <= target:
+                    break
+                doomed.append((key,))
+                total -= size
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", doomed)
+        self._conn.commit()
+        self._approx_bytes = total
+
+
+class EmbeddingCache(SqliteLRU):
+    """
+    Persistent, content-addressed embedding cache.
+
+    Key:   (embedding_model, sha256 of the exact text that was embedded)
+    Value: the float32 vector bytes
+
+    Shared across policies and re-ingests: a revised policy whose text is
+    95% unchanged only pays Ollama for the 5% that changed, and shared
+    boilerplate paragraphs are embedded once per model.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "data/cache/embeddings.sqlite",
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        super().__init__(path, table="embeddings", max_bytes=max_bytes)
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def get_vectors(
+        self,
+        model: str,
+        texts: Sequence[str],
+        stats: Optional[CacheStats] = None,
+    ) -> List[Optional[np.ndarray]]:
+        """Cached float32 vectors for texts (None where missing), in input order."""
+        keys = [self.key(model, t) for t in texts]
+        found = self.get_many(keys)
+
+        vectors: List[Optional[np.ndarray]] = [
+            np.frombuffer(found[k], dtype="float32") if k in found else None
+            for k in keys
+        ]
+        hits = sum(v is not None for v in vectors)
+        self.stats.add(hits, len(vectors) - hits)
+        if stats is not None:
+            stats.add(hits, len(vectors) - hits)
+        return vectors
+
+    def put_vectors(self, model: str, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """Store one float32 row per text."""
+        arr = np.asarray(vectors, dtype="float32")
+        self.put_many(
+            (self.key(model, t), arr[i].tobytes()) for i, t in enumerate(texts)
+        )
+
+
+class VisionStats(CacheStats):
+    """
+    CacheStats for vision descriptions, plus model time.
+
+    seconds_spent: time this run spent waiting on the vision model
+    seconds_saved: what the persistent-cache hits cost when they were first described
+    duplicates:    repeated images (same xref or near-identical pixels) that
+                   shared another image's description instead of their own
+    bytes_original / bytes_sent: image sizes before and after prepare_image()
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.seconds_spent = 0.0
+        self.seconds_saved = 0.0
+        self.duplicates = 0
+        self.bytes_original = 0
+        self.bytes_sent = 0
+
+    def add_seconds(self, spent: float = 0.0, saved: float = 0.0) -> None:
+        with self._lock:
+            self.seconds_spent += spent
+            self.seconds_saved += saved
+
+    def add_duplicates(self, count: int) -> None:
+        with self._lock:
+            self.duplicates += count
+
+    def add_bytes(self, original: int, sent: int) -> None:
+        with self._lock:
+            self.bytes_original += original
+            self.bytes_sent += sent
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "seconds_spent": round(self.seconds_spent, 1),
+            "seconds_saved": round(self.seconds_saved, 1),
+            "duplicates": self.duplicates,
+            "bytes_original": self.bytes_original,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": self.bytes_original - self.bytes_sent,
+        }
+
+
+class VisionCache(SqliteLRU):
+    """
+    Persistent, content-addressed cache of image descriptions.
+
+    Key:   (vision_model, prompt version, sha256 of the image bytes)
+    Value: JSON {"description": ..., "seconds": ...} - seconds is how long
+           the vision model took, so hits can report the time they saved
+
+    A vision call takes 10-30 s, so re-ingesting a policy, or the county
+    logo / org chart that appears in dozens of policies, is described once
+    per model and prompt. Bump the prompt version when the prompt changes.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "data/cache/vision.sqlite",
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        super().__init__(path, table="vision", max_bytes=max_bytes)
+
+    @staticmethod
+    def key(model: str, prompt_version: str, image_bytes: bytes) -> str:
+        return f"{model}:{prompt_version}:{hashlib.sha256(image_bytes).hexdigest()}"
+
+    def get_description(
+        self,
+        model: str,
+        prompt_version: str,
+        image_bytes: bytes,
+        stats: Optional[CacheStats] = None,
+    ) -> Optional[Tuple[str, float]]:
+        """(description, seconds it originally took) or None."""
+        raw = self.get(self.key(model, prompt_version, image_bytes))
+        hit = raw is not None
+        self.stats.add(hits=int(hit), misses=int(not hit))
+        if stats is not None:
+            stats.add(hits=int(hit), misses=int(not hit))
+        if raw is None:
+            return None
+        entry = json.loads(raw.decode("utf-8"))
+        return entry["description"], float(entry.get("seconds", 0.0))
+
+    def put_description(
+        self,
+        model: str,
+        prompt_version: str,
+        image_bytes: bytes,
+        description: str,
+        seconds: float,
+    ) -> None:
+        value = json.dumps({"description": description, "seconds": round(seconds, 2)})
+        self.put(self.key(model, prompt_version, image_bytes), value.encode("utf-8"))
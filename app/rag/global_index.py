@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+from app.rag.packed import PackedFile, write_packed
+from app.rag.store import PolicyStore
+from app.rag.types import Chunk
+
+POLICY_TYPES = ("policy", "standalone_image")
+
+
+@dataclass
+class GlobalHit:
+    """One search result from the global index."""
+    score: float
+    policy_id: str
+    row: int          # row in that policy's chunk store (= its own FAISS id)
+    page: int
+
+
+class GlobalIndex:
+    """
+    One FAISS index over every ingested policy (for one embedding model).
+
+    Folder layout:
+      data/global_index/{embedding_model}/
+        index.faiss     ← IndexIDMap2(IndexFlatIP): vector -> global id
+        ids.bin         ← packed id table: global id -> (policy, row, page, type)
+
+    The id table is a handful of int arrays, so it stays small even with
+    hundreds of thousands of chunks. Filters (policy set, type, page range)
+    are evaluated on the table with NumPy and handed to FAISS as an
+    IDSelector, so a question over N policies is ONE search.
+
+    Re-ingesting a policy replaces its vectors (remove_ids + add_with_ids).
+    The table also records each policy's ingest generation (see
+    PolicyStore.ingest_generation) when its vectors were added, so
+    sync_with_store() can tell a re-ingested policy from an unchanged one.
+    """
+
+    def __init__(self, root_dir: str | Path, embedding_model: str):
+        self.embedding_model = embedding_model
+        safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", embedding_model)
+        self.dir = Path(root_dir) / safe_name
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self.index = None
+        self.policies: List[str] = []           # policy slot -> policy_id
+        self._slot: Dict[str, int] = {}
+        self.gid = np.empty(0, dtype=np.int64)  # global id per table row
+        self.policy = np.empty(0, dtype=np.int32)
+        self.row = np.empty(0, dtype=np.int32)
+        self.page = np.empty(0, dtype=np.int32)
+        self.ptype = np.empty(0, dtype=np.uint8)
+        self.next_id = 0
+        self.generations: Dict[str, list] = {}  # policy_id -> ingest generation (JSON form)
+        self._load()
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def _load(self) -> None:
+        index_path, table_path = self.dir / "index.faiss", self.dir / "ids.bin"
+        if not (index_path.exists() and table_path.exists()):
+            return
+        self.index = faiss.read_index(str(index_path))
+        table = PackedFile(table_path)
+        self.policies = list(table.meta["policies"])
+        self.next_id = int(table.meta["next_id"])
+        self.generations = dict(table.meta.get("generations", {}))
+        # Copy out of the mmap: the table is rewritten on every update
+        self.gid = np.array(table["gid"])
+        self.policy = np.array(table["policy"])
+        self.row = np.array(table["row"])
+        self.page = np.array(table["page"])
+        self.ptype = np.array(table["type"])
+        table.close()
+        self._slot = {pid: i for i, pid in enumerate(self.policies)}
+
+    def _save(self) -> None:
+        tmp = self.dir / "index.faiss.tmp"
+        faiss.write_index(self.index, str(tmp))
+        tmp.replace(self.dir / "index.faiss")
+        write_packed(
+            self.dir / "ids.bin",
+            {"gid": self.gid, "policy": self.policy, "row": self.row, "page": self.page, "type": self.ptype},
+            meta={
+                "kind": "global_ids",
+                "embedding_model": self.embedding_model,
+                "policies": self.policies,
+                "next_id": self.next_id,
+                "generations": self.generations,
+            },
+        )
+
+    # -------------------------
+    # Updates
+    # -------------------------
+
+    def policy_ids(self) -> List[str]:
+        """Policies that currently have vectors in the index."""
+        with self._lock:
+            present = np.unique(self.policy)
+            return [self.policies[i] for i in present.tolist()]
+
+    def _drop(self, policy_id: str) -> None:
+        self.generations.pop(policy_id, None)
+        slot = self._slot.get(policy_id)
+        if slot is None or self.index is None:
+            return
+        mask = self.policy == slot
+        if mask.any():
+            self.index.remove_ids(faiss.IDSelectorBatch(self.gid[mask]))
+            keep = ~mask
+            self.gid, self.policy, self.row = self.gid[keep], self.policy[keep], self.row[keep]
+            self.page, self.ptype = self.page[keep], self.ptype[keep]
+
+    def add_policy(
+        self,
+        policy_id: str,
+        vectors: np.ndarray,
+        chunks: Sequence[Chunk],
+        policy_type: str = "policy",
+        save: bool = True,
+        generation: Optional[tuple] = None,
+    ) -> None:
+        """
+        Add (or replace) a policy's vectors.
+
+        vectors must be L2-normalized, row i belonging to chunks[i] (the same
+        order as the policy's own index and chunk store). generation is the
+        store's ingest_generation() for those files; without it the next
+        sync_with_store() reloads the policy once to be sure.
+        """
+        if policy_type not in POLICY_TYPES:
+            raise ValueError(f"policy_type must be one of {POLICY_TYPES}")
+        if len(vectors) != len(chunks):
+            raise ValueError(f"{len(vectors)} vectors for {len(chunks)} chunks")
+
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        with self._lock:
+            if self.index is None:
+                self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(vectors.shape[1]))
+            elif vectors.shape[1] != self.index.d:
+                raise ValueError(
+                    f"Vector dim {vectors.shape[1]} does not match global index dim {self.index.d} "
+                    f"({self.embedding_model})"
+                )
+
+            self._drop(policy_id)
+            if generation is not None:
+                self.generations[policy_id] = _json_generation(generation)
+            if policy_id not in self._slot:
+                self._slot[policy_id] = len(self.policies)
+                self.policies.append(policy_id)
+            slot = self._slot[policy_id]
+
+            n = len(chunks)
+            gids = np.arange(self.next_id, self.next_id + n, dtype=np.int64)
+            self.next_id += n
+            self.index.add_with_ids(vectors, gids)
+
+            self.gid = np.concatenate([self.gid, gids])
+            self.policy = np.concatenate([self.policy, np.full(n, slot, dtype=np.int32)])
+            self.row = np.concatenate([self.row, np.arange(n, dtype=np.int32)])
+            self.page = np.concatenate([self.page, np.asarray([c.page for c in chunks], dtype=np.int32)])
+            self.ptype = np.concatenate([
+                self.ptype, np.full(n, POLICY_TYPES.index(policy_type), dtype=np.uint8)
+            ])
+            if save:
+                self._save()
+
+    def remove_policy(self, policy_id: str, save: bool = True) -> None:
+        with self._lock:
+            self._drop(policy_id)
+            if save and self.index is not None:
+                self._save()
+
+    # -------------------------
+    # Search
+    # -------------------------
+
+    def _mask(
+        self,
+        policy_ids: Optional[Iterable[str]],
+        types: Optional[Iterable[str]],
+        page_min: Optional[int],
+        page_max: Optional[int],
+    ) -> Optional[np.ndarray]:
+        """Boolean mask over table rows for the filters (None = no filtering)."""
+        mask = None
+
+        def both(m):
+            return m if mask is None else (mask & m)
+
+        if policy_ids is not None:
+            slots = [self._slot[p] for p in policy_ids if p in self._slot]
+            mask = both(np.isin(self.policy, np.asarray(slots, dtype=np.int32)))
+        if types is not None:
+            codes = [POLICY_TYPES.index(t) for t in types if t in POLICY_TYPES]
+            mask = both(np.isin(self.ptype, np.asarray(codes, dtype=np.uint8)))
+        if page_min is not None:
+            mask = both(self.page >= page_min)
+        if page_max is not None:
+            mask = both(self.page <= page_max)
+        return mask
+
+    def search(
+        self,
+        qvec: np.ndarray,
+        k: int,
+        policy_ids: Optional[Iterable[str]] = None,
+        types: Optional[Iterable[str]] = None,
+        page_min: Optional[int] = None,
+        page_max: Optional[int] = None,
+    ) -> List[GlobalHit]:
+        """Top-k chunks across all (matching) policies for one normalized query vector."""
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return []
+
+            mask = self._mask(policy_ids, types, page_min, page_max)
+            params = None
+            if mask is not None:
+                allowed = self.gid[mask]
+                if len(allowed) == 0:
+                    return []
+                params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed))
+
+            scores, ids = self.index.search(qvec.reshape(1, -1), k, params=params)
+
+            # gid is sorted (ids are handed out in increasing order), so
+            # searchsorted maps global ids back to table rows
+            hits: List[GlobalHit] = []
+            for score, gid in zip(scores[0].tolist(), ids[0].tolist()):
+                if gid < 0:
+                    continue
+                i = int(np.searchsorted(self.gid, gid))
+                hits.append(GlobalHit(
+                    score=float(score),
+                    policy_id=self.policies[int(self.policy[i])],
+                    row=int(self.row[i]),
+                    page=int(self.page[i]),
+                ))
+            return hits
+
+    # -------------------------
+    # Backfill
+    # -------------------------
+
+    def refresh_policy(
+        self,
+        store: PolicyStore,
+        policy_id: str,
+        policy_type: Optional[str] = None,
+        save: bool = True,
+    ) -> None:
+        """
+        (Re)load one policy's vectors from its own index.faiss.
+
+        Used for policies ingested by another process (job workers) and for
+        the startup backfill. policy_type defaults to the one in metadata.json.
+        """
+        if policy_type is None:
+            policy_type = store.read_metadata(policy_id).get("type", "policy")
+        # Taken before reading: files replaced meanwhile show up as changed next sync
+        generation = store.ingest_generation(policy_id)
+        index = store.read_faiss_index(policy_id)
+        if isinstance(index, faiss.IndexIVF):
+            index.make_direct_map()
+        vectors = index.reconstruct_n(0, index.ntotal)
+        chunks = store.read_chunks(policy_id)
+        self.add_policy(policy_id, vectors, chunks, policy_type=policy_type, save=save, generation=generation)
+
+    def sync_with_store(self, store: PolicyStore) -> Dict[str, int]:
+        """
+        Make the global index match data/policies for this embedding model.
+
+        Adds policies ingested before the global index existed (vectors are
+        reconstructed from their own index.faiss), reloads policies that
+        were re-ingested since their vectors were added (ingest generation
+        changed - e.g. by a job that finished while no API process was
+        running) and drops policies whose folders are gone. Returns counts
+        of added/refreshed/removed policies.
+        """
+        on_disk: Dict[str, str] = {}
+        for policy_id in store.list_indexed_policies():
+            try:
+                meta = store.read_metadata(policy_id)
+            except FileNotFoundError:
+                continue
+            model = meta.get("embedding_model", "nomic-embed-text:latest")
+            if model == self.embedding_model:
+                on_disk[policy_id] = meta.get("type", "policy")
+
+        with self._lock:
+            present = set(self.policy_ids())
+            removed = [p for p in present if p not in on_disk]
+            for policy_id in removed:
+                self._drop(policy_id)
+
+            added = refreshed = 0
+            for policy_id, policy_type in on_disk.items():
+                if policy_id in present and self.generations.get(policy_id) == _json_generation(
+                    store.ingest_generation(policy_id)
+                ):
+                    continue
+                try:
+                    self.refresh_policy(store, policy_id, policy_type=policy_type, save=False)
+                    if policy_id in present:
+                        refreshed += 1
+                    else:
+                        added += 1
+                except Exception as e:
+                    print(f"[global-index] Skipping {policy_id}: {e}")
+
+            if (added or refreshed or removed) and self.index is not None:
+                self._save()
+        return {"added": added, "refreshed": refreshed, "removed": len(removed)}
+
+
+def _json_generation(generation: tuple) -> list:
+    """An ingest generation as it round-trips through the JSON table header."""
+    return [list(part) if part is not None else None for part in generation]
+
+
+class GlobalIndexSet:
+    """
+    Global indexes, one per embedding model (vectors from different models
+    can't share an index). Loaded lazily and kept for the process lifetime.
+    """
+
+    def __init__(self, root_dir: str | Path = "data/global_index"):
+        self.root = Path(root_dir)
+        self._indexes: Dict[str, GlobalIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, embedding_model: str) -> GlobalIndex:
+        with self._lock:
+            gi = self._indexes.get(embedding_model)
+            if gi is None:
+                gi = GlobalIndex(self.root, embedding_model)
+                self._indexes[embedding_model] = gi
+            return gi
@@ -0,0 +1,189 @@
+"""
+app/rag/image_prep.py
+
+Make an image as small as possible before it is sent to a vision model -
+without making it smaller than the model can actually see.
+
+Images used to be decoded with PIL and re-encoded as lossless PNG (often
+several times the size of the source JPEG), then base64-encoded at full
+resolution into the request. But llama3.2-vision never looks at more than
+1120 x 1120 pixels (up to 4 tiles of 560 x 560): everything above that is
+uploaded, decoded and resized away by Ollama on every call.
+
+prepare_image() therefore:
+
+1. Passes the bytes through UNTOUCHED when they already are a format the
+   model reads (JPEG / PNG) and no side is larger than max_side - no
+   decode, no re-encode.
+2. Otherwise decodes (JPEG with draft mode: the decoder itself scales
+   down by 2/4/8, which is much faster than decoding full size), shrinks
+   to fit max_side x max_side and encodes every candidate format - JPEG
+   at a set quality and lossless PNG by default. The smallest one wins;
+   line-art scans are usually smallest as PNG, photos as JPEG.
+3. Reports what it sent: format, size and bytes saved (PreparedImage).
+
+    prepared = prepare_image(image_bytes)
+    image_b64 = base64.b64encode(prepared.data).decode("utf-8")
+
+Ollama decodes JPEG and PNG on every version. Add "WEBP" to the encodings
+if yours decodes WebP too; it is often the smallest of the three.
+
+Python concepts used:
+- dataclasses for the result
+- PIL's lazy Image.open (reads the header only: format and size are
+  known before any pixel is decoded)
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Any, Dict, Sequence
+
+from PIL import Image
+
+# Largest side llama3.2-vision uses (2 x 560-pixel tiles)
+VISION_MAX_SIDE = 1120
+
+# Quality for lossy candidates (JPEG / WebP)
+IMAGE_QUALITY = 85
+
+# Candidate encodings when an image has to be re-encoded
+DEFAULT_ENCODINGS = ("JPEG", "PNG")
+
+# Formats sent as they are (if small enough)
+_PASSTHROUGH_FORMATS = frozenset({"JPEG", "PNG"})
+
+# PIL format name -> what the encoded bytes are (for logs / API responses)
+_FORMAT_NAMES = {"JPEG": "jpeg", "PNG": "png", "WEBP": "webp"}
+
+
+@dataclass
+class PreparedImage:
+    """Result of prepare_image()."""
+    data: bytes              # bytes to send to the vision model
+    format: str              # "jpeg", "png" or "webp"
+    width: int
+    height: int
+    original_bytes: int      # size of the input
+    reencoded: bool          # False = input passed through untouched
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "format": self.format,
+            "width": self.width,
+            "height": self.height,
+            "original_bytes": self.original_bytes,
+            "sent_bytes": len(self.data),
+            "bytes_saved": self.bytes_saved,
+            "reencoded": self.reencoded,
+        }
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB/L copy of the image; transparency is composited onto white."""
+    if image.mode in ("RGB", "L"):
+        return image
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    if image.mode in ("1", "I;16", "I", "F"):
+        return image.convert("L")
+    return image.convert("RGB")
+
+
+def _encode(image: Image.Image, encoding: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if encoding == "PNG":
+        image.save(buffer, format="PNG", optimize=True)
+    elif encoding == "JPEG":
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    else:
+        image.save(buffer, format=encoding, quality=quality)
+    return buffer.getvalue()
+
+
+def prepare_image(
+    image_bytes: bytes,
+    max_side: int = VISION_MAX_SIDE,
+    quality: int = IMAGE_QUALITY,
+    encodings: Sequence[str] = DEFAULT_ENCODINGS,
+) -> PreparedImage:
+    """
+    Smallest encoding of an image at the vision model's input resolution.
+
+    Args:
+        image_bytes: Image in any format PIL reads (JPEG, PNG, TIFF, BMP, ...)
+        max_side: Longest side sent to the model; larger images are shrunk
+                  (aspect ratio kept), smaller ones are never enlarged
+        quality: Quality for lossy encodings (JPEG / WebP)
+        encodings: PIL format names to try when re-encoding
+
+    Returns:
+        PreparedImage (data is image_bytes itself when passed through)
+
+    Raises:
+        PIL.UnidentifiedImageError / OSError if the bytes are not an image
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+
+    # 1. Already a model format and small enough: send as is
+    if image.format in _PASSTHROUGH_FORMATS and max(width, height) <= max_side:
+        return PreparedImage(
+            data=image_bytes,
+            format=_FORMAT_NAMES[image.format],
+            width=width,
+            height=height,
+            original_bytes=len(image_bytes),
+            reencoded=False,
+        )
+
+    # 2. Decode (JPEG: straight to about the target size) and shrink
+    if image.format == "JPEG":
+        scale = min(1.0, max_side / max(width, height))
+        image.draft("RGB", (max(1, round(width * scale)), max(1, round(height * scale))))
+    return encode_for_vision(image, max_side, quality, encodings, original_bytes=len(image_bytes))
+
+
+def encode_for_vision(
+    image: Image.Image,
+    max_side: int = VISION_MAX_SIDE,
+    quality: int = IMAGE_QUALITY,
+    encodings: Sequence[str] = DEFAULT_ENCODINGS,
+    original_bytes: int = 0,
+) -> PreparedImage:
+    """
+    Shrink an already opened (or cropped) PIL image to fit max_side and
+    encode it in the smallest of `encodings` - step 2 of prepare_image(),
+    for callers that cut several views out of one decoded image (plat tiles).
+
+    original_bytes is only reported back (0 = not known).
+    """
+    width, height = image.size
+    scale = min(1.0, max_side / max(width, height))
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    image = _flatten(image)
+    if image.size != target:
+        image = image.resize(target, Image.LANCZOS)
+
+    best_data, best_encoding = b"", ""
+    for encoding in encodings:
+        data = _encode(image, encoding, quality)
+        if not best_data or len(data) < len(best_data):
+            best_data, best_encoding = data, encoding
+
+    return PreparedImage(
+        data=best_data,
+        format=_FORMAT_NAMES[best_encoding],
+        width=image.size[0],
+        height=image.size[1],
+        original_bytes=original_bytes or len(best_data),
+        reencoded=True,
+    )
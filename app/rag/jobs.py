@@ -0,0 +1,519 @@
+"""
+Ingestion Job Queue Module
+
+Purpose: Run long ingests in the background instead of inside the HTTP request
+
+A large PDF with vision enabled can take many minutes; run inside the
+request it hits proxy timeouts and ties up an API worker the whole time.
+Instead:
+
+    POST /ingest                     → enqueue a job, return its job_id at once
+    worker process                   → claims the job, runs the pipeline,
+                                       reports progress per stage
+    GET /jobs/{job_id}               → status, per-stage progress, chunks/s, ETA
+
+Pieces:
+- JobQueue: persistent queue in one SQLite file (WAL mode, so the API and
+  any number of worker processes can share it). Claiming a job is a single
+  IMMEDIATE transaction, so two workers never get the same job.
+- One job per target at a time: jobs writing the same files (the same
+  policy_id, the same ordinance jurisdiction) are never queued or run
+  together - enqueue() raises JobConflict while one is queued or running,
+  and claim() skips a target that is already running.
+- JobWorkerPool: N worker processes started by the API (INGEST_WORKERS),
+  or run them separately with `python -m app.rag.jobs --workers 2`.
+- JOB_HANDLERS: what each job kind runs ("policy_ingest", "ordinance_ingest").
+
+Jobs left "running" by a worker that died (crash, restart) are put back in
+the queue on startup; policy ingests then resume from their checkpoint.
+
+Progress callbacks have the signature progress(stage, done, total, unit);
+the pipelines call them and the queue turns them into rates and ETAs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+ProgressFn = Callable[..., None]
+
+
+class JobConflict(Exception):
+    """enqueue(): a job for the same target is already queued or running (job_id)."""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"Job {job_id} for the same target is already queued or running")
+        self.job_id = job_id
+
+
+def job_target(kind: str, params: Dict[str, Any]) -> str:
+    """What a job writes; two jobs with the same target never run at once."""
+    if kind == "policy_ingest":
+        return f"policy:{params['policy_id']}"
+    if kind == "ordinance_ingest":
+        return f"ordinance:{params['jurisdiction']}"
+    return kind
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """Persistent SQLite job queue (see module docstring)."""
+
+    def __init__(self, path: str | Path = "data/jobs/jobs.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly where needed
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "  id TEXT PRIMARY KEY,"
+            "  kind TEXT NOT NULL,"
+            "  params TEXT NOT NULL,"
+            "  status TEXT NOT NULL,"
+            "  created_at REAL NOT NULL,"
+            "  started_at REAL,"
+            "  finished_at REAL,"
+            "  worker_pid INTEGER,"
+            "  attempts INTEGER NOT NULL DEFAULT 0,"
+            "  progress TEXT NOT NULL DEFAULT '{}',"
+            "  result TEXT,"
+            "  error TEXT,"
+            "  target TEXT"
+            ")"
+        )
+        self._add_target_column()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_target_status ON jobs(target, status)")
+
+    def _add_target_column(self) -> None:
+        """Queues created before job targets existed: add the column and fill it for open jobs."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "target" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN target TEXT")
+        rows = self._conn.execute(
+            "SELECT id, kind, params FROM jobs WHERE target IS NULL AND status IN ('queued', 'running')"
+        ).fetchall()
+        for row in rows:
+            self._conn.execute(
+                "UPDATE jobs SET target = ? WHERE id = ?",
+                (job_target(row["kind"], json.loads(row["params"])), row["id"]),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------
+    # Producer side (API)
+    # -------------------------
+
+    def enqueue(self, kind: str, params: Dict[str, Any]) -> str:
+        """
+        Queue a job and return its job_id.
+
+        Raises JobConflict if a job for the same target (see job_target)
+        is already queued or running; checked and inserted in one
+        transaction, so two API processes can't both get theirs in.
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind {kind!r}; expected one of {tuple(JOB_HANDLERS)}")
+        job_id = f"job-{uuid.uuid4().hex[:12]}"
+        target = job_target(kind, params)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                active = self._active(target)
+                if active is None:
+                    self._conn.execute(
+                        "INSERT INTO jobs (id, kind, params, status, created_at, target) "
+                        "VALUES (?, ?, ?, 'queued', ?, ?)",
+                        (job_id, kind, json.dumps(params), time.time(), target),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if active is not None:
+            raise JobConflict(active)
+        return job_id
+
+    def active_job(self, kind: str, params: Dict[str, Any]) -> Optional[str]:
+        """job_id of a queued or running job for the same target, or None."""
+        with self._lock:
+            return self._active(job_target(kind, params))
+
+    def _active(self, target: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT id FROM jobs WHERE target = ? AND status IN ('queued', 'running') "
+            "ORDER BY created_at LIMIT 1",
+            (target,),
+        ).fetchone()
+        return None if row is None else row["id"]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status for the API (None if unknown), with rates and ETA computed."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else _describe(row)
+
+    def recent(self, limit: int = 20, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent jobs first."""
+        sql, args = "SELECT * FROM jobs", []
+        if status is not None:
+            sql += " WHERE status = ?"
+            args.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [_describe(r) for r in rows]
+
+    def finished_since(self, since: float) -> List[Dict[str, Any]]:
+        """Jobs that finished (either way) after `since`, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE finished_at > ? ORDER BY finished_at", (since,)
+            ).fetchall()
+        return [_describe(r) for r in rows]
+
+    def requeue_orphans(self) -> int:
+        """Put 'running' jobs whose worker process is gone back in the queue."""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+            orphans = [r["id"] for r in rows if not _pid_alive(r["worker_pid"])]
+            for job_id in orphans:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ? AND status = 'running'",
+                    (job_id,),
+                )
+        return len(orphans)
+
+    # -------------------------
+    # Worker side
+    # -------------------------
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the oldest queued job whose target is not already
+        running (None if there is none).
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, kind, params FROM jobs WHERE status = 'queued' AND (target IS NULL OR "
+                    "target NOT IN (SELECT target FROM jobs WHERE status = 'running' AND target IS NOT NULL)) "
+                    "ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ?, "
+                        "attempts = attempts + 1, progress = '{}' WHERE id = ?",
+                        (time.time(), os.getpid(), row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"job_id": row["id"], "kind": row["kind"], "params": json.loads(row["params"])}
+
+    def reporter(self, job_id: str) -> ProgressFn:
+        """
+        Progress callback for one job: progress(stage, done, total=None, unit="items").
+
+        Stages may overlap (the ingest pipeline extracts, embeds and
+        describes images as one stream); a stage is finished once done
+        reaches total, and "stage" is the most recently reported unfinished
+        one. Writes are throttled (at most ~4/s per job) except when a
+        stage starts or completes.
+        """
+        state: Dict[str, Any] = {"stages": {}, "stage": None}
+        last_write = [0.0]
+
+        def progress(stage: str, done: int, total: Optional[int] = None, unit: str = "items") -> None:
+            now = time.time()
+            stages = state["stages"]
+            entry = stages.get(stage)
+            if entry is None:
+                entry = stages[stage] = {"started_at": now, "unit": unit, "finished": False}
+                last_write[0] = 0.0
+            complete = total is not None and done >= total
+            entry.update(done=done, total=total, updated_at=now, finished=complete)
+            if not complete:
+                state["stage"] = stage
+            elif state["stage"] == stage:
+                state["stage"] = next((n for n, e in stages.items() if not e["finished"]), None)
+            if complete or now - last_write[0] >= 0.25:
+                last_write[0] = now
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(state), job_id)
+                    )
+
+        return progress
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            progress = json.loads(row["progress"]) if row else {}
+            for entry in progress.get("stages", {}).values():
+                entry["finished"] = True
+            self._conn.execute(
+                "UPDATE jobs SET status = 'succeeded', finished_at = ?, progress = ?, result = ? WHERE id = ?",
+                (time.time(), json.dumps(progress), json.dumps(result, default=str), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                (time.time(), error, job_id),
+            )
+
+
+def _describe(row: sqlite3.Row) -> Dict[str, Any]:
+    """Row -> API dict. Per stage: elapsed, rate (unit/s) and ETA; job-level chunks/s and ETA."""
+    progress = json.loads(row["progress"] or "{}")
+    now = time.time()
+    stages: Dict[str, Any] = {}
+    chunks_per_s = None
+    for name, entry in progress.get("stages", {}).items():
+        end = entry["updated_at"] if entry.get("finished") or row["status"] != "running" else now
+        elapsed = max(end - entry["started_at"], 0.0)
+        # Stages that finish within a few ms (e.g. chunking) have no meaningful rate
+        rate = entry["done"] / elapsed if entry["done"] and elapsed >= 0.01 else None
+        eta = None
+        if not entry.get("finished") and rate and entry.get("total") is not None:
+            eta = round(max(entry["total"] - entry["done"], 0) / rate, 1)
+        stages[name] = {
+            "done": entry["done"],
+            "total": entry.get("total"),
+            "unit": entry["unit"],
+            "finished": bool(entry.get("finished")),
+            "elapsed_s": round(elapsed, 2),
+            "rate_per_s": round(rate, 2) if rate else None,
+            "eta_s": eta,
+        }
+        if name == "embed" and rate:
+            chunks_per_s = round(rate, 2)
+
+    current = progress.get("stage") if row["status"] == "running" else None
+    return {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "params": json.loads(row["params"]),
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "attempts": row["attempts"],
+        "stage": current,
+        "stages": stages,
+        "chunks_per_s": chunks_per_s,
+        # ETA of the running stage (later stages' sizes aren't known yet)
+        "eta_s": stages[current]["eta_s"] if current in stages else None,
+        "result": json.loads(row["result"]) if row["result"] else None,
+        "error": row["error"],
+    }
+
+
+# =============================================================================
+# JOB HANDLERS (run inside worker processes)
+# =============================================================================
+
+class _WorkerContext:
+    """Clients a worker process creates once and reuses for every job."""
+
+    def __init__(self) -> None:
+        from app.rag.disk_cache import EmbeddingCache, VisionCache
+        from app.rag.ollama_client import OllamaClient
+        from app.rag.store import PolicyStore
+
+        self.embedding_cache = EmbeddingCache(
+            path=os.getenv("EMBED_CACHE_PATH", "data/cache/embeddings.sqlite"),
+            max_bytes=int(os.getenv("EMBED_CACHE_MAX_MB", "512")) * 1024 * 1024,
+        )
+        self.vision_cache = VisionCache(
+            path=os.getenv("VISION_CACHE_PATH", "data/cache/vision.sqlite"),
+            max_bytes=int(os.getenv("VISION_CACHE_MAX_MB", "64")) * 1024 * 1024,
+        )
+        self.ollama = OllamaClient(
+            base_url="http://localhost:11434",
+            max_connections=16,
+            max_keepalive_connections=8,
+            embedding_cache=self.embedding_cache,
+        )
+        self.store = PolicyStore(root_dir="data/policies")
+
+    def close(self) -> None:
+        self.ollama.close()
+        self.embedding_cache.close()
+        self.vision_cache.close()
+
+
+def _run_policy_ingest(ctx: _WorkerContext, params: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from app.rag.pipelines.ingestion_pipeline import ingest_policy_with_vision
+
+    # The global (/ask-all) index is only written by the API process, which
+    # picks up finished jobs (see JobQueue.finished_since), so two processes
+    # never write it at once.
+    return ingest_policy_with_vision(
+        store=ctx.store,
+        ollama=ctx.ollama,
+        global_index=None,
+        vision_cache=ctx.vision_cache,
+        progress=progress,
+        **params,
+    )
+
+
+def _run_ordinance_ingest(ctx: _WorkerContext, params: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from app.rag.departments.ordinance_rag.core.ingest import ingest_jurisdiction
+
+    result = ingest_jurisdiction(
+        jurisdiction_key=params["jurisdiction"],
+        ollama_client=ctx.ollama,
+        force_reindex=params.get("force_reindex", False),
+        progress=progress,
+    )
+    if result.get("status") == "error":
+        raise RuntimeError(result.get("message", "Ordinance ingestion failed"))
+    return result
+
+
+JOB_HANDLERS: Dict[str, Callable[[_WorkerContext, Dict[str, Any], ProgressFn], Dict[str, Any]]] = {
+    "policy_ingest": _run_policy_ingest,
+    "ordinance_ingest": _run_ordinance_ingest,
+}
+
+
+# =============================================================================
+# WORKER PROCESSES
+# =============================================================================
+
+def run_worker(queue_path: str, poll_s: float = 1.0, stop: Optional[Any] = None) -> None:
+    """Worker loop: claim a job, run it, record the result; sleep when idle."""
+    queue = JobQueue(queue_path)
+    ctx = _WorkerContext()
+    parent = os.getppid()
+    print(f"[jobs] Worker {os.getpid()} started")
+    try:
+        while stop is None or not stop.is_set():
+            # Started by an API process that has since died: don't linger
+            if stop is not None and os.getppid() != parent:
+                break
+            job = queue.claim()
+            if job is None:
+                if stop is not None:
+                    stop.wait(poll_s)
+                else:
+                    time.sleep(poll_s)
+                continue
+
+            job_id = job["job_id"]
+            print(f"[jobs] Worker {os.getpid()} running {job_id} ({job['kind']})")
+            try:
+                result = JOB_HANDLERS[job["kind"]](ctx, job["params"], queue.reporter(job_id))
+                queue.finish(job_id, result)
+                print(f"[jobs] {job_id} succeeded")
+            except Exception as e:
+                traceback.print_exc()
+                queue.fail(job_id, f"{type(e).__name__}: {e}")
+                print(f"[jobs] {job_id} failed: {e}")
+    finally:
+        from app.rag.pdf_extract import shutdown_pool  # page-extraction workers, if any were started
+
+        shutdown_pool()
+        ctx.close()
+        queue.close()
+
+
+class JobWorkerPool:
+    """
+    Starts `workers` worker processes for a queue file.
+
+    Processes are spawned (not forked), so they don't inherit the API's
+    open sockets, SQLite connections or FAISS state. stop() lets idle
+    workers exit and terminates busy ones after `grace_s`; their jobs are
+    requeued on the next start and policy ingests resume from checkpoint.
+    """
+
+    def __init__(self, queue_path: str | Path, workers: int = 1, poll_s: float = 1.0):
+        self.queue_path = str(queue_path)
+        self.workers = workers
+        self.poll_s = poll_s
+        self._ctx = mp.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._procs: List[Any] = []
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            # Not daemonic: workers start their own process pools for page extraction
+            proc = self._ctx.Process(
+                target=run_worker,
+                args=(self.queue_path, self.poll_s, self._stop),
+            )
+            proc.start()
+            self._procs.append(proc)
+
+    def stop(self, grace_s: float = 5.0) -> None:
+        self._stop.set()
+        deadline = time.monotonic() + grace_s
+        for proc in self._procs:
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        self._procs.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "alive": sum(p.is_alive() for p in self._procs)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ingestion job workers outside the API process")
+    parser.add_argument("--queue", default=os.getenv("JOB_QUEUE_PATH", "data/jobs/jobs.sqlite"))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between queue checks when idle")
+    args = parser.parse_args()
+
+    JobQueue(args.queue).requeue_orphans()
+    if args.workers == 1:
+        run_worker(args.queue, args.poll)
+    else:
+        pool = JobWorkerPool(args.queue, workers=args.workers, poll_s=args.poll)
+        pool.start()
+        try:
+            for proc in pool._procs:
+                proc.join()
+        except KeyboardInterrupt:
+            pool.stop()
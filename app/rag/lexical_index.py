@@ -0,0 +1,213 @@
+"""
+Lexical Index Module
+
+Purpose: Exact-term (BM25) search next to the vector index
+
+Vector search is great at meaning but bad at exact strings: "Sec. 2303",
+"ZO-14.2" or a policy code number embed like any other short text. This
+is a classic inverted index over the same rows as index.faiss, scored
+with BM25, so those references are found verbatim.
+
+On disk (lexical.bin, a packed columnar file - see app.rag.packed):
+
+    term_blob / term_offsets   sorted vocabulary (UTF-8)
+    post_offsets     int64     postings for term t = post_*[off[t]:off[t+1]]
+    post_docs        uint32    row ids (= FAISS ids), ascending
+    post_tf          uint16    term frequency in that row
+    doc_len          uint32    tokens per row
+
+Common English words ("the", "is", "what", ...) are left out of the index
+and the query: they occur in nearly every chunk, so they only let an
+off-topic question match everything.
+
+At query time the file is memory-mapped; a lookup is a binary search over
+the vocabulary plus one contiguous postings slice per query term.
+
+fuse_rrf() merges the lexical and vector rankings (reciprocal-rank fusion).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.rag.packed import PackedFile, write_packed
+
+FORMAT_VERSION = 2  # 2: stopwords no longer indexed
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal-rank fusion constant (60 is the value from the original paper)
+RRF_K = 60
+
+# Words, numbers and codes like "2303", "14-12.3", "zo-14.2"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+# Function and question words dropped by tokenize(). "no"/"not"/"nor" are
+# kept: "No. 7" and negations are meaningful in ordinance text.
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself of
+off on once only or other our ours ourselves out over own same she should so
+some such than that the their theirs them themselves then there these they
+this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase tokens without STOPWORDS; compound codes are kept whole AND
+    split into parts, so "ZO-14.2" matches a query for "ZO-14.2" as well
+    as "14.2" or "zo".
+    """
+    tokens: List[str] = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        parts = [tok] if tok.isalnum() else [tok, *re.split(r"[.\-/]", tok)]
+        tokens.extend(t for t in parts if t not in STOPWORDS)
+    return tokens
+
+
+def build_lexical_index(path: str | Path, texts: Sequence[str]) -> Path:
+    """Build lexical.bin for texts (row i = FAISS id i)."""
+    postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    doc_len = np.zeros(len(texts), dtype=np.uint32)
+
+    for row, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        doc_len[row] = sum(counts.values())
+        for term, tf in counts.items():
+            postings[term].append((row, tf))
+
+    terms = sorted(postings)
+    post_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    if terms:
+        np.cumsum([len(postings[t]) for t in terms], out=post_offsets[1:])
+
+    total = int(post_offsets[-1])
+    post_docs = np.empty(total, dtype=np.uint32)
+    post_tf = np.empty(total, dtype=np.uint16)
+    for i, term in enumerate(terms):
+        start, end = post_offsets[i], post_offsets[i + 1]
+        rows, tfs = zip(*postings[term])
+        post_docs[start:end] = rows
+        post_tf[start:end] = np.minimum(tfs, np.iinfo(np.uint16).max)
+
+    encoded = [t.encode("utf-8") for t in terms]
+    term_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=term_offsets[1:])
+
+    return write_packed(
+        path,
+        {
+            "term_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "term_offsets": term_offsets,
+            "post_offsets": post_offsets,
+            "post_docs": post_docs,
+            "post_tf": post_tf,
+            "doc_len": doc_len,
+        },
+        meta={
+            "kind": "lexical",
+            "version": FORMAT_VERSION,
+            "docs": len(texts),
+            "terms": len(terms),
+            "avgdl": float(doc_len.mean()) if len(texts) else 0.0,
+        },
+    )
+
+
+class LexicalIndex:
+    """Read-only, mmap-backed BM25 index (see module docstring for layout)."""
+
+    def __init__(self, path: str | Path):
+        self._file = PackedFile(path)
+        self._terms = self._file["term_blob"]
+        self._term_off = self._file["term_offsets"]
+        self._post_off = self._file["post_offsets"]
+        self._docs = self._file["post_docs"]
+        self._tf = self._file["post_tf"]
+        self._doc_len = self._file["doc_len"]
+        self.n_docs = int(self._file.meta["docs"])
+        self.n_terms = int(self._file.meta["terms"])
+        self.avgdl = float(self._file.meta["avgdl"]) or 1.0
+
+    @property
+    def nbytes(self) -> int:
+        return self._file.nbytes
+
+    def _term(self, i: int) -> bytes:
+        return self._terms[self._term_off[i]:self._term_off[i + 1]].tobytes()
+
+    def _find(self, term: str) -> Optional[int]:
+        """Binary search the sorted vocabulary (UTF-8 byte order = Python sort order)."""
+        target = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.n_terms and self._term(lo) == target else None
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 top-k for the query.
+
+        Returns (scores, rows), best first; only rows containing at least
+        one query term are returned, so there may be fewer than k.
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        touched = False
+
+        for term in set(tokenize(query)):
+            t = self._find(term)
+            if t is None:
+                continue
+            start, end = int(self._post_off[t]), int(self._post_off[t + 1])
+            docs = self._docs[start:end]
+            tf = self._tf[start:end].astype(np.float32)
+            df = end - start
+
+            idf = math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_len[docs] / self.avgdl)
+            # Postings hold each row at most once per term, so plain fancy-index += is safe
+            scores[docs] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+            touched = True
+
+        if not touched:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        order = hits[np.argsort(-scores[hits], kind="stable")]
+        return scores[order], order.astype(np.int64)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def fuse_rrf(rankings: Sequence[Sequence[int]], k: int, rrf_k: int = RRF_K) -> List[Tuple[int, float]]:
+    """
+    Reciprocal-rank fusion: score(row) = sum over rankings of 1 / (rrf_k + rank).
+
+    Rankings are row-id lists, best first. Returns the top k (row, score) pairs.
+    Rank-based, so BM25 and cosine scores never need to be put on one scale.
+    """
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[int(row)] += 1.0 / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:k]
@@ -1,6 +1,138 @@
 from __future__ import annotations
 
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Sequence
+
 import httpx
+import numpy as np
+
+from app.rag.disk_cache import CacheStats, EmbeddingCache
+
+try:  # HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+# -------------------------
+# Shared request/response helpers (used by both sync and async clients)
+# -------------------------
+
+def _limits(max_connections: int, max_keepalive_connections: int, keepalive_expiry_s: float) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry_s,
+    )
+
+
+def _parse_embedding(resp: httpx.Response) -> list[float]:
+    if resp.status_code >= 400:
+        # Include Ollama's message to make failures actionable
+        raise RuntimeError(f"Ollama embeddings failed ({resp.status_code}): {resp.text}")
+
+    data = resp.json()
+    emb = data.get("embedding")
+    if not isinstance(emb, list) or not emb:
+        raise RuntimeError(f"Ollama embeddings returned unexpected payload: {data}")
+
+    return emb
+
+
+def _batch_endpoint_missing(resp: httpx.Response) -> bool:
+    """True when /api/embed does not exist (Ollama < 0.3), as opposed to 'model not found'."""
+    return resp.status_code == 404 and "model" not in resp.text.lower()
+
+
+def _parse_batch_embeddings(resp: httpx.Response, expected: int) -> np.ndarray:
+    if resp.status_code >= 400:
+        raise RuntimeError(f"Ollama batch embeddings failed ({resp.status_code}): {resp.text}")
+
+    embs = resp.json().get("embeddings")
+    if not isinstance(embs, list) or len(embs) != expected or not all(embs):
+        raise RuntimeError(
+            f"Ollama batch embeddings returned unexpected payload "
+            f"({len(embs) if isinstance(embs, list) else type(embs).__name__} "
+            f"vectors for {expected} inputs)"
+        )
+    return np.asarray(embs, dtype="float32")
+
+
+def _chat_payload(model: str, messages: list[dict], format: str | dict | None, stream: bool) -> dict:
+    payload = {"model": model, "messages": messages, "stream": stream}
+    if format:
+        payload["format"] = format
+    return payload
+
+
+def _parse_chat(resp: httpx.Response) -> str:
+    if resp.status_code >= 400:
+        raise RuntimeError(f"Ollama chat failed ({resp.status_code}): {resp.text}")
+
+    data = resp.json()
+    return data["message"]["content"]
+
+
+def _parse_stream_line(line: str) -> tuple[str, bool]:
+    """Decode one NDJSON line from a streaming /api/chat response -> (token, done)."""
+    data = json.loads(line)
+    if data.get("error"):
+        raise RuntimeError(f"Ollama chat stream failed: {data['error']}")
+    return data.get("message", {}).get("content", ""), bool(data.get("done"))
+
+
+class _MatrixBuilder:
+    """Fills a (n, dim) float32 matrix batch by batch; dim is learned from the first batch."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.out: np.ndarray | None = None
+
+    def put(self, start: int, rows: np.ndarray) -> None:
+        if self.out is None:
+            self.out = np.empty((self.n, rows.shape[1]), dtype="float32")
+        elif rows.shape[1] != self.out.shape[1]:
+            raise RuntimeError(
+                f"Ollama embeddings changed dimension mid-call "
+                f"({self.out.shape[1]} -> {rows.shape[1]})"
+            )
+        self.out[start:start + len(rows)] = rows
+
+
+def _cache_lookup(
+    cache: EmbeddingCache | None,
+    model: str,
+    texts: Sequence[str],
+    stats: CacheStats | None,
+) -> tuple[list[np.ndarray | None], list[int]]:
+    """Return (cached vectors or None per text, indices that still need embedding)."""
+    if cache is None:
+        return [None] * len(texts), list(range(len(texts)))
+    cached = cache.get_vectors(model, texts, stats=stats)
+    return cached, [i for i, v in enumerate(cached) if v is None]
+
+
+def _merge_cached(cached: list[np.ndarray | None], missing: list[int], fresh: np.ndarray) -> np.ndarray:
+    """Combine cache hits and freshly embedded rows into one (n, dim) float32 matrix."""
+    if not missing:
+        return np.ascontiguousarray(np.vstack(cached), dtype="float32")
+    if len(missing) == len(cached):
+        return fresh
+
+    out = np.empty((len(cached), fresh.shape[1]), dtype="float32")
+    out[missing] = fresh
+    for i, vec in enumerate(cached):
+        if vec is not None:
+            if vec.shape[0] != out.shape[1]:
+                raise RuntimeError(
+                    f"Cached embedding dimension {vec.shape[0]} does not match "
+                    f"model output {out.shape[1]}"
+                )
+            out[i] = vec
+    return out
 
 
 class OllamaClient:
@@ -8,50 +140,307 @@ class OllamaClient:
     Minimal HTTP client for Ollama's local API.
 
     We keep this small and explicit so behavior is auditable.
+
+    The client owns one long-lived, pooled httpx.Client so repeated calls
+    (e.g. embedding every chunk of a policy) reuse keep-alive connections
+    instead of paying TCP setup/teardown per request. Call close() (or use
+    the client as a context manager) when the app shuts down.
+
+    If an EmbeddingCache is given, embed()/embed_many() return cached
+    vectors for (model, text) pairs seen before and only send the misses
+    to Ollama.
     """
 
-    def __init__(self, base_url: str = "http://localhost:11434", timeout_s: float = 120.0):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        timeout_s: float = 120.0,
+        max_connections: int = 16,
+        max_keepalive_connections: int = 8,
+        keepalive_expiry_s: float = 60.0,
+        http2: bool | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout_s
+        self.embedding_cache = embedding_cache
+
+        # HTTP/2 is used only when requested (or by default) AND h2 is installed.
+        # Ollama itself speaks HTTP/1.1 on plain http://, so this mostly matters
+        # when it sits behind a TLS reverse proxy.
+        self.http2 = _HTTP2_AVAILABLE if http2 is None else (http2 and _HTTP2_AVAILABLE)
+
+        # None = not probed yet; False = server predates /api/embed (Ollama < 0.3)
+        self._batch_embed_supported: bool | None = None
 
-    def embed(self, model: str, text: str) -> list[float]:
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=_limits(max_connections, max_keepalive_connections, keepalive_expiry_s),
+            http2=self.http2,
+        )
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    def close(self) -> None:
+        """Close pooled connections. Safe to call more than once."""
+        self._client.close()
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    def __enter__(self) -> "OllamaClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # -------------------------
+    # API calls
+    # -------------------------
+
+    def embed(self, model: str, text: str, stats: CacheStats | None = None) -> list[float]:
         """
         Create an embedding vector for the provided text.
 
         NOTE: Ollama embeddings endpoint expects {"model": "...", "prompt": "..."}.
         We also surface Ollama's error body if it fails (critical for debugging).
         """
-        url = f"{self.base_url}/api/embeddings"
-        payload = {"model": model, "prompt": text}
+        cached, missing = _cache_lookup(self.embedding_cache, model, [text], stats)
+        if not missing:
+            return cached[0].tolist()
 
-        with httpx.Client(timeout=self.timeout) as client:
-            resp = client.post(url, json=payload)
+        resp = self._client.post("/api/embeddings", json={"model": model, "prompt": text})
+        emb = _parse_embedding(resp)
 
-        if resp.status_code >= 400:
-            # Include Ollama's message to make failures actionable
-            raise RuntimeError(f"Ollama embeddings failed ({resp.status_code}): {resp.text}")
+        if self.embedding_cache is not None:
+            self.embedding_cache.put_vectors(model, [text], np.asarray([emb], dtype="float32"))
+        return emb
 
-        data = resp.json()
-        emb = data.get("embedding")
-        if not isinstance(emb, list) or not emb:
-            raise RuntimeError(f"Ollama embeddings returned unexpected payload: {data}")
+    def embed_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        batch_size: int = 32,
+        max_workers: int = 4,
+        stats: CacheStats | None = None,
+    ) -> np.ndarray:
+        """
+        Embed many texts, returning a contiguous float32 matrix (len(texts), dim).
 
-        return emb
+        Uses Ollama's batched /api/embed endpoint ({"model", "input": [...]}),
+        one request per batch_size texts. Older servers without /api/embed
+        (404) fall back to concurrent single /api/embeddings calls.
+
+        The result is ready to pass straight to faiss.normalize_L2().
+        Any failure raises RuntimeError for the whole call; callers that need
+        per-text failure accounting should retry the failed batch with embed().
 
-    def chat(self, model: str, messages: list[dict], format: str | None = None, stream: bool = False) -> str:
+        With an embedding cache, only cache misses are sent to Ollama; pass a
+        CacheStats to count this call's hits/misses.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+
+        cached, missing = _cache_lookup(self.embedding_cache, model, texts, stats)
+        if not missing:
+            return _merge_cached(cached, missing, np.empty((0, 0), dtype="float32"))
+
+        miss_texts = [texts[i] for i in missing]
+        matrix = _MatrixBuilder(len(miss_texts))
+        for start in range(0, len(miss_texts), batch_size):
+            batch = miss_texts[start:start + batch_size]
+            matrix.put(start, self._embed_batch(model, batch, max_workers=max_workers))
+
+        if self.embedding_cache is not None:
+            self.embedding_cache.put_vectors(model, miss_texts, matrix.out)
+        return _merge_cached(cached, missing, matrix.out)
+
+    def _embed_batch(self, model: str, texts: list[str], max_workers: int) -> np.ndarray:
+        """Embed one batch via /api/embed, or concurrent /api/embeddings on old servers."""
+        if self._batch_embed_supported is not False:
+            resp = self._client.post("/api/embed", json={"model": model, "input": texts})
+
+            if _batch_endpoint_missing(resp):
+                self._batch_embed_supported = False
+            else:
+                rows = _parse_batch_embeddings(resp, len(texts))
+                self._batch_embed_supported = True
+                return rows
+
+        # Fallback: concurrent single calls over the shared pooled client
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(texts)))) as pool:
+            vectors = list(pool.map(lambda t: self.embed(model, t), texts))
+        return np.asarray(vectors, dtype="float32")
+
+    def chat(self, model: str, messages: list[dict], format: str | dict | None = None, stream: bool = False) -> str:
         """
         Chat with an LLM using Ollama's /api/chat endpoint.
         """
-        url = f"{self.base_url}/api/chat"
-        payload = {"model": model, "messages": messages, "stream": stream}
-        if format:
-            payload["format"] = format
+        resp = self._client.post("/api/chat", json=_chat_payload(model, messages, format, stream))
+        return _parse_chat(resp)
+
 
-        with httpx.Client(timeout=self.timeout) as client:
-            resp = client.post(url, json=payload)
+class AsyncOllamaClient:
+    """
+    asyncio counterpart of OllamaClient, built on a pooled httpx.AsyncClient.
+
+    Use this from `async def` FastAPI endpoints: awaiting a 60-120s vision
+    call yields the event loop, so one worker keeps serving other requests
+    while it waits on the model. Shared via app.state.async_ollama and
+    closed with `await aclose()` in the app lifespan.
+    """
 
-        if resp.status_code >= 400:
-            raise RuntimeError(f"Ollama chat failed ({resp.status_code}): {resp.text}")
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        timeout_s: float = 120.0,
+        max_connections: int = 16,
+        max_keepalive_connections: int = 8,
+        keepalive_expiry_s: float = 60.0,
+        http2: bool | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout_s
+        self.embedding_cache = embedding_cache
+        self.http2 = _HTTP2_AVAILABLE if http2 is None else (http2 and _HTTP2_AVAILABLE)
+        self._batch_embed_supported: bool | None = None
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=_limits(max_connections, max_keepalive_connections, keepalive_expiry_s),
+            http2=self.http2,
+        )
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    async def aclose(self) -> None:
+        """Close pooled connections. Safe to call more than once."""
+        await self._client.aclose()
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def __aenter__(self) -> "AsyncOllamaClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    # -------------------------
+    # API calls
+    # -------------------------
+
+    async def embed(self, model: str, text: str, stats: CacheStats | None = None) -> list[float]:
+        """
+        Create an embedding vector for the provided text (see OllamaClient.embed).
+
+        embedding_cache (SQLite) reads and writes run in a worker thread,
+        never on the event loop.
+        """
+        cached, missing = await asyncio.to_thread(_cache_lookup, self.embedding_cache, model, [text], stats)
+        if not missing:
+            return cached[0].tolist()
+
+        resp = await self._client.post("/api/embeddings", json={"model": model, "prompt": text})
+        emb = _parse_embedding(resp)
+
+        if self.embedding_cache is not None:
+            await asyncio.to_thread(
+                self.embedding_cache.put_vectors, model, [text], np.asarray([emb], dtype="float32")
+            )
+        return emb
+
+    async def embed_many(
+        self,
+        model: str,
+        texts: Sequence[str],
+        batch_size: int = 32,
+        max_concurrency: int = 4,
+        stats: CacheStats | None = None,
+    ) -> np.ndarray:
+        """
+        Embed many texts into a contiguous float32 (len(texts), dim) matrix.
+
+        Same contract as OllamaClient.embed_many: cache lookups first, then
+        batched /api/embed for the misses, falling back to concurrent single
+        calls (bounded by max_concurrency) on old servers. Cache access runs
+        in a worker thread, as in embed().
+        """
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+
+        cached, missing = await asyncio.to_thread(_cache_lookup, self.embedding_cache, model, texts, stats)
+        if not missing:
+            return _merge_cached(cached, missing, np.empty((0, 0), dtype="float32"))
+
+        miss_texts = [texts[i] for i in missing]
+        matrix = _MatrixBuilder(len(miss_texts))
+        for start in range(0, len(miss_texts), batch_size):
+            batch = miss_texts[start:start + batch_size]
+            matrix.put(start, await self._embed_batch(model, batch, max_concurrency))
+
+        if self.embedding_cache is not None:
+            await asyncio.to_thread(self.embedding_cache.put_vectors, model, miss_texts, matrix.out)
+        return _merge_cached(cached, missing, matrix.out)
+
+    async def _embed_batch(self, model: str, texts: list[str], max_concurrency: int) -> np.ndarray:
+        if self._batch_embed_supported is not False:
+            resp = await self._client.post("/api/embed", json={"model": model, "input": texts})
+
+            if _batch_endpoint_missing(resp):
+                self._batch_embed_supported = False
+            else:
+                rows = _parse_batch_embeddings(resp, len(texts))
+                self._batch_embed_supported = True
+                return rows
+
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _one(text: str) -> list[float]:
+            async with semaphore:
+                return await self.embed(model, text)
+
+        vectors = await asyncio.gather(*(_one(t) for t in texts))
+        return np.asarray(vectors, dtype="float32")
+
+    async def chat(self, model: str, messages: list[dict], format: str | dict | None = None) -> str:
+        """Non-streaming chat via /api/chat; returns the full assistant message."""
+        resp = await self._client.post("/api/chat", json=_chat_payload(model, messages, format, stream=False))
+        return _parse_chat(resp)
+
+    async def chat_stream(
+        self,
+        model: str,
+        messages: list[dict],
+        format: str | dict | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming chat via /api/chat: yields content tokens as Ollama produces them.
+
+        Usage:
+            async for token in client.chat_stream(model, messages):
+                ...
+        """
+        payload = _chat_payload(model, messages, format, stream=True)
+        async with self._client.stream("POST", "/api/chat", json=payload) as resp:
+            if resp.status_code >= 400:
+                body = (await resp.aread()).decode("utf-8", errors="replace")
+                raise RuntimeError(f"Ollama chat failed ({resp.status_code}): {body}")
 
-        data = resp.json()
-        return data["message"]["content"]
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                token, done = _parse_stream_line(line)
+                if token:
+                    yield token
+                if done:
+                    break
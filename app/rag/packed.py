@@ -0,0 +1,127 @@
+"""
+Packed columnar files
+
+One file = a small JSON header followed by raw NumPy arrays ("columns"),
+each aligned to 64 bytes so it can be viewed straight out of an mmap with
+np.frombuffer - no parsing, no copies. Opening a file only reads the
+header; the OS pages in just the bytes a lookup touches.
+
+Layout:
+    b"RAGPACK1" | uint64 header length | header JSON | padding | column data...
+
+Header JSON:
+    {"meta": {...}, "columns": {name: {"dtype", "shape", "offset"}}}
+
+Used for the chunk store (chunks.bin); anything that needs large,
+read-mostly arrays next to a policy can reuse it.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+MAGIC = b"RAGPACK1"
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_packed(path: str | Path, columns: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    Write columns (+ JSON-serializable meta) to path atomically.
+
+    The file is written next to the target and then os.replace()d into
+    place, so readers never see a half-written file; readers that already
+    have the old file mapped keep reading the old version.
+    """
+    path = Path(path)
+    arrays = {name: np.ascontiguousarray(arr) for name, arr in columns.items()}
+
+    # Offsets depend on the header length, and the header contains the offsets:
+    # reserve room for the header first, then lay the columns out after it.
+    layout: Dict[str, Dict[str, Any]] = {
+        name: {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": 0}
+        for name, arr in arrays.items()
+    }
+    header = {"meta": meta or {}, "columns": layout}
+    while True:
+        header_bytes = json.dumps(header).encode("utf-8")
+        pos = _aligned(len(MAGIC) + 8 + len(header_bytes))
+        changed = False
+        for name, arr in arrays.items():
+            if layout[name]["offset"] != pos:
+                layout[name]["offset"] = pos
+                changed = True
+            pos = _aligned(pos + arr.nbytes)
+        if not changed:
+            break
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(layout[name]["offset"])
+            f.write(arr.tobytes())
+        f.truncate(pos)
+    os.replace(tmp, path)
+    return path
+
+
+class PackedFile:
+    """Read-only, memory-mapped view of a file written by write_packed()."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a packed file: {self.path}")
+
+        (header_len,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+        self.meta: Dict[str, Any] = header["meta"]
+        self._layout: Dict[str, Dict[str, Any]] = header["columns"]
+
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, spec in self._layout.items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            count = int(np.prod(shape)) if shape else 1
+            self.columns[name] = np.frombuffer(
+                self._mm, dtype=dtype, count=count, offset=spec["offset"]
+            ).reshape(shape)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mm)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def close(self) -> None:
+        """
+        Release the mapping. Only call when no column views are still in use;
+        otherwise just drop the object and let garbage collection unmap it.
+        """
+        self.columns.clear()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # A caller still holds a view; the GC will unmap it later
@@ -1,35 +1,201 @@
+"""
+PDF Page Extraction Module
+
+Purpose: Pull the text out of a PDF, page by page, using several processes
+
+PyMuPDF extracts one page at a time on one CPU core; a 600-page
+subdivision ordinance keeps a single core busy for a long time while the
+others sit idle. This module splits the PDF into contiguous page ranges
+("shards"), and each worker process opens the PDF on its own and extracts
+one range at a time.
+
+Results are yielded as a stream, in page order, as soon as each shard is
+ready - so the caller can chunk (and embed) page 1 while page 400 is still
+being extracted. Only a few shards per worker are queued ahead of the
+caller, so a slow consumer holds extraction back instead of the whole PDF's
+text piling up in memory.
+
+    for page_num, text in iter_page_texts("ordinance.pdf"):
+        ...
+
+Small PDFs (fewer than PDF_PARALLEL_MIN_PAGES pages) and machines with a
+single core are extracted in-process: starting worker processes would cost
+more than it saves.
+
+Settings (environment variables):
+    PDF_EXTRACT_WORKERS      worker processes (default: CPU count, max 8)
+    PDF_PARALLEL_MIN_PAGES   smallest PDF worth parallelizing (default 32)
+"""
+
 from __future__ import annotations
 
-from typing import Dict
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
 
 import fitz  # PyMuPDF
 
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(os.cpu_count() or 1, 8))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+
+# Extraction modes:
+#   "text"      page.get_text("text")
+#   "fallback"  like "text", but pages with no text are retried from the
+#               page's text blocks (handles some encoding edge cases)
+EXTRACT_MODES = ("text", "fallback")
+
+# Shards per worker: more, smaller shards mean the first pages come back
+# sooner and a slow shard holds up less of the stream.
+_SHARDS_PER_WORKER = 4
+_MIN_SHARD_PAGES = 4
+# Shards submitted ahead of the consumer, per worker
+_PREFETCH_PER_WORKER = 2
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
 
-def extract_pages(pdf_path: str) -> Dict[int, str]:
+def _page_text(page, mode: str) -> str:
+    text = page.get_text("text") or ""
+    if mode == "fallback" and not text.strip():
+        blocks = page.get_text("blocks")
+        text = "\n".join(b[4] for b in blocks if isinstance(b[4], str))
+    return text
+
+
+def _extract_range(pdf_path: str, start: int, end: int, mode: str) -> List[str]:
+    """Texts of pages [start, end) (0-based). Runs inside a worker process."""
+    doc = fitz.open(pdf_path)
+    try:
+        return [_page_text(doc.load_page(i), mode) for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def page_count(pdf_path: str) -> int:
+    """Number of pages in the PDF."""
+    doc = fitz.open(pdf_path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
     """
-    Extract text from a PDF, preserving page numbers.
+    Shared worker pool, created on first use and reused afterwards, so
+    every ingest doesn't pay process start-up again.
 
-    Returns:
-        { page_number (1-based): text }
+    "spawn" rather than fork: the API process has threads (uvicorn,
+    Ollama clients) and MuPDF state that must not be copied mid-use.
     """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
 
-    # Open the PDF file
-    doc = fitz.open(pdf_path)
 
-    pages: Dict[int, str] = {}
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    """Forget a pool whose worker died, so the next call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
 
-    # Iterate through pages (0-based internally)
-    for page_index in range(doc.page_count):
-        page = doc.load_page(page_index)
+def shutdown_pool() -> None:
+    """Stop the worker processes (e.g. on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
 
-        # Extract plain text from the page
-        # (layout is best-effort; PDFs are messy)
-        text = page.get_text("text") or ""
 
-        # Store using 1-based page numbers for human citation
-        pages[page_index + 1] = text
+def _shards(n_pages: int, workers: int) -> List[Tuple[int, int]]:
+    size = max(_MIN_SHARD_PAGES, -(-n_pages // (workers * _SHARDS_PER_WORKER)))
+    return [(start, min(start + size, n_pages)) for start in range(0, n_pages, size)]
+
+
+def iter_page_texts(
+    pdf_path: str,
+    mode: str = "text",
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for every page, in page order (1-based numbers).
 
-    # Always close the document
+    With workers > 1 and a large enough PDF, page ranges are extracted in
+    parallel worker processes; each shard is yielded as soon as it and all
+    shards before it are done. Otherwise pages are extracted right here.
+
+    If a worker process crashes, the affected shards are extracted
+    in-process instead, so the output is the same either way.
+    """
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"Unknown extract mode {mode!r} (expected one of {EXTRACT_MODES})")
+    pdf_path = str(pdf_path)
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+
+    doc = fitz.open(pdf_path)
+    n_pages = doc.page_count
+    if workers <= 1 or n_pages < max(PDF_PARALLEL_MIN_PAGES, 2):
+        try:
+            for i in range(n_pages):
+                yield i + 1, _page_text(doc.load_page(i), mode)
+        finally:
+            doc.close()
+        return
     doc.close()
 
-    return pages
+    pool = _get_pool(workers)
+    shards = iter(_shards(n_pages, workers))
+    window: Deque[Tuple[int, int, Future]] = deque()
+
+    def submit_next() -> None:
+        for start, end in shards:
+            window.append((start, end, pool.submit(_extract_range, pdf_path, start, end, mode)))
+            return
+
+    try:
+        # Keep a bounded number of shards queued/running: enough to keep
+        # every worker busy, but a slow consumer (e.g. embedding) makes
+        # extraction wait instead of buffering the whole PDF in memory.
+        for _ in range(workers * _PREFETCH_PER_WORKER):
+            submit_next()
+
+        while window:
+            start, end, future = window.popleft()
+            try:
+                texts = future.result()
+            except BrokenProcessPool:
+                _reset_pool(pool)
+                pool = _get_pool(workers)
+                texts = _extract_range(pdf_path, start, end, mode)
+            submit_next()
+            for offset, text in enumerate(texts):
+                yield start + offset + 1, text
+    finally:
+        # Caller stopped early (or failed): drop shards nobody will read
+        for _, _, future in window:
+            future.cancel()
+
+
+def extract_pages(pdf_path: str, workers: Optional[int] = None) -> Dict[int, str]:
+    """
+    Extract text from a PDF, preserving page numbers.
+
+    Returns:
+        { page_number (1-based): text }
+    """
+    return dict(iter_page_texts(pdf_path, workers=workers))
@@ -6,10 +6,19 @@ Purpose: Orchestrate the full document ingestion process (text + images)
 This is the "conductor" that coordinates:
 1. Text extraction and chunking (text_processor)
 2. Image extraction and vision AI (vision_processor)
-3. Embedding creation (Ollama)
+3. Embedding creation (embedding_processor -> Ollama)
 4. Vector index building (FAISS)
 5. Metadata and storage (PolicyStore)
 
+Steps 1-3 are streamed: pages are chunked and embedded while the rest of
+the PDF is still being extracted, with bounded queues between stages, so
+peak memory doesn't grow with the size of the PDF. The peak is recorded
+as "peak_rss_mb" in metadata.json.
+
+Progress is checkpointed per stage under the policy folder (see
+app.rag.checkpoint), so an ingest that dies halfway resumes instead of
+starting over.
+
 Python concepts:
 - Functions calling other functions (composition)
 - Combining results from multiple sources
@@ -19,19 +28,23 @@ Python concepts:
 
 from __future__ import annotations
 
-from typing import List, Dict, Any
-import numpy as np
+import itertools
+import sys
+from typing import Callable, Iterator, List, Dict, Any, Optional
 import faiss
 
 # Import our processors (the workers)
-from app.rag.processors.text_processor import (
-    extract_pdf_pages,
-    chunk_pages,
-    sanitize_text_for_embedding,
-)
+from app.rag.processors.text_processor import iter_pdf_pages
+from app.rag.processors.section_chunker import SectionChunker
 from app.rag.processors.vision_processor import create_image_chunks
+from app.rag.processors.embedding_processor import embed_chunks
+from app.rag.processors.index_processor import INDEX_TYPES, build_index
 
 # Import infrastructure
+from app.rag.checkpoint import IngestCheckpoint, file_sha256
+from app.rag.pdf_extract import page_count
+from app.rag.disk_cache import CacheStats, VisionCache, VisionStats
+from app.rag.global_index import GlobalIndexSet
 from app.rag.ollama_client import OllamaClient
 from app.rag.store import PolicyStore
 from app.rag.types import Chunk
@@ -49,6 +62,17 @@ def ingest_policy_with_vision(
     embedding_model: str,
     vision_model: str = "llama3.2-vision:11b",
     enable_vision: bool = True,
+    vision_workers: int = 2,
+    vision_cache: Optional[VisionCache] = None,
+    embed_batch_size: int = 32,
+    embed_workers: int = 4,
+    embed_max_in_flight: int = 8,
+    chunk_max_tokens: int = 256,
+    chunk_overlap_tokens: int = 48,
+    index_type: str = "auto",
+    global_index: Optional[GlobalIndexSet] = None,
+    resume: bool = True,
+    progress: Optional[Callable[..., None]] = None,
 ) -> Dict[str, Any]:
     """
     Complete ingestion pipeline: text + vision processing.
@@ -58,13 +82,16 @@ def ingest_policy_with_vision(
     
     Workflow:
     1. Extract text from all pages
-    2. Chunk text into overlapping segments
+    2. Chunk text by section/sentence up to a token budget (section_chunker)
     3. [OPTIONAL] Extract images and get AI descriptions
     4. Combine text chunks and image chunks
     5. Embed all chunks using embedding model
     6. Build FAISS vector search index
     7. Save everything to disk
     
+    Steps 1-5 run as one stream: each page is chunked and embedded while
+    later pages are still being extracted.
+    
     Args:
         store: PolicyStore for saving data
         ollama: OllamaClient for AI models
@@ -73,6 +100,23 @@ def ingest_policy_with_vision(
         embedding_model: Model for creating embeddings (e.g., "nomic-embed-text:latest")
         vision_model: Model for image description (e.g., "llama3.2-vision:11b")
         enable_vision: Whether to process images (default True)
+        vision_workers: Images described at the same time (default 2)
+        vision_cache: Optional VisionCache; images described before (by any
+                      policy, same model + prompt) are not sent to the model
+        embed_batch_size: Chunks per batched /api/embed request (default 32)
+        embed_workers: Concurrent embedding requests sent to Ollama (default 4)
+        embed_max_in_flight: Max batches queued/running at once (default 8)
+        chunk_max_tokens: Token budget per text chunk (default 256)
+        chunk_overlap_tokens: Tokens of trailing sentences repeated at the
+                              start of the next chunk (default 48)
+        index_type: FAISS index type - "auto" (by corpus size), "flat",
+                    "hnsw", "ivf_flat" or "ivf_pq" (see index_processor)
+        global_index: If given, the policy's vectors are also added to the
+                      cross-policy index used by /ask-all
+        resume: Reuse the checkpoint of an interrupted run of this same
+                ingest (default True); False always starts from scratch
+        progress: Optional callback progress(stage, done, total, unit), called
+                  as each stage advances (the job queue uses it for /jobs/{id})
     
     Returns:
         Dictionary with ingestion results:
@@ -84,144 +128,184 @@ def ingest_policy_with_vision(
             "image_chunks": 15,
             "embedding_model": "nomic-embed-text:latest",
             "vision_model": "llama3.2-vision:11b",
-            "chunks_failed": 2
+            "chunks_failed": 2,
+            "resumed": false
         }
     """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index_type {index_type!r}; expected one of {INDEX_TYPES}")
+    
     print(f"\n{'='*70}")
     print(f"INGESTION PIPELINE: {policy_id}")
     print(f"{'='*70}\n")
     
-    # =========================================================================
-    # STEP 1: Extract and chunk text
-    # =========================================================================
-    print("STEP 1: Extracting text from PDF...")
-    pages = extract_pdf_pages(pdf_path)
-    print(f"  ✓ Extracted {len(pages)} pages")
+    policy_dir = store.policy_dir(policy_id)
+    
+    # Checkpoint of this exact ingest (same PDF + settings). If an earlier
+    # run died partway, finished stages are loaded instead of redone.
+    checkpoint = IngestCheckpoint(
+        policy_dir,
+        {
+            "pdf_sha256": file_sha256(pdf_path),
+            "embedding_model": embedding_model,
+            "vision_model": vision_model if enable_vision else None,
+            "embed_batch_size": embed_batch_size,
+            "chunker": "section",
+            "chunk_max_tokens": chunk_max_tokens,
+            "chunk_overlap_tokens": chunk_overlap_tokens,
+        },
+        resume=resume,
+    )
+    if checkpoint.resumed:
+        print("Resuming from checkpoint of an interrupted run\n")
     
-    print("STEP 2: Chunking text...")
-    text_chunks = chunk_pages(pages)
-    print(f"  ✓ Created {len(text_chunks)} text chunks")
+    # No-op unless a caller (e.g. the job queue) wants progress updates
+    report = progress or (lambda *args, **kwargs: None)
+    
+    # Peak memory of this ingest (reported in metadata.json)
+    _reset_peak_rss()
     
     # =========================================================================
-    # STEP 3: Extract and describe images (if enabled)
+    # STEPS 1-5 run as ONE STREAM:
+    #
+    #   PDF pages ──► chunks ──► batches ──► Ollama ──► vector buffer
+    #   (worker       (per        (bounded window
+    #    processes)    page)       of requests)
+    #
+    # Nothing is fully materialized up front: a page is chunked as soon as
+    # it is extracted, and its chunks are embedded while later pages are
+    # still being read. Each stage only pulls more input when the next one
+    # has room (backpressure), so memory stays flat no matter how long the
+    # PDF is. Image chunks follow the text chunks through the same stream.
     # =========================================================================
+    text_chunks: List[Chunk] = []
     image_chunks: List[Chunk] = []
+    vision_stats = VisionStats()
+    total_pages = page_count(pdf_path)
+    
+    def text_chunk_stream() -> Iterator[Chunk]:
+        """STEP 1-2: pages -> chunks (or the chunks saved by an earlier run)."""
+        print("STEP 1: Extracting text from PDF (streaming)...")
+        saved = checkpoint.load_text_chunks()
+        if saved is not None:
+            report("extract", total_pages, total_pages, "pages")
+            print(f"  ✓ {len(saved)} text chunks loaded from checkpoint")
+            text_chunks.extend(saved)
+            yield from saved
+            return
+        
+        report("extract", 0, total_pages, "pages")
+        # Remembers the current Article/Section heading across pages
+        chunker = SectionChunker(max_tokens=chunk_max_tokens, overlap_tokens=chunk_overlap_tokens)
+        for pages_done, page in enumerate(iter_pdf_pages(pdf_path), start=1):
+            # STEP 2: chunk each page as soon as it arrives
+            for chunk in chunker.chunk_page(page):
+                text_chunks.append(chunk)
+                yield chunk
+            report("extract", pages_done, total_pages, "pages")
+        checkpoint.save_text_chunks(text_chunks)
+        print(f"  ✓ Extracted {total_pages} pages → {len(text_chunks)} text chunks")
     
-    if enable_vision:
+    def image_chunk_stream() -> Iterator[Chunk]:
+        """STEP 3: image descriptions (runs once all text chunks are queued)."""
+        if not enable_vision:
+            print("STEP 3: Vision processing DISABLED (enable_vision=False)")
+            return
         print("STEP 3: Processing images with vision AI...")
         try:
-            image_chunks = create_image_chunks(
+            image_chunks.extend(create_image_chunks(
                 ollama_client=ollama,
                 pdf_path=pdf_path,
                 vision_model=vision_model,
                 min_image_size=10000,  # Skip tiny images
-            )
+                checkpoint=checkpoint,
+                progress=report,
+                vision_cache=vision_cache,
+                vision_stats=vision_stats,
+                workers=vision_workers,
+            ))
             print(f"  ✓ Created {len(image_chunks)} image chunks")
         except Exception as e:
             print(f"  ⚠ Vision processing failed: {e}")
             print(f"  → Continuing with text-only ingestion")
-    else:
-        print("STEP 3: Vision processing DISABLED (enable_vision=False)")
+        yield from image_chunks
     
-    # =========================================================================
-    # STEP 4: Combine all chunks
-    # =========================================================================
-    print("STEP 4: Combining text and image chunks...")
-    all_chunks = text_chunks + image_chunks
-    print(f"  ✓ Total chunks: {len(all_chunks)} ({len(text_chunks)} text + {len(image_chunks)} image)")
+    # STEP 4-5: text chunks then image chunks, embedded as they arrive.
+    # Batches run on a small worker pool (Ollama serves several requests in
+    # parallel); results come back in original chunk order, and failed chunks
+    # are still recorded + dumped to FAILED_EMBED_*.txt.
+    # Chunks whose exact text was embedded before come from the embedding cache;
+    # batches finished by an interrupted earlier run come from the checkpoint.
+    print("STEP 4-5: Embedding chunks as they are produced...")
+    cache_stats = CacheStats()
+    embedded = embed_chunks(
+        ollama,
+        itertools.chain(text_chunk_stream(), image_chunk_stream()),
+        embedding_model,
+        debug_dir=policy_dir,
+        batch_size=embed_batch_size,
+        workers=embed_workers,
+        max_in_flight=embed_max_in_flight,
+        cache_stats=cache_stats,
+        checkpoint=checkpoint,
+        progress=report,
+        # Vector buffer is preallocated for a typical ~4 chunks per page
+        capacity_hint=total_pages * 4,
+    )
+    kept_chunks = embedded.kept_chunks  # Chunks that embedded successfully
+    failed_chunks = embedded.failed_chunks  # Chunks that failed
+    all_chunks_count = len(text_chunks) + len(image_chunks)
+    
+    print(f"  ✓ Total chunks: {all_chunks_count} ({len(text_chunks)} text + {len(image_chunks)} image)")
+    print(f"  ✓ Successfully embedded {len(kept_chunks)}/{all_chunks_count} chunks")
+    print(f"  ✓ Embedding cache: {cache_stats.hits} hits, {cache_stats.misses} misses")
     
     # Handle case where we have no chunks at all
-    if not all_chunks:
+    if not all_chunks_count:
         # Write metadata about the failure
         store.write_metadata(
             policy_id,
             {
-                "pages": len(pages),
+                "pages": total_pages,
                 "chunks_total": 0,
                 "chunks_embedded": 0,
                 "chunks_failed": 0,
                 "embedding_model": embedding_model,
                 "vision_model": vision_model if enable_vision else None,
+                "peak_rss_mb": _peak_rss_mb(),
                 "note": "No extractable text or images found (possibly scanned PDF).",
             },
         )
+        checkpoint.clear()
         return {
             "policy_id": policy_id,
-            "pages": len(pages),
+            "pages": total_pages,
             "chunks": 0,
             "text_chunks": 0,
             "image_chunks": 0,
             "embedding_model": embedding_model,
         }
     
-    # =========================================================================
-    # STEP 5: Embed all chunks
-    # =========================================================================
-    print("STEP 5: Creating embeddings for all chunks...")
-    
-    vectors: List[List[float]] = []  # Will store the embedding vectors
-    kept_chunks: List[Chunk] = []  # Chunks that embedded successfully
-    failed_chunks: List[Dict[str, Any]] = []  # Chunks that failed
-    
-    policy_dir = store.policy_dir(policy_id)
-    
-    # Process each chunk one at a time
-    for i, chunk in enumerate(all_chunks):
-        # Show progress every 10 chunks
-        if (i + 1) % 10 == 0:
-            print(f"  Processing chunk {i+1}/{len(all_chunks)}...")
-        
-        # Clean the text before embedding
-        safe_text = sanitize_text_for_embedding(chunk.text, max_chars=4000)
-        
-        # Skip if sanitization removed all content
-        if not safe_text:
-            failed_chunks.append({
-                "page": chunk.page,
-                "chunk_id": chunk.chunk_id,
-                "error": "Empty after sanitization"
-            })
-            continue
-        
-        # Try to create embedding
-        try:
-            vec = ollama.embed(embedding_model, safe_text)
-            vectors.append(vec)
-            kept_chunks.append(chunk)
-        
-        except Exception as e:
-            # If embedding fails, save the problematic text for debugging
-            debug_path = policy_dir / f"FAILED_EMBED_{chunk.chunk_id}.txt"
-            try:
-                debug_path.write_text(safe_text, encoding="utf-8", errors="replace")
-            except Exception:
-                pass  # If we can't even save the debug file, just continue
-            
-            failed_chunks.append({
-                "page": chunk.page,
-                "chunk_id": chunk.chunk_id,
-                "error": str(e)
-            })
-    
-    print(f"  ✓ Successfully embedded {len(kept_chunks)}/{len(all_chunks)} chunks")
-    
     if failed_chunks:
         print(f"  ⚠ {len(failed_chunks)} chunks failed (see metadata for details)")
     
     # If everything failed, we can't build an index
-    if not vectors:
+    if not kept_chunks:
         store.write_metadata(
             policy_id,
             {
-                "pages": len(pages),
-                "chunks_total": len(all_chunks),
+                "pages": total_pages,
+                "chunks_total": all_chunks_count,
                 "text_chunks": len(text_chunks),
                 "image_chunks": len(image_chunks),
                 "chunks_embedded": 0,
                 "chunks_failed": len(failed_chunks),
                 "embedding_model": embedding_model,
                 "vision_model": vision_model if enable_vision else None,
+                "embed_cache_hits": cache_stats.hits,
+                "embed_cache_misses": cache_stats.misses,
                 "failed_chunks_sample": failed_chunks[:25],
+                "peak_rss_mb": _peak_rss_mb(),
                 "note": "All chunks failed embedding; see FAILED_EMBED_*.txt files.",
             },
         )
@@ -234,25 +318,28 @@ def ingest_policy_with_vision(
     # STEP 6: Build FAISS vector index
     # =========================================================================
     print("STEP 6: Building FAISS search index...")
+    report("index", 0, len(kept_chunks), "vectors")
     
-    # Convert list of vectors to numpy array (FAISS requires this)
-    arr = np.array(vectors, dtype="float32")
+    # Already one contiguous float32 matrix, in chunk order (FAISS requires this)
+    arr = embedded.vectors
     dim = arr.shape[1]  # Dimension of vectors (e.g., 768 for nomic-embed-text)
     
     # Normalize vectors for cosine similarity search
     # This makes the dot product equivalent to cosine similarity
     faiss.normalize_L2(arr)
     
-    # Create FAISS index (IndexFlatIP = inner product, good for cosine similarity)
-    index = faiss.IndexFlatIP(dim)
-    index.add(arr)  # Add all vectors to the index
+    # Create the FAISS index (inner product = cosine similarity on normalized
+    # vectors). Flat for normal policies; IVF/HNSW/PQ for very large ones.
+    index, index_info = build_index(arr, index_type=index_type)
     
-    print(f"  ✓ Index built with {index.ntotal} vectors (dimension: {dim})")
+    report("index", index.ntotal, len(kept_chunks), "vectors")
+    print(f"  ✓ {index_info['index_type']} index built with {index.ntotal} vectors (dimension: {dim})")
     
     # =========================================================================
     # STEP 7: Save everything to disk
     # =========================================================================
     print("STEP 7: Saving to disk...")
+    report("save", 0, 1, "steps")
     
     # Save the FAISS index
     store.write_faiss_index(policy_id, index)
@@ -260,14 +347,14 @@ def ingest_policy_with_vision(
     
     # Save the chunks (for retrieval and citation)
     store.write_chunks(policy_id, kept_chunks)
-    print("  ✓ Saved chunks")
+    print("  ✓ Saved chunks + keyword (BM25) index")
     
     # Save metadata about the ingestion
     store.write_metadata(
         policy_id,
         {
-            "pages": len(pages),
-            "chunks_total": len(all_chunks),
+            "pages": total_pages,
+            "chunks_total": all_chunks_count,
             "text_chunks": len(text_chunks),
             "image_chunks": len(image_chunks),
             "chunks_embedded": len(kept_chunks),
@@ -275,11 +362,33 @@ def ingest_policy_with_vision(
             "embedding_model": embedding_model,
             "vision_model": vision_model if enable_vision else None,
             "vector_dim": dim,
+            "chunker": {"type": "section", "max_tokens": chunk_max_tokens, "overlap_tokens": chunk_overlap_tokens},
+            **index_info,
+            "embed_cache_hits": cache_stats.hits,
+            "embed_cache_misses": cache_stats.misses,
+            "vision_cache": vision_stats.as_dict() if enable_vision else None,
             "failed_chunks_sample": failed_chunks[:25],  # Save first 25 failures
+            "resumed_from_checkpoint": checkpoint.resumed,
+            "peak_rss_mb": _peak_rss_mb(),
         },
     )
     print("  ✓ Saved metadata")
     
+    # Add to (or replace in) the cross-policy index
+    if global_index is not None:
+        global_index.get(embedding_model).add_policy(
+            policy_id, arr, kept_chunks, generation=store.ingest_generation(policy_id)
+        )
+        print("  ✓ Updated global index")
+    report("save", 1, 1, "steps")
+    
+    # Everything is saved; the checkpoint is no longer needed - unless some
+    # chunks failed, in which case re-running the ingest retries just those
+    if failed_chunks:
+        print("  ⚠ Checkpoint kept: re-run this ingest to retry the failed chunks")
+    else:
+        checkpoint.clear()
+    
     # =========================================================================
     # DONE!
     # =========================================================================
@@ -293,11 +402,54 @@ def ingest_policy_with_vision(
     
     return {
         "policy_id": policy_id,
-        "pages": len(pages),
+        "pages": total_pages,
         "chunks": len(kept_chunks),
         "text_chunks": len(text_chunks),
         "image_chunks": len(image_chunks),
         "embedding_model": embedding_model,
         "vision_model": vision_model if enable_vision else None,
         "chunks_failed": len(failed_chunks),
+        "index_type": index_info["index_type"],
+        "embed_cache_hits": cache_stats.hits,
+        "embed_cache_misses": cache_stats.misses,
+        "vision_cache_hits": vision_stats.hits,
+        "vision_seconds_saved": round(vision_stats.seconds_saved, 1),
+        "vision_images_merged": vision_stats.duplicates,
+        "vision_bytes_saved": vision_stats.bytes_original - vision_stats.bytes_sent,
+        "resumed": checkpoint.resumed,
     }
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _reset_peak_rss() -> None:
+    """
+    Reset the kernel's peak-memory counter for this process (Linux only),
+    so the peak we report belongs to this ingest and not to an earlier job
+    that ran in the same worker process.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident memory in MB since _reset_peak_rss() (else since process start)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
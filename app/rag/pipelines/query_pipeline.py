@@ -6,8 +6,10 @@ Purpose: Orchestrate question answering with RAG (Retrieval Augmented Generation
 This pipeline:
 1. Takes a user's question
 2. Embeds the question into a vector
-3. Searches the FAISS index for relevant chunks (text + image descriptions)
-4. Passes relevant chunks to the LLM
+3. Searches the FAISS index for relevant chunks (text + image descriptions),
+   plus a BM25 keyword index for exact terms like "Sec. 2303", and fuses both
+4. Passes relevant chunks to the LLM (neighbours merged, overlaps removed,
+   fitted to a token budget - see app.rag.context_builder)
 5. Gets back an answer with citations
 
 Python concepts:
@@ -18,13 +20,66 @@ Python concepts:
 
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 import numpy as np
 import faiss
 
-from app.rag.ollama_client import OllamaClient
+from app.rag.answer_cache import AnswerCache
+from app.rag.context_builder import DEFAULT_CONTEXT_TOKENS, BuiltContext, build_context
+from app.rag.global_index import GlobalIndex
+from app.rag.lexical_index import fuse_rrf
+from app.rag.ollama_client import AsyncOllamaClient, OllamaClient
+from app.rag.policy_cache import PolicyCache
+from app.rag.query_memo import embed_query
 from app.rag.store import PolicyStore
-from app.rag.processors.text_processor import sanitize_text_for_embedding
+from app.rag.types import Chunk
+from app.rag.processors.index_processor import search_index
+from app.rag.processors.section_chunker import estimate_tokens
+from app.rag.sanitize import sanitize_text_for_embedding
+
+
+# How many candidates each retriever proposes in hybrid mode, per final chunk
+HYBRID_DEPTH_FACTOR = 4
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _embed_question(ollama: OllamaClient, embedding_model: str, question: str) -> np.ndarray:
+    """Embed the question as a (1, dim) float32 row, normalized for cosine similarity."""
+    q_text = sanitize_text_for_embedding(question, max_chars=2000)
+    
+    # Get embedding vector for the question (memoized: repeat questions and
+    # concurrent identical ones share one Ollama call). Copy - it's normalized below.
+    qvec = np.array([embed_query(ollama, embedding_model, q_text)], dtype="float32")
+    
+    # Normalize for cosine similarity
+    faiss.normalize_L2(qvec)
+    return qvec
+
+
+def _retrieved_entry(chunk: Chunk, score: float, policy_id: Optional[str] = None) -> Dict[str, Any]:
+    """One retrieved chunk: citation fields + full text for the prompt."""
+    # Create excerpt for citation (first 300 chars, one line)
+    excerpt = sanitize_text_for_embedding(chunk.text, max_chars=300)
+    excerpt = excerpt.replace("\n", " ").strip()
+    
+    entry = {
+        "chunk_id": chunk.chunk_id,
+        "page": chunk.page,
+        "score": float(score),  # Convert numpy float to Python float
+        "excerpt": excerpt,
+        "text": chunk.text,  # Full text for context
+    }
+    if chunk.section:
+        entry["section"] = chunk.section
+    if chunk.other_pages:
+        # Repeated image: one chunk for every page it appears on
+        entry["pages"] = [chunk.page, *chunk.other_pages]
+    if policy_id is not None:
+        entry["policy_id"] = policy_id
+    return entry
 
 
 # =============================================================================
@@ -40,6 +95,12 @@ def answer_question(
     chat_model: str,
     top_k: int = 6,
     min_score: float = 0.25,
+    cache: Optional[PolicyCache] = None,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    answer_cache: Optional[AnswerCache] = None,
+    hybrid: bool = True,
+    context_tokens: int = DEFAULT_CONTEXT_TOKENS,
 ) -> Dict[str, Any]:
     """
     Answer a question using RAG (Retrieval Augmented Generation).
@@ -60,6 +121,15 @@ def answer_question(
         chat_model: Model to generate the answer
         top_k: How many chunks to retrieve (default 6)
         min_score: Minimum similarity score to include a chunk (default 0.25)
+        cache: Optional PolicyCache; when given, the index + chunks come from
+               memory instead of being re-read from disk on every question
+        nprobe: IVF indexes only - clusters to search (None = value saved at ingest)
+        ef_search: HNSW indexes only - search breadth (None = value saved at ingest)
+        answer_cache: Optional AnswerCache; repeated (or, if enabled, nearly
+                      identical) questions return the stored answer
+        hybrid: Also run BM25 keyword search and fuse it with the vector
+                results (default True); False = vector search only
+        context_tokens: Token budget for the excerpts in the prompt (default 3000)
     
     Returns:
         Dictionary with:
@@ -69,8 +139,11 @@ def answer_question(
                 {"page": 5, "chunk_id": "p5_c2", "excerpt": "..."},
                 {"page": 8, "chunk_id": "p8_img0", "excerpt": "..."}
             ],
-            "retrieved_chunk_ids": ["p5_c2", "p8_img0", ...]
+            "retrieved_chunk_ids": ["p5_c2", "p8_img0", ...],
+            "prompt_tokens": 1840,      # estimated tokens sent to the chat model
+            "cache_hit": false          # true when served from answer_cache
         }
+        Citations only list chunks that made it into the prompt.
     
     Example:
         result = answer_question(
@@ -80,6 +153,90 @@ def answer_question(
         print(result["answer"])
         # "According to page 12, employees may work remotely up to 3 days per week..."
     """
+    if answer_cache is None:
+        retrieved = retrieve_chunks(
+            store, ollama, policy_id, question, embedding_model,
+            top_k=top_k, min_score=min_score, cache=cache, nprobe=nprobe, ef_search=ef_search,
+            hybrid=hybrid,
+        )
+        return {
+            **_answer_from_retrieved(ollama, chat_model, question, retrieved, context_tokens),
+            "cache_hit": False,
+        }
+    
+    # Answer cache: everything that changes the answer is part of the scope,
+    # including the ingest generation (so re-ingesting invalidates it)
+    scope = AnswerCache.scope(
+        policy_id,
+        store.ingest_generation(policy_id),
+        embedding_model=embedding_model,
+        chat_model=chat_model,
+        top_k=top_k,
+        min_score=min_score,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        hybrid=hybrid,
+        context_tokens=context_tokens,
+    )
+    cached = answer_cache.get(scope, question)
+    if cached is not None:
+        print(f"[answer-cache] exact hit for {policy_id}: {question!r}")
+        return {**cached, "cache_hit": True}
+    
+    qvec = _embed_question(ollama, embedding_model, question)
+    cached = answer_cache.get_similar(scope, qvec[0])
+    if cached is not None:
+        print(f"[answer-cache] near-duplicate hit for {policy_id}: {question!r}")
+        return {**cached, "cache_hit": True}
+    answer_cache.miss()
+    
+    retrieved = retrieve_chunks(
+        store, ollama, policy_id, question, embedding_model,
+        top_k=top_k, min_score=min_score, cache=cache, nprobe=nprobe, ef_search=ef_search,
+        qvec=qvec, hybrid=hybrid,
+    )
+    result = _answer_from_retrieved(ollama, chat_model, question, retrieved, context_tokens)
+    answer_cache.put(scope, question, result, qvec=qvec[0])
+    return {**result, "cache_hit": False}
+
+
+def retrieve_chunks(
+    store: PolicyStore,
+    ollama: OllamaClient,
+    policy_id: str,
+    question: str,
+    embedding_model: str,
+    top_k: int = 6,
+    min_score: float = 0.25,
+    cache: Optional[PolicyCache] = None,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    qvec: Optional[np.ndarray] = None,
+    hybrid: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    STEPS 1-3 of answer_question: load the policy, embed the question, search.
+    
+    Split out so the streaming endpoint can send citations as soon as
+    retrieval is done, before the (slow) LLM call starts.
+    
+    Pass qvec if the question was already embedded (normalized, shape (1, dim)).
+    
+    Hybrid search (hybrid=True):
+    Vector search finds chunks that MEAN the same thing; BM25 finds chunks
+    that contain the same WORDS (section numbers, codes, defined terms).
+    Both produce a deeper candidate list, and reciprocal-rank fusion (RRF)
+    picks the final top_k - a chunk ranked well by both wins. min_score
+    still filters the vector candidates; keyword candidates only need to
+    contain a query term (stopwords don't count). If NO vector candidate
+    reaches min_score the question is treated as off-topic and nothing is
+    returned, rather than keyword-only matches.
+    
+    Returns:
+        Retrieved chunk dicts (chunk_id, page, score, excerpt, text), best first.
+        In hybrid mode "score" is the fused RRF score, and "vector_score" /
+        "bm25_score" show where each chunk came from (None = not a candidate there).
+    """
     print(f"\n{'='*70}")
     print(f"QUERY PIPELINE: {policy_id}")
     print(f"Question: {question}")
@@ -89,22 +246,28 @@ def answer_question(
     # STEP 1: Load the FAISS index and chunks
     # =========================================================================
     print("STEP 1: Loading policy data...")
-    index = store.read_faiss_index(policy_id)
-    chunks = store.read_chunks(policy_id)
+    lexical = None
+    if cache is not None:
+        loaded = cache.get(policy_id)
+        index, chunks = loaded.index, loaded.chunks
+        if hybrid:
+            lexical = loaded.lexical
+    else:
+        index = store.read_faiss_index(policy_id)
+        chunks = store.open_chunks(policy_id)
+        if hybrid:
+            lexical = store.open_lexical_index(policy_id)
     print(f"  ✓ Loaded index with {index.ntotal} vectors")
     print(f"  ✓ Loaded {len(chunks)} chunks")
+    if lexical is not None:
+        print(f"  ✓ Loaded keyword index with {lexical.n_terms} terms")
     
     # =========================================================================
     # STEP 2: Embed the question
     # =========================================================================
     print("STEP 2: Embedding question...")
-    q_text = sanitize_text_for_embedding(question, max_chars=2000)
-    
-    # Get embedding vector for the question
-    qvec = np.array([ollama.embed(embedding_model, q_text)], dtype="float32")
-    
-    # Normalize for cosine similarity
-    faiss.normalize_L2(qvec)
+    if qvec is None:
+        qvec = _embed_question(ollama, embedding_model, question)
     print(f"  ✓ Question embedded (dimension: {qvec.shape[1]})")
     
     # =========================================================================
@@ -112,13 +275,17 @@ def answer_question(
     # =========================================================================
     print(f"STEP 3: Searching for top {top_k} most relevant chunks...")
     
+    # In hybrid mode each retriever proposes more candidates than we keep,
+    # so fusion has something to choose from
+    depth = top_k * HYBRID_DEPTH_FACTOR if lexical is not None else top_k
+    
     # Search the index
     # scores = similarity scores (higher = more similar)
     # idxs = indices of the chunks in our chunks list
-    scores, idxs = index.search(qvec, top_k)
+    scores, idxs = search_index(index, qvec, depth, nprobe=nprobe, ef_search=ef_search)
     
-    # Build list of retrieved chunks with their scores
-    retrieved = []
+    # Vector candidates, best first: {row: cosine score}
+    vector_hits: Dict[int, float] = {}
     
     # Loop through results (scores and indices come as 2D arrays, so we use [0])
     for score, idx in zip(scores[0].tolist(), idxs[0].tolist()):
@@ -130,48 +297,138 @@ def answer_question(
         if score < min_score:
             continue
         
-        # Get the chunk data
-        chunk = chunks[idx]
-        
-        # Create excerpt for citation (first 300 chars, one line)
-        excerpt = sanitize_text_for_embedding(chunk.text, max_chars=300)
-        excerpt = excerpt.replace("\n", " ").strip()
-        
-        retrieved.append({
-            "chunk_id": chunk.chunk_id,
-            "page": chunk.page,
-            "score": float(score),  # Convert numpy float to Python float
-            "excerpt": excerpt,
-            "text": chunk.text,  # Full text for context
-        })
+        vector_hits[idx] = score
     
-    print(f"  ✓ Found {len(retrieved)} relevant chunks (score >= {min_score})")
+    if lexical is None:
+        # Get the chunk data (only these rows are read from the chunk store)
+        retrieved = [_retrieved_entry(chunks[idx], score) for idx, score in list(vector_hits.items())[:top_k]]
+        print(f"  ✓ Found {len(retrieved)} relevant chunks (score >= {min_score})")
+        return retrieved
     
-    # If no relevant chunks found, return early
-    if not retrieved:
-        print("  ⚠ No relevant chunks found - cannot answer")
-        return {
-            "answer": "I can't find that information in the policy excerpts provided.",
-            "citations": [],
-            "retrieved_chunk_ids": [],
-        }
+    # Nothing close in meaning: an off-topic question, don't answer it
+    # from chunks that merely share a word with it
+    if not vector_hits:
+        print(f"  ✓ No vector candidates (score >= {min_score}); skipping keyword search")
+        return []
+    
+    # Keyword candidates from the BM25 index, best first
+    bm25_scores, bm25_rows = lexical.search(question, depth)
+    bm25_hits = dict(zip(bm25_rows.tolist(), bm25_scores.tolist()))
+    
+    # Reciprocal-rank fusion of the two rankings
+    fused = fuse_rrf([list(vector_hits), list(bm25_hits)], top_k)
     
+    retrieved = []
+    for idx, rrf_score in fused:
+        entry = _retrieved_entry(chunks[idx], rrf_score)
+        entry["vector_score"] = vector_hits.get(idx)
+        entry["bm25_score"] = bm25_hits.get(idx)
+        retrieved.append(entry)
+    
+    both = sum(1 for r in retrieved if r["vector_score"] is not None and r["bm25_score"] is not None)
+    print(f"  ✓ {len(vector_hits)} vector candidates (score >= {min_score}), {len(bm25_hits)} keyword candidates")
+    print(f"  ✓ Fused to {len(retrieved)} chunks ({both} found by both)")
+    
+    return retrieved
+
+
+def answer_question_all(
+    store: PolicyStore,
+    ollama: OllamaClient,
+    global_index: GlobalIndex,
+    question: str,
+    chat_model: str,
+    top_k: int = 6,
+    min_score: float = 0.25,
+    policy_ids: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    page_min: Optional[int] = None,
+    page_max: Optional[int] = None,
+    context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+) -> Dict[str, Any]:
+    """
+    Answer a question across ALL ingested policies (or a filtered subset).
+    
+    Same RAG flow as answer_question, but retrieval is one search over the
+    global index instead of one index per policy. Filters are applied inside
+    the search, so top_k is always "best k among the matching chunks".
+    
+    Args:
+        global_index: GlobalIndex for the embedding model to use
+        policy_ids: Only search these policies (None = all)
+        types: Only these policy types, e.g. ["policy"] or ["standalone_image"]
+        page_min / page_max: Only chunks from this page range (inclusive)
+        (other args as in answer_question)
+    
+    Returns:
+        Same shape as answer_question; each citation also has "policy_id".
+    """
+    print(f"\n{'='*70}")
+    print(f"QUERY PIPELINE (ALL POLICIES): {global_index.embedding_model}")
+    print(f"Question: {question}")
+    print(f"{'='*70}\n")
+    
+    print("STEP 1: Embedding question...")
+    qvec = _embed_question(ollama, global_index.embedding_model, question)
+    print(f"  ✓ Question embedded (dimension: {qvec.shape[1]})")
+    
+    print(f"STEP 2: Searching global index for top {top_k} chunks...")
+    hits = global_index.search(
+        qvec[0],
+        top_k,
+        policy_ids=policy_ids,
+        types=types,
+        page_min=page_min,
+        page_max=page_max,
+    )
+    
+    print("STEP 3: Loading matching chunks...")
+    tables: Dict[str, Any] = {}
+    retrieved = []
+    for hit in hits:
+        if hit.score < min_score:
+            continue
+        # Only the chunk stores are opened (mmap) - no per-policy index loads
+        if hit.policy_id not in tables:
+            tables[hit.policy_id] = store.open_chunks(hit.policy_id)
+        retrieved.append(_retrieved_entry(tables[hit.policy_id][hit.row], hit.score, hit.policy_id))
+    
+    print(f"  ✓ Found {len(retrieved)} relevant chunks from {len(tables)} policies (score >= {min_score})")
+    
+    return _answer_from_retrieved(ollama, chat_model, question, retrieved, context_tokens)
+
+
+NO_ANSWER = "I can't find that information in the policy excerpts provided."
+
+
+def _build_messages(
+    question: str,
+    retrieved: List[Dict[str, Any]],
+    context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+) -> Tuple[List[Dict[str, str]], BuiltContext]:
+    """
+    STEPS 4-5: turn retrieved chunks into the system + user chat messages.
+    
+    Retrieved entries from the global index also carry "policy_id", which is
+    then shown in the context headers.
+    
+    Returns the messages and the BuiltContext (which chunks made it in).
+    """
     # =========================================================================
     # STEP 4: Build context for the LLM
     # =========================================================================
     print("STEP 4: Building context for LLM...")
     
-    # Create numbered context blocks (makes it clear which chunk is which)
-    context_blocks = []
-    for r in retrieved:
-        # Check if this is an image chunk (chunk_id contains "img")
-        chunk_type = "IMAGE" if "_img" in r["chunk_id"] else "TEXT"
-        
-        context_blocks.append(
-            f"[{chunk_type} | Page {r['page']} | {r['chunk_id']}]\n{r['text']}"
-        )
+    # One block per chunk - or per run of neighbouring chunks of a page, with
+    # their shared text removed - best first, within the token budget
+    context = build_context(retrieved, max_tokens=context_tokens)
+    context_blocks = context.blocks
     
-    print(f"  ✓ Built context from {len(context_blocks)} chunks")
+    print(
+        f"  ✓ Built context from {len(context.used)}/{len(retrieved)} chunks in "
+        f"{len(context_blocks)} blocks (~{context.tokens} tokens; {context.merged} merged, "
+        f"{context.deduplicated} duplicates, {context.truncated} cut, {context.dropped} over budget)"
+    )
     
     # =========================================================================
     # STEP 5: Create prompt for the LLM
@@ -198,18 +455,67 @@ def answer_question(
         + "\n\nAnswer using only the excerpts above and cite every claim."
     )
     
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+    return messages, context
+
+
+def _prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimated prompt size in tokens (content + a few per message for the chat template)."""
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+def _format_citations(retrieved: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Citation list for the UI (no full text)."""
+    citations = []
+    for r in retrieved:
+        citation = {
+            "page": r["page"],
+            "chunk_id": r["chunk_id"],
+            "excerpt": r["excerpt"],
+        }
+        if "section" in r:
+            citation["section"] = r["section"]
+        if "pages" in r:
+            citation["pages"] = r["pages"]
+        if "policy_id" in r:
+            citation["policy_id"] = r["policy_id"]
+        citations.append(citation)
+    return citations
+
+
+def _answer_from_retrieved(
+    ollama: OllamaClient,
+    chat_model: str,
+    question: str,
+    retrieved: List[Dict[str, Any]],
+    context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+) -> Dict[str, Any]:
+    """
+    STEPS 4-7, shared by answer_question and answer_question_all:
+    build the prompt from the retrieved chunks, ask the LLM, format citations.
+    """
+    # If no relevant chunks found, return early
+    if not retrieved:
+        print("  ⚠ No relevant chunks found - cannot answer")
+        return {
+            "answer": NO_ANSWER,
+            "citations": [],
+            "retrieved_chunk_ids": [],
+            "prompt_tokens": 0,
+        }
+    
+    messages, context = _build_messages(question, retrieved, context_tokens)
+    prompt_tokens = _prompt_tokens(messages)
+    
     # =========================================================================
     # STEP 6: Get answer from LLM
     # =========================================================================
     print("STEP 6: Generating answer with LLM...")
     
-    answer_text = ollama.chat(
-        chat_model,
-        messages=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-    )
+    answer_text = ollama.chat(chat_model, messages=messages)
     
     print(f"  ✓ Answer generated ({len(answer_text)} characters)")
     
@@ -218,15 +524,8 @@ def answer_question(
     # =========================================================================
     print("STEP 7: Formatting response...")
     
-    # Build citations list for the UI
-    citations = [
-        {
-            "page": r["page"],
-            "chunk_id": r["chunk_id"],
-            "excerpt": r["excerpt"],
-        }
-        for r in retrieved
-    ]
+    # Build citations list for the UI (only chunks the model actually saw)
+    citations = _format_citations(context.used)
     
     # Get just the chunk IDs for debugging
     retrieved_chunk_ids = [r["chunk_id"] for r in retrieved]
@@ -234,6 +533,7 @@ def answer_question(
     print(f"\n{'='*70}")
     print(f"QUERY COMPLETE")
     print(f"  Retrieved chunks: {len(retrieved)}")
+    print(f"  Prompt: ~{prompt_tokens} tokens")
     print(f"  Answer length: {len(answer_text)} chars")
     print(f"{'='*70}\n")
     
@@ -241,4 +541,57 @@ def answer_question(
         "answer": answer_text,
         "citations": citations,
         "retrieved_chunk_ids": retrieved_chunk_ids,
+        "prompt_tokens": prompt_tokens,
     }
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+async def stream_answer(
+    async_ollama: AsyncOllamaClient,
+    chat_model: str,
+    question: str,
+    retrieved: List[Dict[str, Any]],
+    context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming version of STEPS 4-7, as a sequence of events:
+    
+        {"event": "citations", "data": {"citations": [...], "retrieved_chunk_ids": [...]}}
+        {"event": "token",     "data": {"text": "..."}}     (many)
+        {"event": "done",      "data": {"answer_chars": 1234, "prompt_tokens": 1840}}
+    
+    Citations go out before the LLM is even called, so the user sees the
+    sources immediately and then watches the answer being written.
+    If Ollama fails mid-answer an {"event": "error"} is sent instead of "done".
+    """
+    if not retrieved:
+        yield {"event": "citations", "data": {"citations": [], "retrieved_chunk_ids": []}}
+        yield {"event": "token", "data": {"text": NO_ANSWER}}
+        yield {"event": "done", "data": {"answer_chars": len(NO_ANSWER), "prompt_tokens": 0}}
+        return
+    
+    # Building the context is cheap (no I/O); it decides which chunks get cited
+    messages, context = _build_messages(question, retrieved, context_tokens)
+    prompt_tokens = _prompt_tokens(messages)
+    
+    yield {
+        "event": "citations",
+        "data": {
+            "citations": _format_citations(context.used),
+            "retrieved_chunk_ids": [r["chunk_id"] for r in retrieved],
+        },
+    }
+    
+    answer_chars = 0
+    try:
+        async for token in async_ollama.chat_stream(chat_model, messages=messages):
+            answer_chars += len(token)
+            yield {"event": "token", "data": {"text": token}}
+    except Exception as e:
+        yield {"event": "error", "data": {"detail": str(e)}}
+        return
+    
+    yield {"event": "done", "data": {"answer_chars": answer_chars, "prompt_tokens": prompt_tokens}}
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.rag.chunk_store import ChunkTable
+from app.rag.disk_cache import CacheStats
+from app.rag.lexical_index import LexicalIndex
+from app.rag.store import PolicyStore
+
+
+@dataclass
+class LoadedPolicy:
+    """A policy's FAISS index + chunk list + BM25 index, ready to search."""
+    index: Any
+    chunks: ChunkTable
+    lexical: LexicalIndex
+    generation: Tuple
+    nbytes: int
+
+
+def _estimate_bytes(index, chunks: ChunkTable, lexical: LexicalIndex) -> int:
+    """Approximate resident size: raw float32 vectors + the mapped chunk and lexical files."""
+    return int(index.ntotal) * int(index.d) * 4 + chunks.nbytes + lexical.nbytes
+
+
+class PolicyCache:
+    """
+    In-process LRU cache of loaded (FAISS index, chunks, lexical index) per policy.
+
+    Without it every /ask re-reads index.faiss and re-opens the chunk store.
+
+    - Bounded by max_bytes (estimated vector + text size), evicting least
+      recently used policies first
+    - Every get() compares the store's ingest generation (file mtimes/sizes)
+      with the cached one, so a re-ingest is picked up on the next question
+    - FAISS search is safe to run concurrently on a shared index, so cached
+      entries are handed out without copying
+
+    A policy larger than the whole budget is loaded and returned, just not kept.
+    """
+
+    def __init__(self, store: PolicyStore, max_bytes: int = 256 * 1024 * 1024):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+        self._entries: "OrderedDict[str, LoadedPolicy]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, policy_id: str) -> bool:
+        return policy_id in self._entries
+
+    def get(self, policy_id: str) -> LoadedPolicy:
+        """Return the policy's indexes + chunks, loading from disk on a miss or stale entry."""
+        generation = self.store.ingest_generation(policy_id)
+
+        with self._lock:
+            entry = self._entries.get(policy_id)
+            if entry is not None and entry.generation == generation:
+                self._entries.move_to_end(policy_id)
+                self.stats.add(hits=1)
+                return entry
+
+        self.stats.add(misses=1)
+        index = self.store.read_faiss_index(policy_id)
+        chunks = self.store.open_chunks(policy_id)
+        lexical = self.store.open_lexical_index(policy_id)
+        entry = LoadedPolicy(
+            index=index,
+            chunks=chunks,
+            lexical=lexical,
+            generation=generation,
+            nbytes=_estimate_bytes(index, chunks, lexical),
+        )
+        self._put(policy_id, entry)
+        return entry
+
+    def _put(self, policy_id: str, entry: LoadedPolicy) -> None:
+        with self._lock:
+            old = self._entries.pop(policy_id, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+
+            if entry.nbytes > self.max_bytes:
+                return
+
+            self._entries[policy_id] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def invalidate(self, policy_id: Optional[str] = None) -> None:
+        """Drop one policy (or everything when policy_id is None)."""
+        with self._lock:
+            if policy_id is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            old = self._entries.pop(policy_id, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+
+    def warm(self, top_n: int = 8, policy_ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Preload policies so the first questions after startup skip disk.
+
+        Uses policy_ids if given, otherwise the top_n most recently ingested
+        policies. Stops early once the byte budget is full. Returns the ids loaded.
+        """
+        if policy_ids is None:
+            policy_ids = self.store.list_indexed_policies()[:top_n]
+
+        loaded: List[str] = []
+        for policy_id in policy_ids:
+            try:
+                self.get(policy_id)
+            except Exception as e:
+                print(f"[startup] Could not warm policy {policy_id}: {e}")
+                continue
+            loaded.append(policy_id)
+            # Budget full: this load pushed out an earlier warm policy (or didn't fit)
+            if any(p not in self for p in loaded):
+                break
+        return loaded
+
+    def info(self) -> Dict[str, Any]:
+        """Snapshot for health/debug endpoints."""
+        with self._lock:
+            return {
+                "policies": list(self._entries.keys()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **self.stats.as_dict(),
+            }
@@ -0,0 +1,283 @@
+"""
+Embedding Processor Module
+
+Purpose: Turn chunks into embedding vectors, fast, without losing track of failures
+
+What this does:
+1. Sanitizes each chunk's text (chunks that end up empty are recorded as failed)
+2. Groups chunks into batches (one batched /api/embed request each)
+3. Runs batches on a small worker pool with a cap on requests in flight,
+   because Ollama can serve several embedding requests in parallel
+4. Returns vectors in ORIGINAL chunk order, as one float32 matrix
+
+Chunks can be a list OR a stream (any iterable, e.g. a generator that is
+still extracting pages). Chunks are only pulled from the stream when there
+is room in the window of batches in flight, so a fast producer waits for
+Ollama instead of piling up chunks in memory (backpressure). Vectors are
+written straight into a preallocated float32 buffer (VectorBuffer) rather
+than collected as a list of rows and copied at the end.
+
+If the OllamaClient has an EmbeddingCache, chunks whose text was embedded
+before (same model) are served from it; pass a CacheStats to count this
+run's hits and misses.
+
+With an IngestCheckpoint, every fully successful batch is saved as a
+shard; a rerun loads those shards instead of calling Ollama again.
+
+Failure handling is the same as the old one-at-a-time loop:
+- If a batch fails, its chunks are retried one by one
+- Each chunk that still fails is written to FAILED_EMBED_{chunk_id}.txt
+  and listed in failed_chunks
+
+Python concepts used:
+- concurrent.futures.ThreadPoolExecutor (threads are fine here: the work is
+  waiting on HTTP, and the pooled OllamaClient is thread-safe)
+- collections.deque as a bounded, in-order "window" of pending futures
+- Generators: the chunk stream is consumed lazily, one batch at a time
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.rag.checkpoint import IngestCheckpoint
+from app.rag.disk_cache import CacheStats
+from app.rag.ollama_client import OllamaClient
+from app.rag.sanitize import sanitize_text_for_embedding
+from app.rag.types import Chunk
+
+
+@dataclass
+class EmbeddingResult:
+    """Output of embed_chunks(): kept chunks line up 1:1 with vector rows."""
+    vectors: np.ndarray                     # (len(kept_chunks), dim) float32
+    kept_chunks: List[Chunk] = field(default_factory=list)
+    failed_chunks: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class VectorBuffer:
+    """
+    A float32 matrix that rows are appended to in place.
+
+    Space for `capacity` rows is allocated up front (once the vector
+    dimension is known, i.e. at the first append); when it fills up it is
+    doubled. array() is a view of the filled rows - no final copy.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._capacity = max(int(capacity), 64)
+        self._data: Optional[np.ndarray] = None
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def extend(self, rows: np.ndarray) -> None:
+        rows = np.asarray(rows, dtype="float32")
+        if self._data is None:
+            self._data = np.empty((self._capacity, rows.shape[1]), dtype="float32")
+        needed = self._rows + len(rows)
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data)), self._data.shape[1]), dtype="float32")
+            grown[:self._rows] = self._data[:self._rows]
+            self._data = grown
+        self._data[self._rows:needed] = rows
+        self._rows = needed
+
+    def array(self) -> np.ndarray:
+        """(rows, dim) float32, C-contiguous (FAISS-ready)."""
+        if self._data is None:
+            return np.empty((0, 0), dtype="float32")
+        return self._data[:self._rows]
+
+
+# One batch's outcome: (chunk, vector row or None, error message or None) per chunk
+_BatchOutcome = List[Tuple[Chunk, Optional[np.ndarray], Optional[str]]]
+
+
+def _embed_batch(
+    ollama: OllamaClient,
+    embedding_model: str,
+    batch: List[Tuple[Chunk, str]],
+    debug_dir: Optional[Path],
+    cache_stats: Optional[CacheStats] = None,
+) -> _BatchOutcome:
+    """Embed one batch; on failure fall back to per-chunk calls so one bad chunk only costs itself."""
+    try:
+        rows = ollama.embed_many(
+            embedding_model,
+            [text for _, text in batch],
+            batch_size=len(batch),
+            stats=cache_stats,
+        )
+        return [(chunk, rows[i], None) for i, (chunk, _) in enumerate(batch)]
+    except Exception as e:
+        print(f"  ⚠ Batch failed ({e}); retrying {len(batch)} chunks one at a time")
+
+    outcome: _BatchOutcome = []
+    for chunk, safe_text in batch:
+        try:
+            vec = ollama.embed(embedding_model, safe_text)
+            outcome.append((chunk, np.asarray(vec, dtype="float32"), None))
+        except Exception as e:
+            # Save the problematic text for debugging
+            if debug_dir is not None:
+                debug_path = debug_dir / f"FAILED_EMBED_{chunk.chunk_id}.txt"
+                try:
+                    debug_path.write_text(safe_text, encoding="utf-8", errors="replace")
+                except Exception:
+                    pass  # If we can't even save the debug file, just continue
+            outcome.append((chunk, None, str(e)))
+    return outcome
+
+
+def embed_chunks(
+    ollama: OllamaClient,
+    chunks: Iterable[Chunk],
+    embedding_model: str,
+    debug_dir: Optional[Path] = None,
+    batch_size: int = 32,
+    workers: int = 4,
+    max_in_flight: int = 8,
+    max_chars: int = 4000,
+    cache_stats: Optional[CacheStats] = None,
+    checkpoint: Optional[IngestCheckpoint] = None,
+    progress: Optional[Callable[..., None]] = None,
+    capacity_hint: int = 0,
+) -> EmbeddingResult:
+    """
+    Embed chunks with a bounded pool of concurrent batch requests.
+
+    Args:
+        ollama: Shared (pooled) OllamaClient
+        chunks: Chunks to embed, in the order they should appear in the index
+                (a list, or a stream that is consumed as batches free up)
+        embedding_model: e.g. "nomic-embed-text:latest"
+        debug_dir: Where FAILED_EMBED_{chunk_id}.txt files go (usually the policy dir)
+        batch_size: Chunks per /api/embed request
+        workers: Worker threads, i.e. max requests Ollama sees at once
+        max_in_flight: Max batches submitted but not yet collected; bounds memory
+                       and keeps the pool from racing far ahead of the collector
+        max_chars: Per-chunk cap passed to sanitize_text_for_embedding
+        cache_stats: Optional counters for embedding-cache hits/misses in this run
+        checkpoint: Optional IngestCheckpoint; finished batches are saved as
+                    shards and reused on a rerun (batch_size must match)
+        progress: Optional callback, called as progress("embed", done, total, "chunks")
+                  after every batch (total is None while a stream is still open)
+        capacity_hint: Expected number of chunks; the vector buffer is
+                       preallocated for this many rows
+
+    Returns:
+        EmbeddingResult with vectors in original chunk order (failed chunks removed)
+    """
+    kept_chunks: List[Chunk] = []
+    failed_chunks: List[Dict[str, Any]] = []
+    if capacity_hint <= 0 and isinstance(chunks, list):
+        capacity_hint = len(chunks)
+    vectors = VectorBuffer(capacity_hint)
+
+    max_in_flight = max(1, max_in_flight, workers)
+    n_pending = 0        # chunks sent (or to be sent) to the model so far
+    total = None         # known once the chunk stream is exhausted
+    n_batches = 0
+    done = 0
+    chunks_done = 0
+    resumed = 0
+    if progress is not None:
+        progress("embed", 0, None, "chunks")
+
+    def batches() -> Iterator[List[Tuple[Chunk, str]]]:
+        """Sanitize and batch chunks lazily; chunks that sanitize to nothing are recorded as failed."""
+        nonlocal n_pending, total, n_batches
+        batch: List[Tuple[Chunk, str]] = []
+        for chunk in chunks:
+            safe_text = sanitize_text_for_embedding(chunk.text, max_chars=max_chars)
+            if not safe_text:
+                failed_chunks.append({
+                    "page": chunk.page,
+                    "chunk_id": chunk.chunk_id,
+                    "error": "Empty after sanitization",
+                })
+                continue
+            n_pending += 1
+            batch.append((chunk, safe_text))
+            if len(batch) == batch_size:
+                n_batches += 1
+                yield batch
+                batch = []
+        if batch:
+            n_batches += 1
+            yield batch
+        total = n_pending
+
+    def collect(batch_no: int, outcome: _BatchOutcome, from_checkpoint: bool = False) -> None:
+        nonlocal done, chunks_done
+        ok_rows = []
+        for chunk, vec, error in outcome:
+            if vec is None:
+                failed_chunks.append({"page": chunk.page, "chunk_id": chunk.chunk_id, "error": error})
+            else:
+                kept_chunks.append(chunk)
+                ok_rows.append(vec)
+        if ok_rows:
+            vectors.extend(np.vstack(ok_rows))
+        # Only all-success batches are checkpointed, so failures get retried on a rerun
+        if checkpoint is not None and not from_checkpoint and len(ok_rows) == len(outcome):
+            checkpoint.save_embed_shard(
+                batch_no,
+                [chunk.chunk_id for chunk, _, _ in outcome],
+                vectors.array()[-len(ok_rows):],
+            )
+        done += 1
+        chunks_done += len(outcome)
+        if progress is not None:
+            progress("embed", chunks_done, total, "chunks")
+        so_far = f"{done}/{n_batches}" if total is not None else f"{done}"
+        print(f"  Embedded batch {so_far} ({len(kept_chunks)} chunks so far)")
+
+    # Futures are kept in submission order and collected from the left,
+    # so results come back in original chunk order no matter which
+    # worker finishes first. Batches restored from the checkpoint sit in
+    # the same window as already-finished outcomes.
+    window: Deque[Tuple[int, Any]] = deque()
+
+    def collect_next() -> None:
+        batch_no, item = window.popleft()
+        if isinstance(item, Future):
+            collect(batch_no, item.result())
+        else:
+            collect(batch_no, item, from_checkpoint=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # The next batch is only pulled from the stream once the window has
+        # room, so producers upstream never run far ahead of Ollama.
+        for batch_no, batch in enumerate(batches()):
+            if len(window) >= max_in_flight:
+                collect_next()
+            if checkpoint is not None:
+                saved = checkpoint.load_embed_shard(batch_no, [chunk.chunk_id for chunk, _ in batch])
+                if saved is not None:
+                    window.append((batch_no, [(chunk, saved[i], None) for i, (chunk, _) in enumerate(batch)]))
+                    resumed += 1
+                    continue
+            window.append((
+                batch_no,
+                pool.submit(_embed_batch, ollama, embedding_model, batch, debug_dir, cache_stats),
+            ))
+        while window:
+            collect_next()
+
+    if resumed:
+        print(f"  ✓ Resumed {resumed}/{n_batches} batches from checkpoint")
+
+    return EmbeddingResult(
+        vectors=vectors.array(),
+        kept_chunks=kept_chunks,
+        failed_chunks=failed_chunks,
+    )
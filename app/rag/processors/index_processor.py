@@ -0,0 +1,169 @@
+"""
+Index Processor Module
+
+Purpose: Build the FAISS vector index that fits the size of the policy
+
+A flat index (IndexFlatIP) compares the question against EVERY chunk and
+keeps the full float32 matrix in memory. That is perfect for a normal
+policy (a few thousand chunks) but slow and memory-hungry for very large
+corpora, so the index type is chosen from the corpus size unless set
+explicitly:
+
+    "flat"      exact search                        < 20,000 vectors
+    "hnsw"      graph search, fast + high recall    < 250,000 vectors
+    "ivf_flat"  clustered (inverted lists) search   < 1,000,000 vectors
+    "ivf_pq"    clustered + compressed vectors      >= 1,000,000 vectors
+
+All types use inner product on L2-normalized vectors (= cosine similarity),
+so scores mean the same thing regardless of the type.
+
+Training (IVF centroids, PQ codebooks) happens inside build_index(). If the
+corpus is too small to train the requested type, we fall back to the next
+simpler one and say so in the returned info.
+
+Query-time knobs:
+- nprobe    (IVF types) clusters to visit; higher = better recall, slower
+- ef_search (HNSW) candidate list size; higher = better recall, slower
+Both are saved in the index file with sensible defaults and can be
+overridden per search without touching the shared index.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("auto", "flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Corpus-size thresholds for index_type="auto"
+FLAT_MAX = 20_000
+HNSW_MAX = 250_000
+IVF_FLAT_MAX = 1_000_000
+
+HNSW_M = 32                 # graph neighbors per node
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+# FAISS wants ~39 training points per centroid - IVF cluster centroids and
+# PQ codebook centroids alike (2**_PQ_BITS of those per sub-quantizer)
+_MIN_POINTS_PER_CENTROID = 39
+_PQ_BITS = 8
+_PQ_MIN_TRAIN = _MIN_POINTS_PER_CENTROID * 2 ** _PQ_BITS  # 9,984
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Pick an index type from the corpus size (see table in module docstring)."""
+    if n_vectors < FLAT_MAX:
+        return "flat"
+    if n_vectors < HNSW_MAX:
+        return "hnsw"
+    if n_vectors < IVF_FLAT_MAX:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def _nlist_for(n_vectors: int) -> int:
+    """IVF cluster count: ~4*sqrt(n), capped so every centroid gets enough training points."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // _MIN_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """
+    Largest sub-quantizer count <= dim/4 that divides dim (e.g. 768 -> 192).
+
+    4 dims per 1-byte code = 16x smaller than float32; coarser codes (8 dims
+    per byte) cost too much recall on embedding-like data (see benchmark).
+    """
+    for m in range(max(1, dim // 4), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def build_index(vectors: np.ndarray, index_type: str = "auto") -> Tuple[Any, Dict[str, Any]]:
+    """
+    Build (and train, if needed) a FAISS index over L2-normalized vectors.
+
+    Args:
+        vectors: (n, dim) float32, already normalized with faiss.normalize_L2
+        index_type: One of INDEX_TYPES ("auto" picks from corpus size)
+
+    Returns:
+        (index, info) where info is JSON-ready for metadata.json, e.g.
+        {"index_type": "ivf_flat", "index_params": {"nlist": 800, "nprobe": 16}}
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index_type {index_type!r}; expected one of {INDEX_TYPES}")
+
+    n, dim = vectors.shape
+    requested = index_type
+    if index_type == "auto":
+        index_type = choose_index_type(n)
+
+    # Fall back when there is not enough data to train the requested type
+    if index_type == "ivf_pq" and n < _PQ_MIN_TRAIN:
+        index_type = "ivf_flat"
+    if index_type in ("ivf_flat", "ivf_pq") and n < 2 * _MIN_POINTS_PER_CENTROID:
+        index_type = "flat"
+
+    params: Dict[str, Any] = {}
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        params = {"M": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef_search": HNSW_EF_SEARCH}
+
+    else:
+        nlist = _nlist_for(n)
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            m = _pq_subquantizers(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, _PQ_BITS, faiss.METRIC_INNER_PRODUCT)
+            params["pq_m"] = m
+        index.train(vectors)
+        index.nprobe = max(1, nlist // 16)
+        params.update({"nlist": nlist, "nprobe": int(index.nprobe)})
+
+    index.add(vectors)
+
+    info: Dict[str, Any] = {"index_type": index_type, "index_params": params}
+    if requested != index_type and requested != "auto":
+        info["index_type_requested"] = requested
+    return index, info
+
+
+def search_index(
+    index,
+    queries: np.ndarray,
+    k: int,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    index.search() with optional per-call nprobe / ef_search.
+
+    Overrides go through FAISS SearchParameters, so the shared (cached)
+    index is never mutated and concurrent searches don't interfere.
+    Knobs that don't apply to the index type are ignored.
+    """
+    params = None
+    # IndexIDMap wrappers (global index) keep the real index in .index
+    base = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+
+    if nprobe is not None and isinstance(base, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(nprobe=int(nprobe))
+    elif ef_search is not None and isinstance(base, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(efSearch=int(ef_search))
+
+    if params is None:
+        return index.search(queries, k)
+    return index.search(queries, k, params=params)
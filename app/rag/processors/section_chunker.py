@@ -0,0 +1,293 @@
+"""
+Section Chunker Module
+
+Purpose: Split policy/ordinance pages into chunks that follow the document's
+own structure instead of fixed 900-character windows
+
+chunk_pages() cuts every 900 characters, so a chunk can start mid-sentence,
+end mid-word, and mix the tail of one section with the head of the next.
+Retrieval then needs more (and bigger) chunks to see a whole rule. This
+chunker:
+
+1. Recognizes headings - "Article IV", "CHAPTER 7", "Part 2",
+   "Sec. 2303", "Section 4.2", "§ 12-3" - and never lets a chunk run across
+   one. The current heading path ("Article IV > Sec. 4.2 Setbacks") is
+   stored on every chunk as Chunk.section, and carries over page breaks.
+2. Treats numbered/lettered list items ("(a)", "1.", "b)", "•") and blank
+   lines as paragraph breaks.
+3. Splits paragraphs into sentences (without breaking on "Sec. 12" or
+   "N.C. Gen. Stat.") and packs whole sentences into a chunk until the
+   token budget is reached. A sentence longer than the budget is split
+   on word boundaries.
+4. Starts the next chunk with the last sentence of the previous one
+   (overlap, within a token budget) - but never across a heading.
+
+Chunks never span pages (each chunk cites one page). Each character is
+looked at a constant number of times, and pages are handled as they come,
+so it works on a stream of pages:
+
+    for chunk in iter_section_chunks(iter_pdf_pages(pdf_path)):
+        ...
+
+Tokens are estimated at ~4 characters each (see estimate_tokens), which
+is close enough for budgeting English text with nomic/llama tokenizers.
+
+Python concepts used:
+- Compiled regular expressions (re.compile) for headings/list items/sentences
+- A small class that keeps state (current section) between pages
+- Generators (iter_section_chunks yields chunks as pages arrive)
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from app.rag.types import Chunk, Page
+
+
+# Average characters per token for English prose
+CHARS_PER_TOKEN = 4
+
+# Longest line we still accept as a heading (longer = body text that
+# happens to start with "Section 4 ...")
+_MAX_HEADING_CHARS = 150
+
+# Longest section path stored on a chunk
+_MAX_SECTION_CHARS = 200
+
+# Top-level divisions: Article / Chapter / Part / Division / Title + number
+_DIVISION_RE = re.compile(
+    r"(?:ARTICLE|Article|CHAPTER|Chapter|PART|Part|DIVISION|Division|TITLE|Title)"
+    r"\s+(?:[IVXLC]+|\d+[A-Z]?)\b"
+)
+
+# Sections: "Sec. 2303", "SECTION 4.2", "Section 12-3", "§ 5", "§§ 4-6"
+_SECTION_RE = re.compile(
+    r"(?:SECTION|Section|SEC\.|Sec\.|§{1,2})\s*\d+(?:[.\-]\d+)*[A-Za-z]?(?=[\s.:\-–—]|$)"
+)
+
+# List items at the start of a line: "(a)", "(12)", "a)", "1.", "iv.", "•", "-"
+_LIST_ITEM_RE = re.compile(r"(?:\(\w{1,4}\)|\w{1,3}\)|\d{1,3}\.(?!\d)|[ivx]{1,4}\.|[•▪●\-–*])\s")
+
+# End of a sentence: . ! ? (maybe followed by a closing quote/bracket) then space
+_SENTENCE_END_RE = re.compile(r"[.!?][\"'”’)\]]*\s+")
+
+# Words whose trailing period doesn't end a sentence
+_ABBREVIATIONS = frozenset({
+    "sec", "secs", "no", "nos", "art", "ch", "chap", "para", "subsec", "gen",
+    "stat", "stats", "ord", "dept", "govt", "co", "corp", "inc", "ltd", "st",
+    "ave", "rd", "blvd", "mr", "mrs", "ms", "dr", "jr", "sr", "vs", "etc",
+    "e.g", "i.e", "approx", "max", "min", "ft", "sq", "fig", "vol", "pp",
+    "u.s", "n.c", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep",
+    "sept", "oct", "nov", "dec",
+})
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), never 0 for non-empty text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _heading(line: str) -> Optional[Tuple[int, str]]:
+    """(level, title) if the line is a heading: 0 = division, 1 = section."""
+    if len(line) > _MAX_HEADING_CHARS:
+        return None
+    if _DIVISION_RE.match(line):
+        return 0, line
+    if _SECTION_RE.match(line):
+        return 1, line
+    return None
+
+
+def _split_sentences(paragraph: str) -> Iterator[str]:
+    """Yield the sentences of one paragraph (whitespace already collapsed)."""
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(paragraph):
+        end = match.end()
+        # Next sentence must start like one (capital, digit, bracket, quote)
+        if end < len(paragraph) and not (paragraph[end].isupper() or paragraph[end] in "0123456789(\"'“§"):
+            continue
+        # Word before the period: abbreviation or single letter (initials) = not an end
+        # (clamped to this sentence: no space before means it is the first word)
+        word_start = max(start, paragraph.rfind(" ", start, match.start()) + 1)
+        word = paragraph[word_start:match.start()].lstrip("(\"'“").lower()
+        if paragraph[match.start()] == "." and (len(word) <= 1 or word in _ABBREVIATIONS):
+            continue
+        yield paragraph[start:match.end()].rstrip()
+        start = end
+    if start < len(paragraph):
+        yield paragraph[start:]
+
+
+def _split_long(sentence: str, max_chars: int) -> Iterator[str]:
+    """Cut a sentence longer than max_chars on word boundaries (hard cut if no spaces)."""
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        yield sentence[:cut].rstrip()
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        yield sentence
+
+
+class SectionChunker:
+    """
+    Stateful chunker: feed it pages in order, get chunks back.
+
+    The current section path is remembered between pages, so a section
+    that continues onto the next page keeps its title.
+
+    Args:
+        max_tokens: Token budget per chunk (default 256, ~1000 characters)
+        overlap_tokens: Up to this many tokens of trailing sentences are
+                        repeated at the start of the next chunk in the same
+                        section (default 48; 0 disables overlap)
+    """
+
+    def __init__(self, max_tokens: int = 256, overlap_tokens: int = 48):
+        if max_tokens <= 0:
+            raise ValueError(f"max_tokens must be positive, got {max_tokens}")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError(f"overlap_tokens must be in [0, max_tokens), got {overlap_tokens}")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self._sections: List[str] = ["", ""]  # [division, section]
+
+    @property
+    def section(self) -> str:
+        return " > ".join(s for s in self._sections if s)[:_MAX_SECTION_CHARS]
+
+    def _set_heading(self, level: int, title: str) -> None:
+        self._sections[level] = title
+        # A new Article resets the section below it
+        for deeper in range(level + 1, len(self._sections)):
+            self._sections[deeper] = ""
+
+    def chunk_page(self, page: Page) -> List[Chunk]:
+        """Chunks for one page, in reading order (chunk ids p{page}_c{n})."""
+        chunks: List[Chunk] = []
+        parts: List[str] = []    # pieces of the chunk being built
+        tokens = 0               # estimated tokens in parts (incl. joins)
+        fresh = 0                # parts that are not overlap from the previous chunk
+        body = 0                 # fresh parts that are not heading lines
+        max_chars = self.max_tokens * CHARS_PER_TOKEN
+
+        def flush(keep_overlap: bool) -> None:
+            nonlocal parts, tokens, fresh, body
+            if fresh:
+                chunks.append(Chunk(
+                    chunk_id=f"p{page.page_num}_c{len(chunks)}",
+                    page=page.page_num,
+                    text="\n".join(parts).replace("\n ", " ").strip(),
+                    section=self.section,
+                ))
+            carried: List[str] = []
+            if keep_overlap and fresh and self.overlap_tokens:
+                budget = self.overlap_tokens
+                for part in reversed(parts):
+                    cost = estimate_tokens(part) + 1
+                    if cost > budget:
+                        break
+                    carried.insert(0, part)
+                    budget -= cost
+            parts = carried
+            tokens = sum(estimate_tokens(p) + 1 for p in carried)
+            fresh = body = 0
+
+        def add(sentence: str, new_paragraph: bool, is_heading: bool) -> None:
+            nonlocal tokens, fresh, body
+            for piece in _split_long(sentence, max_chars):
+                cost = estimate_tokens(piece) + 1
+                if tokens + cost > self.max_tokens:
+                    flush(keep_overlap=True)
+                    if tokens + cost > self.max_tokens:
+                        # Overlap + this piece don't fit: drop the overlap
+                        parts.clear()
+                        tokens = 0
+                # Parts are joined with "\n"; a leading space marks "same paragraph"
+                parts.append(piece if (new_paragraph or not parts) else " " + piece)
+                tokens += cost
+                fresh += 1
+                body += not is_heading
+                new_paragraph = False
+
+        paragraph: List[str] = []
+
+        def end_paragraph(is_heading: bool = False) -> None:
+            if paragraph:
+                first = True
+                for sentence in _split_sentences(" ".join(paragraph)):
+                    add(sentence, new_paragraph=first, is_heading=is_heading)
+                    first = False
+                paragraph.clear()
+
+        heading_level: Optional[int] = None  # set right after a heading line
+        for raw_line in (page.text or "").splitlines():
+            line = " ".join(raw_line.split())
+            if not line:
+                end_paragraph()
+                continue
+            # An all-caps line right under a division heading is its title:
+            # "ARTICLE IV" / "ZONING DISTRICTS" -> "ARTICLE IV ZONING DISTRICTS"
+            # - unless it is a heading itself ("SEC. 4.1 SETBACKS" in an all-caps
+            # code). Section headings carry their title on the same line, so an
+            # all-caps line under one is body text.
+            if (
+                heading_level == 0
+                and line.isupper()
+                and len(line) <= _MAX_HEADING_CHARS
+                and _heading(line) is None
+            ):
+                self._sections[heading_level] += " " + line
+                paragraph.append(line)
+                end_paragraph(is_heading=True)
+                continue
+            heading_level = None
+            # Only a line that starts a paragraph can be a heading; a wrapped
+            # line that happens to begin with "Chapter 160D ..." is body text
+            starts_paragraph = not paragraph or paragraph[-1].endswith((".", ":", ";", "!", "?"))
+            heading = _heading(line) if starts_paragraph else None
+            if heading is not None:
+                end_paragraph()
+                if body:
+                    flush(keep_overlap=False)
+                elif not fresh:
+                    # Only overlap from the previous section: don't carry it over
+                    parts.clear()
+                    tokens = 0
+                # else: only heading lines so far ("ARTICLE IV" then "Sec. 4.1")
+                # - keep them at the top of the chunk instead of a chunk of their own
+                heading_level, title = heading
+                self._set_heading(heading_level, title)
+                paragraph.append(line)
+                end_paragraph(is_heading=True)
+                continue
+            if _LIST_ITEM_RE.match(line + " "):
+                end_paragraph()
+            paragraph.append(line)
+        end_paragraph()
+        flush(keep_overlap=False)
+        return chunks
+
+
+def iter_section_chunks(
+    pages: Iterable[Page],
+    max_tokens: int = 256,
+    overlap_tokens: int = 48,
+) -> Iterator[Chunk]:
+    """
+    Structure-aware chunks for a stream of pages (see module docstring).
+
+    Args:
+        pages: Pages in order (a list, or e.g. iter_pdf_pages(pdf_path))
+        max_tokens: Token budget per chunk
+        overlap_tokens: Token budget for sentences repeated from the previous chunk
+
+    Yields:
+        Chunk objects with chunk_id "p{page}_c{n}", page, text and section
+    """
+    chunker = SectionChunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    for page in pages:
+        yield from chunker.chunk_page(page)
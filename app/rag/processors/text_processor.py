@@ -4,8 +4,8 @@ Text Processor Module
 Purpose: Extract and chunk text from PDF documents for RAG (Retrieval Augmented Generation)
 
 What this does:
-1. Opens PDF files using PyMuPDF (fitz)
-2. Extracts text from each page
+1. Opens PDF files using PyMuPDF (fitz), via app/rag/pdf_extract.py
+2. Extracts text from each page (big PDFs in parallel worker processes)
 3. Splits text into overlapping chunks (for better retrieval)
 4. Returns structured chunk data ready for embedding
 
@@ -17,21 +17,54 @@ Python concepts used here:
 
 from __future__ import annotations  # Allows us to use modern type hints
 
-from typing import List  # For type hints - says "this returns a list of X"
-import fitz  # PyMuPDF - library for reading PDF files
+from typing import Iterator, List, Optional  # For type hints - says "this returns a list of X"
+
+# Page extraction engine (splits big PDFs across worker processes)
+from app.rag.pdf_extract import iter_page_texts
 
 # Import our data models from types.py
 from app.rag.types import Page, Chunk
 
+# Shared text cleaner (kept importable from here for existing callers)
+from app.rag.sanitize import sanitize_text_for_embedding  # noqa: F401
+
 
 # =============================================================================
 # TEXT EXTRACTION FUNCTIONS
 # =============================================================================
 
+def iter_pdf_pages(pdf_path: str, workers: Optional[int] = None) -> Iterator[Page]:
+    """
+    Extract text from a PDF as a stream of pages, in page order.
+    
+    Large PDFs are split into page ranges that several worker processes
+    extract at the same time (see app/rag/pdf_extract.py). Pages are handed
+    back as soon as they are ready, so you can start chunking page 1 while
+    later pages are still being extracted.
+    
+    Args:
+        pdf_path: Full path to the PDF file
+        workers: Number of worker processes (default: PDF_EXTRACT_WORKERS)
+    
+    Yields:
+        Page objects (page_num is 1-based), first page first
+    
+    Example:
+        for page in iter_pdf_pages("/data/ordinance.pdf"):
+            chunks.extend(chunk_pages([page]))
+    """
+    # iter_page_texts() gives us (page_number, text) pairs - wrap them in Page objects
+    for page_num, text in iter_page_texts(pdf_path, workers=workers):
+        yield Page(page_num=page_num, text=text)
+
+
 def extract_pdf_pages(pdf_path: str) -> List[Page]:
     """
     Extract text from a PDF file, one page at a time.
     
+    This collects everything from iter_pdf_pages() into a list. Use
+    iter_pdf_pages() directly if you want to process pages as they arrive.
+    
     Args:
         pdf_path: Full path to the PDF file (example: "/data/policy.pdf")
     
@@ -45,86 +78,13 @@ def extract_pdf_pages(pdf_path: str) -> List[Page]:
         # pages[0].page_num = 1
         # pages[0].text = "Policy Document\nSection 1..."
     """
-    # Open the PDF file - fitz.open() gives us a document object
-    doc = fitz.open(pdf_path)
-    
-    # Create an empty list to store our Page objects
-    pages: List[Page] = []
-    
-    # Loop through each page in the PDF
-    # enumerate() gives us both the index (i) and the page object
-    # enumerate() starts counting at 0, but we want page numbers starting at 1
-    for i, page in enumerate(doc):
-        # Extract all text from this page
-        # If there's no text, we get empty string instead of None
-        text = page.get_text() or ""
-        
-        # Create a Page object and add it to our list
-        # i+1 because Python counts from 0, but humans count pages from 1
-        pages.append(Page(page_num=i + 1, text=text))
-    
-    # Always close the document when done (frees up memory)
-    doc.close()
-    
-    return pages
+    return list(iter_pdf_pages(pdf_path))
 
 
 # =============================================================================
 # TEXT CHUNKING FUNCTIONS
 # =============================================================================
 
-def sanitize_text_for_embedding(text: str, max_chars: int = 4000) -> str:
-    """
-    Clean up text so it's safe to send to embedding models.
-    
-    Why we need this:
-    - PDFs often have weird characters (NULL bytes, control characters)
-    - Embedding models can crash on bad characters
-    - We need to limit size so we don't exceed model limits
-    
-    Args:
-        text: Raw text from PDF (might have junk characters)
-        max_chars: Maximum length (default 4000 chars)
-    
-    Returns:
-        Clean text that's safe for embedding models
-    
-    Example:
-        dirty = "Hello\x00World\x01"  # Has NULL and control chars
-        clean = sanitize_text_for_embedding(dirty)
-        # Result: "Hello World"
-    """
-    # If text is empty or None, just return empty string
-    if not text:
-        return ""
-    
-    # Step 1: Remove NULL bytes (the \x00 character)
-    # NULL bytes crash many text processors
-    safe = text.replace("\x00", " ")
-    
-    # Step 2: Remove other control characters (ASCII values below 32)
-    # BUT keep newline (\n) and tab (\t) because those are useful
-    # 
-    # This is a "generator expression" - it's like a for loop inside a function
-    # For each character: if it's safe, keep it; otherwise replace with space
-    safe = "".join(
-        ch if (ch == "\n" or ch == "\t" or ord(ch) >= 32) else " "
-        for ch in safe
-    )
-    
-    # Step 3: Normalize whitespace (collapse multiple spaces into one)
-    # split() with no arguments splits on any whitespace
-    # join() puts them back together with single spaces
-    safe = " ".join(safe.split())
-    
-    # Step 4: Enforce maximum length (truncate if too long)
-    if len(safe) > max_chars:
-        safe = safe[:max_chars]  # Slice notation: take first max_chars characters
-    
-    # Step 5: Remove leading/trailing whitespace
-    return safe.strip()
-
-
 def chunk_pages(
     pages: List[Page],
     chunk_size: int = 900,
@@ -133,6 +93,9 @@ def chunk_pages(
     """
     Split pages into overlapping text chunks.
     
+    Fixed character windows; the ingestion pipeline uses the structure-aware
+    chunker in section_chunker.py instead.
+    
     Why overlapping chunks?
     - Important information might span chunk boundaries
     - Overlap ensures we don't "split" a key sentence in half
@@ -158,6 +121,10 @@ def chunk_pages(
         Chunk 1: chars 750-1650  (starts 150 before previous chunk ended)
         Chunk 2: chars 1500-2000 (starts 150 before previous chunk ended)
     """
+    # overlap >= chunk_size would never move forward (infinite loop)
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(f"overlap must be in [0, chunk_size), got overlap={overlap}, chunk_size={chunk_size}")
+    
     # Create empty list to collect all chunks from all pages
     chunks: List[Chunk] = []
     
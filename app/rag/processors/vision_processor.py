@@ -6,6 +6,7 @@ Purpose: Extract images from PDFs and generate text descriptions using AI vision
 What this does:
 1. Opens PDF files and extracts all images
 2. Filters out tiny/decorative images (logos, bullets, etc.)
+   and merges repeated ones (the same seal or header on every page)
 3. Sends meaningful images to llama3.2-vision AI model
 4. Gets back text descriptions that can be embedded and searched
 5. Creates "image chunks" that work just like text chunks in RAG
@@ -16,31 +17,91 @@ Why this matters:
 - Vision AI can "read" images and describe what they show
 - We convert visual information into searchable text
 
+Speed:
+- A vision call takes 10-30 s, so several images are described at once
+  on a small thread pool (Ollama can serve parallel requests)
+- Images are sent the way the PDF stores them when the model can read
+  that format; only images too large for the model (llama3.2-vision sees
+  at most 1120 x 1120) or in other formats are shrunk / re-encoded, to
+  the smallest of JPEG and PNG (see app/rag/image_prep.py)
+- Descriptions are cached by (vision model, prompt version, sha256 of the
+  image) in a VisionCache: re-ingesting a policy, or a logo/org chart that
+  appears in many policies (or many times in one), is described only once
+- Within one PDF, repeated images are merged before any vision call: the
+  same embedded image (same xref) on many pages, and near-identical copies
+  (a 64-bit dHash within a few bits), become ONE image chunk that cites
+  every page it appears on (Chunk.other_pages)
+
 Python concepts used:
 - Context managers (the "with" keyword for safe resource handling)
 - Dictionaries (key-value pairs like {"page": 5, "index": 2})
 - Try/except for error handling
 - PIL (Python Imaging Library) for image manipulation
+- concurrent.futures.ThreadPoolExecutor + a deque window (same pattern as
+  embedding_processor) to keep a bounded number of vision calls running
 """
 
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, List, Dict, Any, Optional, Tuple
 from pathlib import Path
+import base64
 import io  # For working with bytes in memory
+import time
 
 import fitz  # PyMuPDF for PDF reading
+import numpy as np
 from PIL import Image  # Python Imaging Library for image manipulation
 
 # Import our Ollama client for vision model calls
 from app.rag.ollama_client import OllamaClient
+from app.rag.checkpoint import IngestCheckpoint
+from app.rag.disk_cache import VisionCache, VisionStats
+from app.rag.image_prep import prepare_image
 from app.rag.types import Chunk
 
 
+# The prompt every image is described with. Cached descriptions are keyed
+# by VISION_PROMPT_VERSION: bump it whenever the prompt text, or the way
+# images are prepared for the model (image_prep), changes.
+VISION_PROMPT = (
+    "Describe this image in detail for document search purposes. "
+    "Focus on the content, structure, and key information shown. "
+    "If it's a chart or diagram, explain what it represents. "
+    "If it contains text, include that text in your description."
+)
+VISION_PROMPT_VERSION = "v2"
+
+
 # =============================================================================
 # IMAGE EXTRACTION FUNCTIONS
 # =============================================================================
 
+# Two images whose dHashes differ in at most this many of 64 bits are
+# treated as the same picture (re-encoded / slightly rescaled copies)
+DHASH_MAX_DISTANCE = 4
+
+# ...and only if their aspect ratios are within this fraction of each other
+_MAX_ASPECT_DIFFERENCE = 0.1
+
+
+def dhash(pil_image: Image.Image) -> int:
+    """
+    64-bit difference hash ("dHash") of an image.
+    
+    The image is shrunk to 9x8 grayscale pixels, and each bit says whether
+    a pixel is brighter than its right-hand neighbour. Re-encoding, small
+    rescales and compression noise barely change it, so copies of the same
+    picture have hashes only a few bits apart (see DHASH_MAX_DISTANCE).
+    """
+    small = pil_image.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]  # 8x8 booleans
+    return int(np.packbits(bits).view(">u8")[0])
+
+
 def extract_images_from_pdf(pdf_path: str, min_size: int = 10000) -> List[Dict[str, Any]]:
     """
     Extract all meaningful images from a PDF file.
@@ -48,6 +109,11 @@ def extract_images_from_pdf(pdf_path: str, min_size: int = 10000) -> List[Dict[s
     Filters out tiny images (decorative elements, bullets, small logos).
     Only returns images large enough to contain actual information.
     
+    An image object that the PDF places on several pages (same xref - a
+    header graphic or seal) is extracted once; its record lists every page
+    it appears on. Near-identical copies stored as separate objects are
+    merged afterwards by dedupe_images().
+    
     Args:
         pdf_path: Path to the PDF file
         min_size: Minimum image size in bytes (default 10KB)
@@ -55,18 +121,23 @@ def extract_images_from_pdf(pdf_path: str, min_size: int = 10000) -> List[Dict[s
     
     Returns:
         List of dictionaries, each containing:
-        - page: Page number (1-based)
+        - page: Page number (1-based) of the first appearance
         - index: Image number on that page (0-based)
-        - image_bytes: The actual image data (PNG format)
+        - pages: Every page the image appears on (sorted, includes page)
+        - image_bytes: The image data exactly as stored in the PDF (JPEG,
+                       PNG, ...) - prepare_image() shrinks/re-encodes it
+                       right before a vision call, and only if needed
         - width: Image width in pixels
         - height: Image height in pixels
         - size_bytes: Image size in bytes
+        - dhash: 64-bit perceptual hash (see dhash())
+        - duplicates: Further appearances of this image merged into the record
     
     Example:
         images = extract_images_from_pdf("policy.pdf")
         # Result: [
-        #   {"page": 3, "index": 0, "image_bytes": b"...", "width": 800, "height": 600},
-        #   {"page": 5, "index": 0, "image_bytes": b"...", "width": 1024, "height": 768},
+        #   {"page": 3, "index": 0, "pages": [3], "image_bytes": b"...", "width": 800, "height": 600, ...},
+        #   {"page": 5, "index": 0, "pages": [5, 6, 7], "image_bytes": b"...", "width": 1024, "height": 768, ...},
         # ]
     """
     # Open the PDF document
@@ -75,6 +146,9 @@ def extract_images_from_pdf(pdf_path: str, min_size: int = 10000) -> List[Dict[s
     # List to collect all extracted images
     extracted_images: List[Dict[str, Any]] = []
     
+    # xref -> record already extracted (None = skipped: too small or broken)
+    seen_xrefs: Dict[int, Optional[Dict[str, Any]]] = {}
+    
     # Loop through each page in the PDF
     # enumerate(doc, start=1) gives us page numbers starting at 1 (not 0)
     for page_num, page in enumerate(doc, start=1):
@@ -89,6 +163,16 @@ def extract_images_from_pdf(pdf_path: str, min_size: int = 10000) -> List[Dict[s
             # img[0] is the xref (cross-reference number - PDF's way of identifying objects)
             xref = img[0]
             
+            # Same image object as on an earlier page: just note this page too
+            if xref in seen_xrefs:
+                record = seen_xrefs[xref]
+                if record is not None:
+                    record["duplicates"] += 1
+                    if record["pages"][-1] != page_num:
+                        record["pages"].append(page_num)
+                continue
+            seen_xrefs[xref] = None
+            
             # Get the image bytes and metadata from the PDF
             try:
                 # extract_image() returns a dictionary with image data
@@ -107,31 +191,31 @@ def extract_images_from_pdf(pdf_path: str, min_size: int = 10000) -> List[Dict[s
                 if len(image_bytes) < min_size:
                     continue  # Skip this image, move to next one
                 
-                # Convert image to PNG format (standardized format for vision models)
-                # This ensures consistent input regardless of original format (JPEG, etc.)
+                # Keep the original bytes (no PNG re-encode here); PIL only
+                # decodes the image to compute its perceptual hash
                 try:
                     # Open the image bytes as a PIL Image object
                     pil_image = Image.open(io.BytesIO(image_bytes))
                     
-                    # Convert to PNG format in memory
-                    png_buffer = io.BytesIO()  # Create in-memory buffer
-                    pil_image.save(png_buffer, format="PNG")  # Save as PNG
-                    png_bytes = png_buffer.getvalue()  # Get the bytes
-                    
                     # Store all the image information
-                    extracted_images.append({
+                    record = {
                         "page": page_num,
                         "index": img_index,
-                        "image_bytes": png_bytes,
-                        "width": width,
-                        "height": height,
-                        "size_bytes": len(png_bytes),
-                    })
+                        "pages": [page_num],
+                        "image_bytes": image_bytes,
+                        "width": width or pil_image.width,
+                        "height": height or pil_image.height,
+                        "size_bytes": len(image_bytes),
+                        "dhash": dhash(pil_image),
+                        "duplicates": 0,
+                    }
+                    extracted_images.append(record)
+                    seen_xrefs[xref] = record
                 
                 except Exception as img_error:
-                    # If image conversion fails, skip it and continue
+                    # If the image can't be decoded, skip it and continue
                     # (Some PDFs have corrupted/unsupported image formats)
-                    print(f"Warning: Could not convert image on page {page_num}, index {img_index}: {img_error}")
+                    print(f"Warning: Could not decode image on page {page_num}, index {img_index}: {img_error}")
                     continue
             
             except Exception as extract_error:
@@ -145,6 +229,54 @@ def extract_images_from_pdf(pdf_path: str, min_size: int = 10000) -> List[Dict[s
     return extracted_images
 
 
+def dedupe_images(
+    images: List[Dict[str, Any]],
+    max_distance: int = DHASH_MAX_DISTANCE,
+) -> List[Dict[str, Any]]:
+    """
+    Merge near-identical images (as returned by extract_images_from_pdf).
+    
+    Two images are the same picture if their dHashes differ in at most
+    max_distance bits and their aspect ratios match (within 10%). The first
+    one (in page order) is kept; the pages of the others are added to its
+    "pages" list and their appearances to its "duplicates" count.
+    
+    Args:
+        images: Image records in page order (with "dhash" and "pages")
+        max_distance: Largest Hamming distance between dHashes still
+                      treated as a copy (0 = identical hashes only)
+    
+    Returns:
+        The kept image records, in page order
+    """
+    kept: List[Dict[str, Any]] = []
+    if not images:
+        return kept
+    
+    # All pairwise Hamming distances at once: XOR the hashes, count the 1 bits
+    hashes = np.array([img["dhash"] for img in images], dtype=np.uint64)
+    aspects = np.array(
+        [img["width"] / img["height"] if img["width"] and img["height"] else 0.0 for img in images]
+    )
+    kept_rows: List[int] = []
+    for i, img in enumerate(images):
+        if kept_rows:
+            rows = np.array(kept_rows)
+            xor = (hashes[rows] ^ hashes[i]).view(np.uint8).reshape(len(rows), 8)
+            distance = np.unpackbits(xor, axis=1).sum(axis=1)
+            same_shape = np.abs(aspects[rows] - aspects[i]) <= _MAX_ASPECT_DIFFERENCE * np.maximum(aspects[rows], 1e-9)
+            matches = np.flatnonzero((distance <= max_distance) & same_shape)
+            if len(matches):
+                # Closest match wins
+                original = kept[int(matches[np.argmin(distance[matches])])]
+                original["pages"] = sorted(set(original["pages"]) | set(img["pages"]))
+                original["duplicates"] += 1 + img["duplicates"]
+                continue
+        kept_rows.append(i)
+        kept.append(img)
+    return kept
+
+
 # =============================================================================
 # VISION AI DESCRIPTION FUNCTIONS
 # =============================================================================
@@ -180,24 +312,14 @@ def describe_image_with_vision(
         try:
             # Convert image bytes to base64 (text encoding of binary data)
             # Vision models expect base64-encoded images
-            import base64
             image_base64 = base64.b64encode(image_bytes).decode("utf-8")
             
-            # Create the vision prompt
-            # This tells the AI what kind of description we want
-            prompt = (
-                "Describe this image in detail for document search purposes. "
-                "Focus on the content, structure, and key information shown. "
-                "If it's a chart or diagram, explain what it represents. "
-                "If it contains text, include that text in your description."
-            )
-            
             # Build the messages array for the vision model
             # Vision models need both text (the prompt) and images
             messages = [
                 {
                     "role": "user",
-                    "content": prompt,
+                    "content": VISION_PROMPT,  # What kind of description we want
                     "images": [image_base64],  # List of base64-encoded images
                 }
             ]
@@ -228,6 +350,59 @@ def describe_image_with_vision(
     return None
 
 
+def describe_image_cached(
+    ollama_client: OllamaClient,
+    image_bytes: bytes,
+    vision_model: str = "llama3.2-vision:11b",
+    vision_cache: Optional[VisionCache] = None,
+    stats: Optional[VisionStats] = None,
+) -> Optional[str]:
+    """
+    describe_image_with_vision() behind the persistent VisionCache.
+    
+    The same image (same bytes), model and prompt version is only ever
+    sent to the vision model once; later calls return the saved text.
+    Successful descriptions are stored; failures are not, so they are
+    retried next time.
+    
+    On a cache miss the image goes through prepare_image() first, so the
+    model gets the smallest encoding at its own input resolution. The
+    cache key is the image as given, so a hit needs no image work at all.
+    
+    Args:
+        vision_cache: VisionCache to read/write (None = always call the model)
+        stats: Optional VisionStats to count hits/misses, model seconds and
+               bytes saved by image preparation
+    """
+    if vision_cache is not None:
+        cached = vision_cache.get_description(vision_model, VISION_PROMPT_VERSION, image_bytes, stats=stats)
+        if cached is not None:
+            description, seconds = cached
+            if stats is not None:
+                stats.add_seconds(saved=seconds)
+            return description
+    elif stats is not None:
+        stats.add(misses=1)
+    
+    try:
+        prepared = prepare_image(image_bytes)
+    except Exception as e:
+        print(f"Warning: Could not prepare image for the vision model: {e}")
+        return None
+    if stats is not None:
+        stats.add_bytes(original=prepared.original_bytes, sent=len(prepared.data))
+    
+    started = time.perf_counter()
+    description = describe_image_with_vision(ollama_client, prepared.data, vision_model=vision_model)
+    seconds = time.perf_counter() - started
+    if stats is not None:
+        stats.add_seconds(spent=seconds)
+    
+    if description and vision_cache is not None:
+        vision_cache.put_description(vision_model, VISION_PROMPT_VERSION, image_bytes, description, seconds)
+    return description
+
+
 # =============================================================================
 # IMAGE CHUNK CREATION FUNCTIONS
 # =============================================================================
@@ -237,14 +412,21 @@ def create_image_chunks(
     pdf_path: str,
     vision_model: str = "llama3.2-vision:11b",
     min_image_size: int = 10000,
+    checkpoint: Optional[IngestCheckpoint] = None,
+    progress: Optional[Callable[..., None]] = None,
+    vision_cache: Optional[VisionCache] = None,
+    vision_stats: Optional[VisionStats] = None,
+    workers: int = 2,
 ) -> List[Chunk]:
     """
     Extract images from PDF and create searchable "image chunks".
     
     This is the high-level function that:
-    1. Extracts all images from the PDF
-    2. Describes each image with the vision model
-    3. Creates Chunk objects (just like text chunks)
+    1. Extracts all images from the PDF, merging repeated ones
+    2. Describes each image with the vision model (several at once; cached
+       images are not sent again)
+    3. Creates Chunk objects (just like text chunks); an image repeated on
+       several pages becomes one chunk listing them in other_pages
     4. Returns chunks ready to be embedded and indexed
     
     Args:
@@ -252,6 +434,15 @@ def create_image_chunks(
         pdf_path: Path to the PDF file
         vision_model: Which vision model to use
         min_image_size: Minimum image size to process (bytes)
+        checkpoint: Optional IngestCheckpoint; each description is saved as
+                    soon as it arrives, and images described in an earlier
+                    (interrupted) run are not sent to the vision model again
+        progress: Optional callback, called as progress("vision", done, total, "images")
+        vision_cache: Optional VisionCache shared across policies and re-ingests
+        vision_stats: Optional VisionStats; counts cache hits, merged
+                      repeated images and vision seconds
+        workers: Vision calls running at the same time (default 2); keep it
+                 at or below Ollama's OLLAMA_NUM_PARALLEL
     
     Returns:
         List of Chunk objects where:
@@ -268,30 +459,44 @@ def create_image_chunks(
     """
     # Step 1: Extract all images from the PDF
     print(f"Extracting images from {pdf_path}...")
-    images = extract_images_from_pdf(pdf_path, min_size=min_image_size)
+    images = dedupe_images(extract_images_from_pdf(pdf_path, min_size=min_image_size))
+    repeated = sum(img["duplicates"] for img in images)
+    
+    print(
+        f"Found {len(images)} images (filtered for size > {min_image_size} bytes"
+        f"{f'; {repeated} repeats merged' if repeated else ''})"
+    )
+    
+    # Descriptions saved by an interrupted earlier run (chunk_id -> text)
+    already_described = checkpoint.load_image_descriptions() if checkpoint is not None else {}
+    if already_described:
+        print(f"Resuming: {len(already_described)} images already described")
     
-    print(f"Found {len(images)} images (filtered for size > {min_image_size} bytes)")
+    stats = vision_stats if vision_stats is not None else VisionStats()
+    stats.add_duplicates(repeated)
     
-    # Step 2: Describe each image and create chunks
+    # Step 2: Describe the images on a small pool of threads, and create chunks
     image_chunks: List[Chunk] = []
+    if progress is not None:
+        progress("vision", 0, len(images), "images")
     
-    for i, img_data in enumerate(images):
-        # Show progress (helpful for large PDFs with many images)
-        print(f"Processing image {i+1}/{len(images)} from page {img_data['page']}...")
-        
-        # Call the vision model to get a description
-        description = describe_image_with_vision(
+    def describe(image_bytes: bytes) -> Optional[str]:
+        return describe_image_cached(
             ollama_client=ollama_client,
-            image_bytes=img_data["image_bytes"],
+            image_bytes=image_bytes,
             vision_model=vision_model,
+            vision_cache=vision_cache,
+            stats=stats,
         )
+    
+    def collect(i: int, img_data: Dict[str, Any], chunk_id: str, result: Any) -> None:
+        # result: a description (or None) - or a Future of one
+        description = result.result() if isinstance(result, Future) else result
         
         # If we got a good description, create a chunk
         if description:
-            # Create chunk ID: "p{page}_img{index}"
-            # Example: "p5_img0" = page 5, image 0
-            chunk_id = f"p{img_data['page']}_img{img_data['index']}"
-            
+            if checkpoint is not None and chunk_id not in already_described:
+                checkpoint.save_image_description(chunk_id, description)
             # Create a Chunk object (same type as text chunks)
             # This means it can be embedded, indexed, and retrieved just like text!
             image_chunks.append(
@@ -299,13 +504,53 @@ def create_image_chunks(
                     chunk_id=chunk_id,
                     page=img_data["page"],
                     text=description,  # The AI description becomes the searchable text
+                    other_pages=img_data["pages"][1:],
                 )
             )
-            
-            print(f"  ✓ Created chunk {chunk_id} ({len(description)} chars)")
+            also = f", also on pages {img_data['pages'][1:]}" if len(img_data["pages"]) > 1 else ""
+            print(f"  ✓ Created chunk {chunk_id} ({len(description)} chars{also})")
         else:
             print(f"  ✗ Failed to describe image on page {img_data['page']}")
+        
+        if progress is not None:
+            progress("vision", i + 1, len(images), "images")
+    
+    # Futures are collected from the left in submission order, so chunks
+    # come out in page order whichever call finishes first
+    window: Deque[Tuple[int, Dict[str, Any], str, Any]] = deque()
+    max_in_flight = max(1, workers) * 2
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for i, img_data in enumerate(images):
+            # Create chunk ID: "p{page}_img{index}"
+            # Example: "p5_img0" = page 5, image 0
+            chunk_id = f"p{img_data['page']}_img{img_data['index']}"
+            
+            # Show progress (helpful for large PDFs with many images)
+            print(f"Processing image {i+1}/{len(images)} from page {img_data['page']}...")
+            
+            if len(window) >= max_in_flight:
+                collect(*window.popleft())
+            
+            description = already_described.get(chunk_id)
+            if description is not None:
+                window.append((i, img_data, chunk_id, description))
+                continue
+            
+            # Call the vision model (or the cache) to get a description
+            window.append((i, img_data, chunk_id, pool.submit(describe, img_data["image_bytes"])))
+        
+        while window:
+            collect(*window.popleft())
     
+    if images:
+        summary = stats.as_dict()
+        print(
+            f"Vision cache: {summary['hits']} hits, {summary['misses']} misses; "
+            f"{summary['seconds_spent']}s in the vision model, ~{summary['seconds_saved']}s saved; "
+            f"{summary['duplicates']} repeated images merged; "
+            f"{summary['bytes_saved'] / 1e6:.1f} MB of image data not sent"
+        )
     print(f"Successfully created {len(image_chunks)} image chunks")
     
     return image_chunks
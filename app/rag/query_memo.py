@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.rag.disk_cache import CacheStats
+
+_Key = Tuple[str, str]
+
+
+class _Flight:
+    """One in-progress upstream call that other threads can wait on."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.vector: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+
+class QueryEmbeddingMemo:
+    """
+    Small in-memory LRU of question embeddings, keyed by (model, exact text).
+
+    Question embeddings sit on the critical path of every /ask; the same
+    question asked again (or by several users at once) should not cost
+    another Ollama round trip.
+
+    Single-flight: when several callers ask for the same uncached key at the
+    same time, only the first one calls Ollama; the others wait for its result
+    (or its exception). Sync callers are coalesced across threads, async
+    callers across tasks on the same event loop.
+
+    Vectors are stored as read-only float32 arrays; callers that modify
+    them (e.g. faiss.normalize_L2) must copy first.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+
+        self._entries: "OrderedDict[_Key, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[_Key, _Flight] = {}
+        self._async_flights: Dict[Tuple[int, _Key], asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: _Key) -> Optional[np.ndarray]:
+        vec = self._entries.get(key)
+        if vec is not None:
+            self._entries.move_to_end(key)
+            self.stats.add(hits=1)
+        return vec
+
+    def _store(self, key: _Key, vector) -> np.ndarray:
+        vec = np.array(vector, dtype="float32").ravel()
+        vec.flags.writeable = False
+        with self._lock:
+            self._entries[key] = vec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vec
+
+    def get_or_compute(self, model: str, text: str, compute: Callable[[], list]) -> np.ndarray:
+        """Cached vector for (model, text); otherwise compute() once, even under concurrency."""
+        key = (model, text)
+        with self._lock:
+            vec = self._lookup(key)
+            if vec is not None:
+                return vec
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.stats.add(misses=1)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self.stats.add(hits=1)
+            return flight.vector
+
+        try:
+            flight.vector = self._store(key, compute())
+            return flight.vector
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_compute(
+        self,
+        model: str,
+        text: str,
+        compute: Callable[[], Awaitable[list]],
+    ) -> np.ndarray:
+        """Async twin of get_or_compute(); concurrent tasks share one awaited call."""
+        key = (model, text)
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+
+        with self._lock:
+            vec = self._lookup(key)
+            if vec is not None:
+                return vec
+            future = self._async_flights.get(flight_key)
+            leader = future is None
+            if leader:
+                future = loop.create_future()
+                self._async_flights[flight_key] = future
+                self.stats.add(misses=1)
+
+        if not leader:
+            try:
+                vec = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # we were cancelled ourselves
+                # The leader was cancelled: take over instead of failing
+                return await self.aget_or_compute(model, text, compute)
+            self.stats.add(hits=1)
+            return vec
+
+        try:
+            vec = self._store(key, await compute())
+            future.set_result(vec)
+            return vec
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't let asyncio warn about it
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                self._async_flights.pop(flight_key, None)
+
+
+# Process-wide memo shared by /ask, /ask-all, /ordinances/ask and rag_core
+query_memo = QueryEmbeddingMemo()
+
+
+def embed_query(ollama, model: str, text: str) -> np.ndarray:
+    """Question embedding via the shared memo (float32, read-only, 1-D)."""
+    return query_memo.get_or_compute(model, text, lambda: ollama.embed(model, text))
+
+
+async def aembed_query(async_ollama, model: str, text: str) -> np.ndarray:
+    """Async question embedding via the shared memo (float32, read-only, 1-D)."""
+    return await query_memo.aget_or_compute(model, text, lambda: async_ollama.embed(model, text))
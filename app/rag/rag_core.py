@@ -6,46 +6,16 @@ import fitz  # PyMuPDF
 import faiss
 import numpy as np
 
+from app.rag.disk_cache import CacheStats
 from app.rag.ollama_client import OllamaClient
+from app.rag.processors.embedding_processor import embed_chunks
+from app.rag.processors.index_processor import build_index
+from app.rag.query_memo import embed_query
+from app.rag.sanitize import sanitize_text_for_embedding
 from app.rag.store import PolicyStore
 from app.rag.types import Page, Chunk
 
 
-# -------------------------
-# Helpers
-# -------------------------
-
-def sanitize_text_for_embedding(text: str, max_chars: int = 4000) -> str:
-    """
-    Make PDF-extracted text safe for embedding calls.
-
-    Deterministic steps:
-    - Remove NUL bytes
-    - Remove other control chars (keep newline/tab)
-    - Normalize whitespace
-    - Cap size
-    """
-    if not text:
-        return ""
-
-    safe = text.replace("\x00", " ")
-
-    # Replace control chars (ASCII < 32) except \n and \t
-    safe = "".join(
-        ch if (ch == "\n" or ch == "\t" or ord(ch) >= 32) else " "
-        for ch in safe
-    )
-
-    # Normalize whitespace
-    safe = " ".join(safe.split())
-
-    # Hard cap
-    if len(safe) > max_chars:
-        safe = safe[:max_chars]
-
-    return safe.strip()
-
-
 # -------------------------
 # PDF extraction
 # -------------------------
@@ -72,6 +42,8 @@ def chunk_pages(
     overlap: int = 150,
 ) -> List[Chunk]:
     """Split pages into overlapping character chunks."""
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(f"overlap must be in [0, chunk_size), got overlap={overlap}, chunk_size={chunk_size}")
     chunks: List[Chunk] = []
 
     for page in pages:
@@ -108,6 +80,7 @@ def ingest_policy(
     policy_id: str,
     pdf_path: str,
     embedding_model: str,
+    index_type: str = "auto",
 ) -> Dict[str, Any]:
     """
     Ingest a policy PDF:
@@ -136,36 +109,16 @@ def ingest_policy(
         )
         return {"policy_id": policy_id, "pages": len(pages), "chunks": 0, "embedding_model": embedding_model}
 
-    vectors: List[List[float]] = []
-    kept_chunks: List[Chunk] = []
-    failed_chunks: List[Dict[str, Any]] = []
-
     policy_dir = store.policy_dir(policy_id)
 
-    for ch in chunks:
-        safe_text = sanitize_text_for_embedding(ch.text, max_chars=4000)
-
-        if not safe_text:
-            failed_chunks.append({"page": ch.page, "chunk_id": ch.chunk_id, "error": "Empty after sanitization"})
-            continue
-
-        try:
-            vec = ollama.embed(embedding_model, safe_text)
-        except Exception as e:
-            # Dump failing text for inspection
-            debug_path = policy_dir / f"FAILED_EMBED_{ch.chunk_id}.txt"
-            try:
-                debug_path.write_text(safe_text, encoding="utf-8", errors="replace")
-            except Exception:
-                pass
-
-            failed_chunks.append({"page": ch.page, "chunk_id": ch.chunk_id, "error": str(e)})
-            continue
-
-        vectors.append(vec)
-        kept_chunks.append(ch)
+    # Batched + cached embedding; failed chunks are recorded and dumped to
+    # FAILED_EMBED_*.txt exactly like the old one-at-a-time loop
+    cache_stats = CacheStats()
+    embedded = embed_chunks(ollama, chunks, embedding_model, debug_dir=policy_dir, cache_stats=cache_stats)
+    kept_chunks = embedded.kept_chunks
+    failed_chunks = embedded.failed_chunks
 
-    if not vectors:
+    if not kept_chunks:
         store.write_metadata(
             policy_id,
             {
@@ -174,6 +127,8 @@ def ingest_policy(
                 "chunks_embedded": 0,
                 "chunks_failed": len(failed_chunks),
                 "embedding_model": embedding_model,
+                "embed_cache_hits": cache_stats.hits,
+                "embed_cache_misses": cache_stats.misses,
                 "failed_chunks_sample": failed_chunks[:25],
                 "note": "All chunks failed embedding; see FAILED_EMBED_*.txt files.",
             },
@@ -184,12 +139,11 @@ def ingest_policy(
         )
 
     # Build FAISS index (cosine-ish via normalized inner product)
-    arr = np.array(vectors, dtype="float32")
+    arr = embedded.vectors
     dim = arr.shape[1]
 
     faiss.normalize_L2(arr)
-    index = faiss.IndexFlatIP(dim)
-    index.add(arr)
+    index, index_info = build_index(arr, index_type=index_type)
 
     store.write_faiss_index(policy_id, index)
     store.write_chunks(policy_id, kept_chunks)
@@ -202,6 +156,9 @@ def ingest_policy(
             "chunks_failed": len(failed_chunks),
             "embedding_model": embedding_model,
             "vector_dim": dim,
+            **index_info,
+            "embed_cache_hits": cache_stats.hits,
+            "embed_cache_misses": cache_stats.misses,
             "failed_chunks_sample": failed_chunks[:25],
         },
     )
@@ -212,6 +169,8 @@ def ingest_policy(
         "chunks": len(kept_chunks),
         "embedding_model": embedding_model,
         "chunks_failed": len(failed_chunks),
+        "embed_cache_hits": cache_stats.hits,
+        "embed_cache_misses": cache_stats.misses,
     }
 
 
@@ -231,10 +190,10 @@ def answer_question(
 ) -> Dict[str, Any]:
     """Retrieve relevant chunks, then answer using ONLY those chunks with citations."""
     index = store.read_faiss_index(policy_id)
-    chunks = store.read_chunks(policy_id)
+    chunks = store.open_chunks(policy_id)
 
     q_text = sanitize_text_for_embedding(question, max_chars=2000)
-    qvec = np.array([ollama.embed(embedding_model, q_text)], dtype="float32")
+    qvec = np.array([embed_query(ollama, embedding_model, q_text)], dtype="float32")
     faiss.normalize_L2(qvec)
 
     scores, idxs = index.search(qvec, top_k)
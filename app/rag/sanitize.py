@@ -0,0 +1,98 @@
+"""
+app/rag/sanitize.py
+
+Make PDF-extracted text safe to send to the embedding model.
+
+This runs once per chunk at ingest and again for every excerpt at query
+time, so it is written to stay in C as much as possible:
+
+- control characters are replaced by ONE compiled regex substitution
+  (instead of a per-character Python generator)
+- whitespace is collapsed with str.split() / str.join()
+- for long texts only a prefix is cleaned when that prefix already
+  yields max_chars characters (see _prefix_len below)
+
+The output is exactly what the old per-character version produced:
+
+    1. NUL bytes and other control characters (ASCII < 32) become spaces;
+       newline and tab are kept
+    2. all whitespace runs collapse to one space (so newlines/tabs go too)
+    3. the result is capped at max_chars and stripped
+
+    sanitize_text_for_embedding("Hello\\x00World\\x01")   # "Hello World"
+    sanitize_texts_for_embedding([c.text for c in chunks], max_chars=300)
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, List
+
+# Control characters that str.split() would NOT treat as whitespace.
+# \t \n \v \f \r and \x1c-\x1f already split, so they can stay as they are.
+_CONTROL_RE = re.compile(r"[\x00-\x08\x0e-\x1b]")
+
+
+def _prefix_len(max_chars: int) -> int:
+    """
+    How much of a long text to clean first.
+
+    Collapsing whitespace only ever shortens text, and the cleaned version
+    of a prefix is a prefix of the cleaned whole text. So if a prefix
+    already cleans to at least max_chars characters, its first max_chars
+    are the answer and the rest of the text never has to be scanned.
+    Twice max_chars leaves room for plenty of whitespace runs.
+    """
+    return 2 * max_chars + 64
+
+
+def _clean(text: str) -> str:
+    return " ".join(_CONTROL_RE.sub(" ", text).split())
+
+
+def sanitize_text_for_embedding(text: str, max_chars: int = 4000) -> str:
+    """
+    Clean up text so it's safe to send to embedding models.
+
+    Why we need this:
+    - PDFs often have weird characters (NULL bytes, control characters)
+    - Embedding models can crash on bad characters
+    - We need to limit size so we don't exceed model limits
+
+    Args:
+        text: Raw text from PDF (might have junk characters)
+        max_chars: Maximum length (default 4000 chars)
+
+    Returns:
+        Clean text that's safe for embedding models
+
+    Example:
+        dirty = "Hello\\x00World\\x01"  # Has NULL and control chars
+        clean = sanitize_text_for_embedding(dirty)
+        # Result: "Hello World"
+    """
+    if not text:
+        return ""
+
+    limit = _prefix_len(max_chars)
+    if len(text) > limit:
+        safe = _clean(text[:limit])
+        if len(safe) < max_chars:
+            # Mostly whitespace/junk - the prefix wasn't enough, clean it all
+            safe = _clean(text)
+    else:
+        safe = _clean(text)
+
+    if len(safe) > max_chars:
+        safe = safe[:max_chars]
+
+    return safe.strip()
+
+
+def sanitize_texts_for_embedding(texts: Iterable[str], max_chars: int = 4000) -> List[str]:
+    """
+    sanitize_text_for_embedding() for a batch of texts (e.g. a list of chunks).
+
+    Same output, one entry per input, in order.
+    """
+    return [sanitize_text_for_embedding(text, max_chars) for text in texts]
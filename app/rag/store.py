@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import json
-from dataclasses import asdict
 from pathlib import Path
 from typing import List
 
 import faiss
 
+from app.rag.chunk_store import ChunkTable, migrate_policy_dir, write_chunk_table, write_chunks_json
+from app.rag.lexical_index import LexicalIndex, build_lexical_index
 from app.rag.types import Chunk
 
 
@@ -17,7 +18,9 @@ class PolicyStore:
     Folder layout:
       data/policies/{policy_id}/
         source.pdf              ← Original uploaded PDF
-        chunks.json             ← Text chunks for RAG
+        chunks.bin              ← Text chunks for RAG (packed, memory-mapped)
+        chunks.json             ← Same chunks as readable JSON (audit export)
+        lexical.bin             ← BM25 inverted index over the same chunks (memory-mapped)
         metadata.json           ← RAG ingestion metadata
         index.faiss             ← Vector search index
       
@@ -71,24 +74,62 @@ class PolicyStore:
     # CHUNKS STORAGE (for RAG)
     # =========================================================================
 
-    def write_chunks(self, policy_id: str, chunks: List[Chunk]) -> Path:
+    def write_chunks(self, policy_id: str, chunks: List[Chunk], export_json: bool = True) -> Path:
         """
-        Save text chunks as JSON for auditing and later retrieval.
+        Save text chunks for retrieval (chunks.bin) and auditing (chunks.json).
         
         These chunks are what the RAG system searches through to answer questions.
+        chunks.bin is the packed, memory-mapped copy queries read from;
+        chunks.json is the same data as readable JSON for audits.
+        
+        The lexical (BM25) index is built from exactly these rows, so it is
+        written here too - before chunks.bin, whose mtime is part of the
+        ingest generation caches compare.
         """
         d = self.policy_dir(policy_id)
-        path = d / "chunks.json"
-        data = [asdict(c) for c in chunks]
-        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
-        return path
+        if export_json:
+            write_chunks_json(d / "chunks.json", chunks)
+        build_lexical_index(d / "lexical.bin", [c.text for c in chunks])
+        return write_chunk_table(d / "chunks.bin", chunks)
+
+    def open_chunks(self, policy_id: str) -> ChunkTable:
+        """
+        Open a policy's chunks for random access by FAISS id (mmap, no parsing).
+        
+        Policies ingested before chunks.bin existed are converted from
+        chunks.json the first time they are opened.
+        """
+        d = self.policy_dir(policy_id)
+        path = d / "chunks.bin"
+        if not path.exists():
+            if not migrate_policy_dir(d):
+                raise FileNotFoundError(f"Chunks not found for policy_id={policy_id}")
+        return ChunkTable(path)
+
+    def open_lexical_index(self, policy_id: str) -> LexicalIndex:
+        """
+        Open a policy's BM25 index (mmap).
+        
+        Policies ingested before lexical.bin existed get one built from
+        their chunk store the first time it is opened.
+        """
+        d = self.policy_dir(policy_id)
+        path = d / "lexical.bin"
+        if not path.exists():
+            table = self.open_chunks(policy_id)
+            build_lexical_index(path, [table.text(i) for i in range(len(table))])
+            table.close()
+        return LexicalIndex(path)
 
     def read_chunks(self, policy_id: str) -> List[Chunk]:
-        """Load previously saved chunks for a policy."""
+        """Load previously saved chunks for a policy (all rows, as Chunk objects)."""
+        table = self.open_chunks(policy_id)
+        return list(table)
+
+    def export_chunks_json(self, policy_id: str) -> Path:
+        """(Re)write chunks.json from chunks.bin, e.g. for an audit request."""
         d = self.policy_dir(policy_id)
-        path = d / "chunks.json"
-        raw = json.loads(path.read_text(encoding="utf-8"))
-        return [Chunk(**item) for item in raw]
+        return write_chunks_json(d / "chunks.json", self.read_chunks(policy_id))
 
     # =========================================================================
     # METADATA STORAGE (for RAG)
@@ -141,6 +182,34 @@ class PolicyStore:
             raise FileNotFoundError(f"FAISS index not found for policy_id={policy_id}")
         return faiss.read_index(str(path))
 
+    # =========================================================================
+    # CACHE SUPPORT (for RAG)
+    # =========================================================================
+
+    def ingest_generation(self, policy_id: str) -> tuple:
+        """
+        Cheap fingerprint of a policy's searchable files (mtime + size).
+
+        Changes whenever the policy is re-ingested, so in-memory caches can
+        compare generations instead of re-reading files. Missing files
+        fingerprint as None.
+        """
+        d = self.root / policy_id
+        gen = []
+        for name in ("index.faiss", "chunks.bin"):
+            try:
+                st = (d / name).stat()
+                gen.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                gen.append(None)
+        return tuple(gen)
+
+    def list_indexed_policies(self) -> List[str]:
+        """Policy IDs that have a FAISS index, most recently ingested first."""
+        indexed = list(self.root.glob("*/index.faiss"))
+        indexed.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        return [p.parent.name for p in indexed]
+
     # =========================================================================
     # ACCESSIBILITY REPORT STORAGE (NEW!)
     # =========================================================================
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List
 
 
 @dataclass
@@ -14,3 +15,5 @@ class Chunk:
     chunk_id: str
     page: int
     text: str
+    section: str = ""  # Heading path, e.g. "Article IV > Sec. 4.2 Setbacks" ("" if unknown)
+    other_pages: List[int] = field(default_factory=list)  # Repeated image: other pages it appears on
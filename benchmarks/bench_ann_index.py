@@ -0,0 +1,91 @@
+"""
+benchmarks/bench_ann_index.py
+
+Recall@k vs per-query latency for each index type built by
+app.rag.processors.index_processor.build_index, on synthetic clustered
+unit vectors (roughly how chunk embeddings behave: many near-duplicates
+around topics). Ground truth is exact search with IndexFlatIP.
+
+For IVF types nprobe is swept; for HNSW efSearch is swept (both via the
+same per-query override /ask uses).
+
+Run from the repo root:
+    python -m benchmarks.bench_ann_index --n 100000 --dim 768 --queries 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from app.rag.processors.index_processor import build_index, search_index
+
+
+def _synthetic(n: int, dim: int, topics: int, seed: int) -> np.ndarray:
+    """Unit vectors scattered around `topics` random centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dim)).astype("float32")
+    labels = rng.integers(0, topics, size=n)
+    x = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(x)
+    return x
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / truth.size
+
+
+def _run(index, queries: np.ndarray, truth: np.ndarray, k: int, **knobs) -> tuple[float, float]:
+    # One query at a time, like /ask does
+    t0 = time.perf_counter()
+    found = np.vstack([search_index(index, q[None, :], k, **knobs)[1] for q in queries])
+    ms = (time.perf_counter() - t0) * 1000.0 / len(queries)
+    return _recall(found, truth), ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = _synthetic(args.n + args.queries, args.dim, args.topics, args.seed)
+    base, queries = data[:args.n], data[args.n:]
+
+    print(f"{args.n} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}\n")
+
+    flat, _ = build_index(base.copy(), "flat")
+    _, truth = flat.search(queries, args.k)
+
+    print(f"  {'index':<10} {'knob':<14} {'build s':>8} {'recall':>8} {'ms/query':>9}")
+    for index_type in ("flat", "hnsw", "ivf_flat", "ivf_pq"):
+        t0 = time.perf_counter()
+        index, info = build_index(base.copy(), index_type)
+        build_s = time.perf_counter() - t0
+        params = info["index_params"]
+
+        if info["index_type"] == "hnsw":
+            sweep = [("ef_search", v) for v in (16, 32, 64, 128, 256)]
+        elif info["index_type"] in ("ivf_flat", "ivf_pq"):
+            nlist = params["nlist"]
+            sweep = [("nprobe", v) for v in sorted({1, 4, params["nprobe"], nlist // 4 or 1, nlist})]
+        else:
+            sweep = [(None, None)]
+
+        for knob, value in sweep:
+            kwargs = {knob: value} if knob else {}
+            recall, ms = _run(index, queries, truth, args.k, **kwargs)
+            label = f"{knob}={value}" if knob else "-"
+            print(f"  {info['index_type']:<10} {label:<14} {build_s:8.2f} {recall:8.3f} {ms:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+benchmarks/bench_ingest_memory.py
+
+Peak memory of the streaming ingest pipeline as the PDF grows.
+
+Each size runs in a fresh Python process: a synthetic text-heavy PDF is
+generated, then ingest_policy_with_vision() runs against the stub Ollama
+(vision off). The peak RSS it writes to metadata.json is printed next to
+the size of what the ingest must keep anyway (chunk texts + float32
+vectors), so growth beyond that is easy to spot.
+
+Run from the repo root:
+    python -m benchmarks.bench_ingest_memory --pages 50 200 800
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _one(pages: int, dim: int) -> None:
+    """Child process: ingest a `pages`-page PDF, print one JSON line."""
+    from app.rag.ollama_client import OllamaClient
+    from app.rag.pipelines.ingestion_pipeline import ingest_policy_with_vision
+    from app.rag.store import PolicyStore
+    from benchmarks.bench_pdf_extract import _make_pdf
+    from benchmarks.stub_ollama import StubOllama
+
+    with tempfile.TemporaryDirectory() as tmp, StubOllama(dim=dim) as stub:
+        pdf = Path(tmp) / "synthetic.pdf"
+        _make_pdf(pdf, pages, lines=90)
+        store = PolicyStore(root_dir=str(Path(tmp) / "policies"))
+        client = OllamaClient(base_url=stub.url)
+
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = ingest_policy_with_vision(store, client, "bench", str(pdf), "stub", enable_vision=False)
+        elapsed = time.perf_counter() - t0
+
+        meta = store.read_metadata("bench")
+        text_bytes = sum(len(c.text.encode("utf-8")) for c in store.read_chunks("bench"))
+        print(json.dumps({
+            "pages": pages,
+            "chunks": result["chunks"],
+            "seconds": elapsed,
+            "peak_rss_mb": meta["peak_rss_mb"],
+            "kept_mb": (text_bytes + result["chunks"] * dim * 4) / 1e6,
+        }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one is not None:
+        _one(args.one, args.dim)
+        return
+
+    print(f"{'pages':>6} {'chunks':>7} {'seconds':>8} {'peak RSS MB':>12} {'texts+vectors MB':>17}")
+    for pages in args.pages:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_ingest_memory", "--one", str(pages), "--dim", str(args.dim)],
+            capture_output=True, text=True, check=True,
+        )
+        row = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{row['pages']:>6} {row['chunks']:>7} {row['seconds']:>8.1f} "
+              f"{row['peak_rss_mb']:>12.1f} {row['kept_mb']:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
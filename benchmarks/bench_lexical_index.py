@@ -0,0 +1,112 @@
+"""
+benchmarks/bench_lexical_index.py
+
+Size and query latency of the BM25 lexical index (app.rag.lexical_index)
+on a synthetic corpus: Zipf-distributed words plus section references
+("Sec. 2303", "ZO-14.2") so exact-term lookups have something to find.
+
+Reports:
+  - build time, lexical.bin size (total and bytes per chunk) next to the
+    size of the same texts as raw UTF-8
+  - open time (mmap, no parsing)
+  - BM25 ms/query (p50 / p95) for keyword and section-number queries
+  - reciprocal-rank fusion cost for two candidate lists
+
+Run from the repo root:
+    python -m benchmarks.bench_lexical_index --chunks 50000 --queries 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.rag.lexical_index import LexicalIndex, build_lexical_index, fuse_rrf
+
+
+def _corpus(n: int, words_per_chunk: int, vocab: int, seed: int) -> tuple[list[str], list[str]]:
+    """Synthetic chunk texts and the words they were drawn from."""
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    ranks = rng.zipf(1.3, size=(n, words_per_chunk)) % vocab
+    texts = []
+    for i, row in enumerate(ranks):
+        text = " ".join(words[r] for r in row)
+        if i % 10 == 0:
+            text += f" Sec. {1000 + i % 5000} ZO-{i % 97}.{i % 7}"
+        texts.append(text)
+    return texts, words
+
+
+def _percentiles(samples_ms: list[float]) -> str:
+    p50, p95 = np.percentile(samples_ms, [50, 95])
+    return f"p50 {p50:7.3f} ms   p95 {p95:7.3f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--words", type=int, default=180, help="Words per chunk")
+    parser.add_argument("--vocab", type=int, default=30_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=24, help="Candidates per query (top_k x 4 in /ask)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts, words = _corpus(args.chunks, args.words, args.vocab, args.seed)
+    raw_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    rng = np.random.default_rng(args.seed + 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "lexical.bin"
+
+        t0 = time.perf_counter()
+        build_lexical_index(path, texts)
+        build_s = time.perf_counter() - t0
+        size = path.stat().st_size
+
+        t0 = time.perf_counter()
+        lex = LexicalIndex(path)
+        open_ms = (time.perf_counter() - t0) * 1000.0
+
+        print(f"{args.chunks} chunks x {args.words} words, {lex.n_terms} terms\n")
+        print(f"  build            {build_s:8.2f} s")
+        print(f"  lexical.bin      {size / 1e6:8.2f} MB  ({size / args.chunks:.0f} B/chunk, "
+              f"{size / raw_bytes:.2f}x raw text)")
+        print(f"  open (mmap)      {open_ms:8.3f} ms\n")
+
+        query_sets = {
+            "keywords (4 words)": [
+                " ".join(words[int(r) % args.vocab] for r in rng.zipf(1.3, size=4))
+                for _ in range(args.queries)
+            ],
+            "section number": [
+                f"What does Sec. {1000 + int(rng.integers(0, 5000))} require?"
+                for _ in range(args.queries)
+            ],
+        }
+        for name, queries in query_sets.items():
+            samples = []
+            for q in queries:
+                t0 = time.perf_counter()
+                lex.search(q, args.k)
+                samples.append((time.perf_counter() - t0) * 1000.0)
+            print(f"  {'BM25 ' + name:<26} {_percentiles(samples)}")
+
+        samples = []
+        for _ in range(args.queries):
+            a = rng.choice(args.chunks, size=args.k, replace=False).tolist()
+            b = rng.choice(args.chunks, size=args.k, replace=False).tolist()
+            t0 = time.perf_counter()
+            fuse_rrf([a, b], args.k // 4)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        print(f"  {f'RRF fusion (2 x {args.k})':<26} {_percentiles(samples)}")
+        lex.close()
+
+
+if __name__ == "__main__":
+    main()
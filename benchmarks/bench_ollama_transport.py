@@ -0,0 +1,79 @@
+"""
+benchmarks/bench_ollama_transport.py
+
+Per-call latency of OllamaClient.embed against a local stub Ollama server:
+
+  before : a brand-new httpx.Client per call (the old behavior)
+  after  : the pooled, keep-alive client owned by OllamaClient
+
+Run from the repo root:
+    python -m benchmarks.bench_ollama_transport --calls 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import httpx
+
+from app.rag.ollama_client import OllamaClient
+from benchmarks.stub_ollama import StubOllama
+
+
+def _per_call_client_embed(base_url: str, model: str, text: str) -> list[float]:
+    """Replica of the pre-pooling embed(): one client (and TCP connection) per call."""
+    with httpx.Client(timeout=120.0) as client:
+        resp = client.post(f"{base_url}/api/embeddings", json={"model": model, "prompt": text})
+    resp.raise_for_status()
+    return resp.json()["embedding"]
+
+
+def _time_calls(fn, calls: int) -> list[float]:
+    timings = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        fn(f"chunk number {i} of a policy document")
+        timings.append((time.perf_counter() - t0) * 1000.0)
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"  {label:<24} mean={statistics.mean(timings):7.3f} ms  "
+        f"p50={statistics.median(timings):7.3f} ms  p95={p95:7.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    model = "nomic-embed-text:latest"
+
+    with StubOllama(dim=args.dim) as stub:
+        print(f"Stub Ollama at {stub.url} ({args.calls} embed calls, dim={args.dim})")
+
+        before = lambda text: _per_call_client_embed(stub.url, model, text)  # noqa: E731
+        _time_calls(before, args.warmup)
+        before_timings = _time_calls(before, args.calls)
+
+        with OllamaClient(base_url=stub.url) as client:
+            after = lambda text: client.embed(model, text)  # noqa: E731
+            _time_calls(after, args.warmup)
+            after_timings = _time_calls(after, args.calls)
+
+    _report("before (client per call)", before_timings)
+    _report("after  (pooled client)", after_timings)
+    speedup = statistics.mean(before_timings) / statistics.mean(after_timings)
+    print(f"  speedup: {speedup:.2f}x per call")
+
+
+if __name__ == "__main__":
+    main()
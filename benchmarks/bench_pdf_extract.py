@@ -0,0 +1,81 @@
+"""
+benchmarks/bench_pdf_extract.py
+
+Serial vs. page-range-parallel text extraction (app.rag.pdf_extract) on a
+synthetic text-heavy PDF, or on a PDF you pass in.
+
+Reports, per worker count:
+  - total extraction time and pages/s
+  - time to first page (how soon chunking can start)
+and checks that every run returns exactly the serial output.
+
+Run from the repo root:
+    python -m benchmarks.bench_pdf_extract --pages 400 --workers 1 2 4
+    python -m benchmarks.bench_pdf_extract --pdf path/to/ordinance.pdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from app.rag.pdf_extract import iter_page_texts, shutdown_pool
+
+
+def _make_pdf(path: Path, pages: int, lines: int) -> None:
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        text = "\n".join(
+            f"Sec. {p + 1}.{i}  Lots abutting a collector street shall provide {i * 7 % 90} feet of frontage."
+            for i in range(lines)
+        )
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=6)
+    doc.save(str(path))
+    doc.close()
+
+
+def _run(pdf: str, workers: int) -> tuple[float, float, list]:
+    t0 = time.perf_counter()
+    first = None
+    out = []
+    for item in iter_page_texts(pdf, workers=workers):
+        if first is None:
+            first = time.perf_counter() - t0
+        out.append(item)
+    return time.perf_counter() - t0, first or 0.0, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="Existing PDF (default: generate one)")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=90, help="Text lines per generated page")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = args.pdf
+        if pdf is None:
+            pdf = str(Path(tmp) / "synthetic.pdf")
+            _make_pdf(Path(pdf), args.pages, args.lines)
+
+        _, _, reference = _run(pdf, workers=1)
+        print(f"{pdf}: {len(reference)} pages\n")
+
+        for workers in args.workers:
+            if workers > 1:
+                _run(pdf, workers)  # start the pool so start-up isn't timed
+            total, first, out = _run(pdf, workers)
+            same = "ok" if out == reference else "MISMATCH"
+            print(f"  workers={workers:<3} {total:7.2f} s  {len(out) / total:8.1f} pages/s  "
+                  f"first page {first * 1000:8.1f} ms  output {same}")
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+benchmarks/bench_plat_vision.py
+
+End-to-end latency of extract_from_plat_image_async (plat_vision_extractor)
+in each vision mode, against a local stub Ollama server:
+
+  two_pass   : Pass 1 (fields) then Pass 2 (observations)
+  concurrent : both passes at once
+  fused      : one schema-constrained call returning both
+
+The stub models a vision call as a fixed prefill cost (--prefill-s, the
+image is most of the prompt) plus a per-word decode cost (--token-s), and
+serves at most --parallel chat requests at once (OLLAMA_NUM_PARALLEL).
+The stub replies with plausible JSON, so parsing and SubmissionData
+hydration are part of the measurement. Every mode is run with parallel=1
+and with the given --parallel, because "concurrent" only helps when
+Ollama actually serves requests in parallel. On a real GPU parallel
+requests share compute, so treat the concurrent numbers as a best case.
+
+Sample plats are synthetic line drawings at several sheet sizes, or pass
+your own scans with --plats.
+
+Run from the repo root:
+    python -m benchmarks.bench_plat_vision --runs 3
+    python -m benchmarks.bench_plat_vision --plats scans/plat1.tif scans/plat2.png
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from app.rag.departments.planning.plat_vision_extractor import (
+    PLAT_VISION_MODES,
+    _FIELD_KEYS,
+    extract_from_plat_image_async,
+)
+from app.rag.ollama_client import AsyncOllamaClient
+from benchmarks.stub_ollama import StubOllama
+
+_OBSERVATIONS = [
+    "Lot 4 appears to have no street frontage - it may be a landlocked parcel.",
+    "A cul-de-sac is visible but no diameter dimension is labeled.",
+    "Contour lines appear to be present but the interval is not labeled.",
+    "No utility statement or note about water/sewer service was found.",
+    "The drainage easement width along the rear lot lines is not dimensioned.",
+    "Lots 11 and 12 appear to be under one acre but show no square footage.",
+]
+
+
+def _fake_fields(rng: random.Random) -> dict:
+    """About half the fields filled, with values of the right kind."""
+    fields = {}
+    for key in _FIELD_KEYS:
+        if rng.random() < 0.5:
+            fields[key] = None
+        elif key.startswith(("has_", "in_")) or key.endswith(("_present", "_shown")):
+            fields[key] = rng.random() < 0.5
+        elif key.endswith(("_ft", "_inches", "_in", "_acres", "_sqft", "acreage")):
+            fields[key] = round(rng.uniform(10, 500), 1)
+        elif key.endswith(("_lots", "_served", "_units", "lots")):
+            fields[key] = rng.randrange(1, 60)
+        else:
+            fields[key] = "Oak Ridge Estates Phase 2"
+    return fields
+
+
+def _reply(payload: dict) -> str:
+    """What the vision model would answer to each of the three prompts."""
+    rng = random.Random(0)
+    if isinstance(payload.get("format"), dict):
+        return json.dumps({"fields": _fake_fields(rng), "observations": _OBSERVATIONS})
+    if payload["messages"][0]["content"].lstrip().startswith("You are an expert NC-licensed"):
+        return json.dumps(_fake_fields(rng))
+    return json.dumps(_OBSERVATIONS)
+
+
+def _synthetic_plat(width: int, height: int, seed: int) -> bytes:
+    """A white sheet with lot lines, a title block and dimension labels (PNG)."""
+    rng = random.Random(seed)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for _ in range(width // 10):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.line((x, y, x + rng.randrange(-300, 300), y + rng.randrange(-300, 300)), fill=0, width=2)
+    for _ in range(width // 20):
+        draw.text((rng.randrange(width), rng.randrange(height)), f"{rng.uniform(50, 400):.2f}'", fill=0)
+    draw.rectangle((width - width // 4, height - height // 6, width - 20, height - 20), outline=0, width=4)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def _time_mode(client: AsyncOllamaClient, plats: list[bytes], mode: str, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        for plat in plats:
+            t0 = time.perf_counter()
+            result = await extract_from_plat_image_async(
+                ollama_client=client,
+                image_bytes=plat,
+                submission_type="preliminary_plan",
+                mode=mode,
+            )
+            timings.append(time.perf_counter() - t0)
+            assert result["extracted_fields"], f"{mode}: no fields parsed"
+            assert result["planner_observations"], f"{mode}: no observations parsed"
+    return timings
+
+
+async def _run(args: argparse.Namespace, plats: list[bytes]) -> None:
+    print(f"{'parallel':>8}  {'mode':<11}{'mean s':>9}{'p50 s':>9}{'max s':>9}{'chat calls':>12}")
+    for parallel in sorted({1, args.parallel}):
+        for mode in PLAT_VISION_MODES:
+            with StubOllama(
+                delay_s=args.prefill_s,
+                token_delay_s=args.token_s,
+                chat_reply_fn=_reply,
+                parallel=parallel,
+            ) as stub:
+                client = AsyncOllamaClient(base_url=stub.url)
+                try:
+                    timings = await _time_mode(client, plats, mode, args.runs)
+                finally:
+                    await client.aclose()
+                calls = stub.calls.get("/api/chat", 0)
+            print(
+                f"{parallel:>8}  {mode:<11}{statistics.mean(timings):>9.2f}"
+                f"{statistics.median(timings):>9.2f}{max(timings):>9.2f}{calls:>12}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plats", nargs="*", type=Path, help="plat images to use instead of synthetic ones")
+    parser.add_argument("--runs", type=int, default=2, help="passes over the sample plats per mode")
+    parser.add_argument("--prefill-s", type=float, default=1.0, help="stub seconds per vision call (image prefill)")
+    parser.add_argument("--token-s", type=float, default=0.002, help="stub seconds per reply word (decode)")
+    parser.add_argument("--parallel", type=int, default=2, help="stub OLLAMA_NUM_PARALLEL to compare with 1")
+    args = parser.parse_args()
+
+    if args.plats:
+        plats = [path.read_bytes() for path in args.plats]
+    else:
+        # 24x36" sheet at 100 dpi, a letter-size scan, a small export
+        plats = [_synthetic_plat(w, h, seed) for seed, (w, h) in enumerate([(3600, 2400), (1700, 1100), (900, 600)])]
+    print(f"{len(plats)} plats, prefill {args.prefill_s}s/call, decode {args.token_s * 1000:.1f}ms/word\n")
+    asyncio.run(_run(args, plats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+benchmarks/bench_sanitize.py
+
+Throughput of sanitize_text_for_embedding (app.rag.sanitize) against the
+old per-character version it replaced, in MB/s of input text.
+
+Before timing anything, both versions are run on randomly generated
+strings (control characters, Unicode whitespace, non-ASCII letters, all
+lengths around max_chars) and must agree exactly; any difference stops
+the run with the offending input.
+
+Reports, for chunk-sized texts (ingest) and 300-char excerpts (query time):
+  - old / new MB/s and the speedup
+  - the batch API (sanitize_texts_for_embedding) on the same texts
+
+Run from the repo root:
+    python -m benchmarks.bench_sanitize --texts 20000 --check 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from typing import Callable, List
+
+from app.rag.sanitize import sanitize_text_for_embedding, sanitize_texts_for_embedding
+
+
+def _reference(text: str, max_chars: int = 4000) -> str:
+    """The original implementation, kept here as the equivalence oracle."""
+    if not text:
+        return ""
+    safe = text.replace("\x00", " ")
+    safe = "".join(
+        ch if (ch == "\n" or ch == "\t" or ord(ch) >= 32) else " "
+        for ch in safe
+    )
+    safe = " ".join(safe.split())
+    if len(safe) > max_chars:
+        safe = safe[:max_chars]
+    return safe.strip()
+
+
+# Characters the generator draws from: every ASCII control char, Unicode
+# whitespace that str.split() knows about, plain and non-ASCII letters
+_ALPHABET = (
+    [chr(c) for c in range(32)]
+    + [" ", "\x7f", "\x85", "\xa0", " ", "　"]
+    + list("abcdefghijklmnopqrstuvwxyz0123456789.,§-")
+    + ["é", "ß", "中", "​", "﻿"]
+)
+
+
+def _random_text(rng: random.Random, max_chars: int) -> str:
+    # Lengths cluster around the cap (and twice it) where truncation happens
+    n = rng.choice([0, 1, rng.randrange(64), max_chars + rng.randrange(-8, 9),
+                    2 * max_chars + rng.randrange(-8, 80), rng.randrange(6 * max_chars + 1)])
+    # Sometimes mostly whitespace, so the prefix shortcut has to fall back
+    space_bias = rng.random()
+    return "".join(
+        rng.choice(" \n\t\r") if rng.random() < space_bias else rng.choice(_ALPHABET)
+        for _ in range(max(n, 0))
+    )
+
+
+def check_equivalence(cases: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for i in range(cases):
+        max_chars = rng.choice([1, 5, 40, 300, 2000, 4000])
+        text = _random_text(rng, max_chars)
+        want = _reference(text, max_chars)
+        got = sanitize_text_for_embedding(text, max_chars)
+        if got != want:
+            sys.exit(f"MISMATCH (case {i}, max_chars={max_chars}):\n  input {text!r}\n"
+                     f"  want  {want!r}\n  got   {got!r}")
+    print(f"equivalence: {cases} random cases identical to the old implementation\n")
+
+
+def _corpus(n: int, chars: int, seed: int) -> List[str]:
+    """PDF-like text: words, line breaks, the odd NUL / form feed / control char."""
+    rng = random.Random(seed)
+    words = ["the", "county", "shall", "permit", "Sec.", "2303", "zoning", "district",
+             "ordinance", "§", "résumé", "setback", "feet", "(a)", "lot"]
+    texts = []
+    for _ in range(n):
+        parts: List[str] = []
+        size = 0
+        while size < chars:
+            word = rng.choice(words)
+            sep = rng.choices([" ", "\n", "  ", "\t", "\x00", "\x0c", "\x07"],
+                              weights=[80, 10, 4, 2, 1, 1, 1])[0]
+            parts.append(word + sep)
+            size += len(word) + 1
+        texts.append("".join(parts))
+    return texts
+
+
+def _mbps(fn: Callable[[], object], n_bytes: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return n_bytes / best / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=10_000)
+    parser.add_argument("--chars", type=int, default=900, help="Characters per text (chunk size)")
+    parser.add_argument("--check", type=int, default=20_000, help="Random equivalence cases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check_equivalence(args.check, args.seed)
+
+    texts = _corpus(args.texts, args.chars, args.seed)
+    n_bytes = sum(len(t.encode("utf-8")) for t in texts)
+    print(f"{args.texts} texts x ~{args.chars} chars ({n_bytes / 1e6:.1f} MB)\n")
+    print(f"  {'':<22} {'old MB/s':>9} {'new MB/s':>9} {'speedup':>8}")
+
+    for label, max_chars in (("chunk (max 4000)", 4000), ("excerpt (max 300)", 300)):
+        old = _mbps(lambda: [_reference(t, max_chars) for t in texts], n_bytes, args.repeat)
+        new = _mbps(lambda: [sanitize_text_for_embedding(t, max_chars) for t in texts], n_bytes, args.repeat)
+        batch = _mbps(lambda: sanitize_texts_for_embedding(texts, max_chars), n_bytes, args.repeat)
+        print(f"  {label:<22} {old:>9.1f} {new:>9.1f} {new / old:>7.1f}x")
+        print(f"  {'  batch API':<22} {'':>9} {batch:>9.1f} {batch / old:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
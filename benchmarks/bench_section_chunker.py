@@ -0,0 +1,123 @@
+"""
+benchmarks/bench_section_chunker.py
+
+Throughput of the structure-aware chunker (app.rag.processors.section_chunker)
+in MB/s of page text.
+
+Before timing anything, known sentence-splitting and section-path cases
+must come out exactly as expected, and randomly generated pages must keep every word
+(chunks may repeat words as overlap, never lose one); any failure stops
+the run with the offending input.
+
+Run from the repo root:
+    python -m benchmarks.bench_section_chunker --pages 2000 --check 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from app.rag.processors.section_chunker import SectionChunker, _split_sentences
+from app.rag.types import Page
+
+# (paragraph, expected sentences)
+_SENTENCE_CASES = [
+    ("Setbacks apply. Sec. 2303 governs junk vehicles.",
+     ["Setbacks apply.", "Sec. 2303 governs junk vehicles."]),
+    ("Approved. Mr. J. Smith signed it. Done.",
+     ["Approved.", "Mr. J. Smith signed it.", "Done."]),
+    ("See N.C. Gen. Stat. 160D-702. It applies.",
+     ["See N.C. Gen. Stat. 160D-702.", "It applies."]),
+    ("Sec. 4 is first. No. 7 is next.",
+     ["Sec. 4 is first.", "No. 7 is next."]),
+]
+
+# (page text, expected section of each chunk) - all-caps codes included
+_SECTION_CASES = [
+    ("ARTICLE IV\nZONING DISTRICTS\nSEC. 4.1 SETBACKS\nTHE LOT SHALL BE SET BACK 20 FEET.\n"
+     "SEC. 4.2 HEIGHT\nNO BUILDING SHALL EXCEED 35 FEET.",
+     ["ARTICLE IV ZONING DISTRICTS > SEC. 4.1 SETBACKS", "ARTICLE IV ZONING DISTRICTS > SEC. 4.2 HEIGHT"]),
+    ("ARTICLE IV\nSEC. 4.1 SETBACKS\nFront yards apply.\nSEC. 4.2 HEIGHT\nHeight is limited.",
+     ["ARTICLE IV > SEC. 4.1 SETBACKS", "ARTICLE IV > SEC. 4.2 HEIGHT"]),
+]
+
+_WORDS = (
+    "the lot shall be setback from any street right-of-way not less than "
+    "feet measured perpendicular accessory structures may encroach provided "
+    "Sec. No. Mr. J. N.C. Gen. Stat. e.g. 12 (a) 4.2"
+).split()
+
+_LINES = ["ARTICLE IV", "ZONING DISTRICTS", "Sec. 4.2 Setbacks.", "Section 12-3", "(a)", "1.", "•", ""]
+
+
+def _check_sentences() -> None:
+    for paragraph, expected in _SENTENCE_CASES:
+        got = list(_split_sentences(paragraph))
+        if got != expected:
+            sys.exit(f"sentence split mismatch for {paragraph!r}:\n  got      {got}\n  expected {expected}")
+
+
+def _check_sections() -> None:
+    for text, expected in _SECTION_CASES:
+        chunks = SectionChunker(max_tokens=64, overlap_tokens=12).chunk_page(Page(page_num=1, text=text))
+        got = [c.section for c in chunks]
+        if got != expected:
+            sys.exit(f"section mismatch for {text!r}:\n  got      {got}\n  expected {expected}")
+
+
+def _random_page(rng: random.Random, page_num: int) -> Page:
+    lines: List[str] = []
+    for _ in range(rng.randrange(1, 60)):
+        if rng.random() < 0.15:
+            lines.append(rng.choice(_LINES))
+        else:
+            words = [rng.choice(_WORDS) for _ in range(rng.randrange(1, 40))]
+            if rng.random() < 0.5:
+                words[-1] += "."
+            lines.append(" ".join(words))
+    return Page(page_num=page_num, text="\n".join(lines))
+
+
+def _check_words(pages: int, seed: int) -> None:
+    rng = random.Random(seed)
+    chunker = SectionChunker(max_tokens=64, overlap_tokens=12)
+    for n in range(1, pages + 1):
+        page = _random_page(rng, n)
+        chunks = chunker.chunk_page(page)
+        kept = " ".join(c.text for c in chunks).split()
+        for word in page.text.split():
+            if word not in kept:
+                sys.exit(f"word {word!r} lost on page:\n{page.text}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=2000, help="pages to time")
+    parser.add_argument("--check", type=int, default=2000, help="random pages to check for lost words")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    _check_sentences()
+    _check_sections()
+    _check_words(args.check, args.seed)
+    print(
+        f"checks passed: {len(_SENTENCE_CASES)} sentence cases, {len(_SECTION_CASES)} section cases, "
+        f"{args.check} random pages"
+    )
+
+    rng = random.Random(args.seed + 1)
+    pages = [_random_page(rng, n) for n in range(1, args.pages + 1)]
+    size_mb = sum(len(p.text) for p in pages) / 1e6
+    chunker = SectionChunker()
+    t0 = time.perf_counter()
+    chunks = sum(len(chunker.chunk_page(p)) for p in pages)
+    seconds = time.perf_counter() - t0
+    print(f"{size_mb:.1f} MB in {seconds:.2f}s ({size_mb / seconds:.1f} MB/s), {chunks} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+benchmarks/stub_ollama.py
+
+A tiny in-process stand-in for Ollama's HTTP API, used by the benchmark
+scripts so they measure OUR client/pipeline overhead rather than model time.
+
+Supported endpoints (deterministic, fake payloads):
+  POST /api/embeddings   {"model", "prompt"}   -> {"embedding": [...]}
+  POST /api/embed        {"model", "input"}    -> {"embeddings": [[...], ...]}
+                         (404 when supports_batch=False, like Ollama < 0.3)
+  POST /api/chat         {"model", "messages"} -> {"message": {"content": "..."}}
+                         ("stream": true -> chunked NDJSON, one line per word)
+
+Chat timing model: delay_s per call (think prompt / image prefill) plus
+token_delay_s per word of the reply (decode). parallel=N lets at most N
+chat requests be processed at once, like OLLAMA_NUM_PARALLEL; the rest
+queue. chat_reply_fn(payload) -> str replaces the fixed chat_reply.
+
+Usage:
+    with StubOllama(dim=768, delay_s=0.0) as stub:
+        client = OllamaClient(base_url=stub.url)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import socket
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+
+def fake_embedding(text: str, dim: int) -> list[float]:
+    """Deterministic pseudo-embedding derived from the text hash."""
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    return [((seed[i % len(seed)] + i) % 251) / 251.0 for i in range(dim)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between calls
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        # Go's net/http (what Ollama runs on) disables Nagle by default; match it
+        # so keep-alive connections are not penalized by delayed-ACK stalls.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args) -> None:  # keep benchmark output clean
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _stream_chat(self, payload: dict, stub: "StubOllama") -> None:
+        """Send the reply word by word as chunked NDJSON, like Ollama's stream mode."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        words = stub.reply_for(payload).split(" ")
+        for i, word in enumerate(words):
+            if stub.token_delay_s:
+                time.sleep(stub.token_delay_s)
+            token = word if i == 0 else " " + word
+            self._write_chunk({"model": payload.get("model"),
+                               "message": {"role": "assistant", "content": token}, "done": False})
+        self._write_chunk({"model": payload.get("model"),
+                           "message": {"role": "assistant", "content": ""}, "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, body: dict) -> None:
+        line = json.dumps(body).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self) -> None:
+        stub: StubOllama = self.server.stub  # type: ignore[attr-defined]
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        stub.record(self.path)
+        if self.path == "/api/chat":
+            with stub.chat_slots:
+                if stub.delay_s:
+                    time.sleep(stub.delay_s)
+                self._chat(payload, stub)
+            return
+        if stub.delay_s:
+            time.sleep(stub.delay_s)
+
+        if self.path == "/api/embeddings":
+            self._send_json(200, {"embedding": fake_embedding(payload.get("prompt", ""), stub.dim)})
+        elif self.path == "/api/embed" and stub.supports_batch:
+            inputs = payload.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            self._send_json(200, {"embeddings": [fake_embedding(t, stub.dim) for t in inputs]})
+        else:
+            self._send_json(404, {"error": "404 page not found"})
+
+    def _chat(self, payload: dict, stub: "StubOllama") -> None:
+        if payload.get("stream"):
+            self._stream_chat(payload, stub)
+            return
+        reply = stub.reply_for(payload)
+        if stub.token_delay_s:
+            time.sleep(stub.token_delay_s * len(reply.split()))
+        self._send_json(200, {
+            "model": payload.get("model"),
+            "message": {"role": "assistant", "content": reply},
+            "done": True,
+        })
+
+
+class StubOllama:
+    """Run the stub server on a background thread (127.0.0.1, random port)."""
+
+    def __init__(
+        self,
+        dim: int = 768,
+        delay_s: float = 0.0,
+        chat_reply: str = "stub answer",
+        supports_batch: bool = True,
+        token_delay_s: float = 0.0,
+        chat_reply_fn: Callable[[dict], str] | None = None,
+        parallel: int | None = None,
+    ):
+        self.dim = dim
+        self.chat_reply_fn = chat_reply_fn
+        self.chat_slots = threading.BoundedSemaphore(parallel) if parallel else nullcontext()
+        self.supports_batch = supports_batch
+        self.token_delay_s = token_delay_s
+        self.delay_s = delay_s
+        self.chat_reply = chat_reply
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self  # type: ignore[attr-defined]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reply_for(self, payload: dict) -> str:
+        return self.chat_reply_fn(payload) if self.chat_reply_fn else self.chat_reply
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def start(self) -> "StubOllama":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubOllama":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()